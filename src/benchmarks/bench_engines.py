@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des moteurs SEIRS (Python / C / C++)
+
+Mesure, pour chaque moteur et chaque combinaison (N, L, T) demandée :
+- le temps d'exécution (meilleur de --repeat lancements) ;
+- le débit en mises à jour d'agents par seconde (N*T / temps), ou en pas
+  d'intégration par seconde pour les modèles ODE ;
+- la mémoire résidente maximale du processus (ru_maxrss, relevée par
+  l'intermédiaire maxrss.c pour ne pas compter la mémoire du processus
+  Python copiée avant exec) ;
+- la taille des fichiers produits.
+
+Les programmes C et C++ (et maxrss.c) sont recompilés depuis src/ (-O2)
+dans --build. Chaque lancement se fait dans un dossier temporaire. Pour
+ode-py, le temps est celui de l'intégration seule (Euler et RK4), mesuré
+dans le processus : ni démarrage de l'interpréteur ni tracé des figures.
+
+Les résultats sont écrits en JSON (--out). Avec --baseline, chaque mesure
+est comparée à la référence enregistrée : une mesure plus lente que la
+référence de plus de --tol (fraction) est signalée comme régression et le
+script se termine avec le code 1. --save-baseline enregistre les mesures
+courantes comme nouvelle référence.
+
+À lancer depuis la racine du dépôt :
+    python src/benchmarks/bench_engines.py --N 1000 10000 100000 --T 100
+"""
+
+from pathlib import Path
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = Path(__file__).resolve().parents[2]
+SRC = ROOT / "src"
+
+PY_ENGINES = ("loop", "vectorized", "numba", "event")
+AGENT_ENGINES = tuple(f"py-{e}" for e in PY_ENGINES) + ("cpp", "c")
+ODE_ENGINES = ("ode-py", "ode-c")
+ALL_ENGINES = AGENT_ENGINES + ODE_ENGINES
+
+# Modèle ODE : 2 méthodes (Euler, RK4) x 730 pas, taille fixe
+ODE_STEPS = 2 * 730
+
+# Écart absolu (s) en dessous duquel une différence est attribuée au bruit
+NOISE_S = 0.05
+
+# ode-py : intégrations seules, durée écrite dans SOLVE_FILE (dossier courant)
+SOLVE_FILE = "solve_s"
+ODE_PY = """
+import sys, time
+sys.path.insert(0, {src!r})
+from seirs_part1 import Initial, Params, simulate
+t0 = time.perf_counter()
+for method in ("euler", "rk4"):
+    simulate(method, 1.0, 730, Params(), Initial())
+open({out!r}, "w").write(repr(time.perf_counter() - t0))
+"""
+
+
+def build(build_dir: Path) -> dict:
+    """Compile les moteurs C/C++ et renvoie {nom: chemin de l'exécutable}."""
+    build_dir.mkdir(parents=True, exist_ok=True)
+    targets = {
+        "cpp": (["g++", "-O2", "-std=c++17", "-fopenmp"], SRC / "part2_multi_agent/cpp/ma_seirs.cpp", "ma_seirs_cpp"),
+        "c": (["gcc", "-O2"], SRC / "part2_multi_agent/c/ma_seirs_c.c", "ma_seirs_c"),
+        "ode-c": (["gcc", "-O2"], SRC / "part1_seirs_ode/c/seirs_part1.c", "seirs_part1_c"),
+        "maxrss": (["gcc", "-O2"], SRC / "benchmarks/maxrss.c", "maxrss"),
+    }
+    exes = {}
+    for name, (cc, source, exe) in targets.items():
+        out = build_dir / exe
+        cmd = cc + ["-o", str(out), str(source)]
+        if cc[0] == "gcc":
+            cmd.append("-lm")
+        subprocess.run(cmd, check=True)
+        exes[name] = out
+    return exes
+
+
+def command(engine: str, exes: dict, N: int, L: int, T: int, seed: int, workdir: Path):
+    py = sys.executable
+    if engine.startswith("py-"):
+        return [py, str(SRC / "part2_multi_agent/python/ma_seirs.py"),
+                "--engine", engine[3:], "--seed", str(seed),
+                "--N", str(N), "--L", str(L), "--T", str(T),
+                "--out", str(workdir / "out.csv")]
+    if engine == "cpp":
+        return [str(exes["cpp"]), "--seed", str(seed), "--N", str(N), "--L", str(L),
+                "--T", str(T), "--out", str(workdir / "out.csv")]
+    if engine == "c":
+        return [str(exes["c"]), str(seed), str(workdir / "out.csv"),
+                "--N", str(N), "--L", str(L), "--T", str(T)]
+    if engine == "ode-py":
+        return [py, "-c", ODE_PY.format(src=str(SRC / "part1_seirs_ode/python"), out=SOLVE_FILE)]
+    if engine == "ode-c":
+        (workdir / "data/part1_seirs_ode").mkdir(parents=True, exist_ok=True)
+        return [str(exes["ode-c"])]
+    raise ValueError(f"Moteur inconnu: {engine}")
+
+
+def run_once(cmd: list, cwd: Path, timeout: float, wrapper: Path) -> dict:
+    """
+    Lance une commande via l'intermédiaire maxrss (exes["maxrss"] de build) ;
+    renvoie temps, code de sortie et RSS max (Linux/macOS).
+    """
+    rss_file = Path(cwd) / ".maxrss"
+    with tempfile.TemporaryFile() as err:
+        t0 = time.perf_counter()
+        # session propre : un dépassement de --timeout tue aussi la commande lancée
+        proc = subprocess.Popen([str(wrapper), str(rss_file)] + cmd, cwd=cwd,
+                                stdout=subprocess.DEVNULL, stderr=err, start_new_session=True)
+        timer = threading.Timer(timeout, os.killpg, (proc.pid, signal.SIGKILL))
+        timer.start()
+        try:
+            proc.wait()
+        finally:
+            timer.cancel()
+        wall = time.perf_counter() - t0
+
+        err.seek(0)
+        stderr = err.read().decode(errors="replace").strip()
+
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    rss = None
+    if rss_file.exists():
+        rss = int(rss_file.read_text()) * (1 if sys.platform == "darwin" else 1024)
+        rss_file.unlink()
+    return {"wall_s": wall, "returncode": proc.returncode, "peak_rss_bytes": rss,
+            "stderr": stderr[-500:]}
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def bench_case(engine, exes, N, L, T, args) -> dict:
+    best = None
+    for _ in range(args.repeat):
+        workdir = Path(tempfile.mkdtemp(prefix="bench_"))
+        try:
+            cmd = command(engine, exes, N, L, T, args.seed, workdir)
+            res = run_once(cmd, workdir, args.timeout, exes["maxrss"])
+            solve = workdir / SOLVE_FILE
+            if solve.exists():  # ode-py : intégration seule
+                res["wall_s"] = float(solve.read_text())
+                solve.unlink()
+            res["output_bytes"] = dir_size(workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if res["returncode"] != 0:
+            best = res
+            break
+        if best is None or res["wall_s"] < best["wall_s"]:
+            best = res
+
+    if engine in ODE_ENGINES:
+        row = {"engine": engine, "N": None, "L": None, "T": 730,
+               "updates": ODE_STEPS, "unit": "steps"}
+    else:
+        row = {"engine": engine, "N": N, "L": L, "T": T, "updates": N * T, "unit": "agent-updates"}
+    row.update(best)
+    row["ok"] = best["returncode"] == 0
+    row["updates_per_s"] = row["updates"] / best["wall_s"] if row["ok"] else None
+    if row["ok"]:
+        del row["stderr"]
+    return row
+
+
+def case_key(row: dict) -> str:
+    return f"{row['engine']}|N={row['N']}|L={row['L']}|T={row['T']}"
+
+
+def compare(results: list, baseline: dict, tol: float) -> bool:
+    ref = {case_key(r): r for r in baseline["results"]}
+    ok = True
+    print(f"\n=== Comparaison à la référence ({baseline['meta'].get('date', '?')}) ===")
+    for row in results:
+        base = ref.get(case_key(row))
+        if base is None or not base.get("ok") or not row["ok"]:
+            continue
+        ratio = row["wall_s"] / base["wall_s"]
+        significant = abs(row["wall_s"] - base["wall_s"]) > NOISE_S
+        slower = significant and ratio > 1 + tol
+        flag = "RÉGRESSION" if slower else ("gain" if significant and ratio < 1 - tol else "=")
+        ok &= not slower
+        print(f"  {case_key(row):40s} {base['wall_s']:9.3f} s -> {row['wall_s']:9.3f} s "
+              f"(x{ratio:.2f}) {flag}")
+    return ok
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des moteurs SEIRS")
+    parser.add_argument("--engines", nargs="+", choices=ALL_ENGINES, default=list(ALL_ENGINES),
+                        help="Moteurs mesurés")
+    parser.add_argument("--N", nargs="+", type=int, default=[1000, 10000],
+                        help="Tailles de population (p. ex. 1000 10000 100000 1000000)")
+    parser.add_argument("--L", nargs="+", type=int, default=[300], help="Tailles de grille")
+    parser.add_argument("--T", nargs="+", type=int, default=[100], help="Horizons (jours)")
+    parser.add_argument("--seed", type=int, default=12345, help="Graine")
+    parser.add_argument("--repeat", type=int, default=1, help="Lancements par cas (on garde le meilleur)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Durée max d'un lancement (s)")
+    parser.add_argument("--build", type=str, default=str(ROOT / "build"),
+                        help="Dossier de compilation des moteurs C/C++")
+    parser.add_argument("--out", type=str, default="data/benchmarks/results.json",
+                        help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Référence JSON à laquelle comparer les mesures")
+    parser.add_argument("--tol", type=float, default=0.10,
+                        help="Ralentissement toléré avant de signaler une régression")
+    parser.add_argument("--save-baseline", type=str, default=None,
+                        help="Enregistre aussi les résultats comme nouvelle référence")
+    args = parser.parse_args()
+
+    exes = build(Path(args.build))
+
+    cases = []
+    for engine in args.engines:
+        if engine in ODE_ENGINES:
+            cases.append((engine, None, None, None))
+        else:
+            cases += [(engine, N, L, T) for N in args.N for L in args.L for T in args.T]
+
+    results = []
+    for engine, N, L, T in cases:
+        row = bench_case(engine, exes, N, L, T, args)
+        results.append(row)
+        if row["ok"]:
+            print(f"{case_key(row):40s} {row['wall_s']:9.3f} s  "
+                  f"{row['updates_per_s']:12.4g} {row['unit']}/s  "
+                  f"RSS {row['peak_rss_bytes'] / 2**20:8.1f} Mo  "
+                  f"sortie {row['output_bytes'] / 1024:8.1f} Ko")
+        else:
+            print(f"{case_key(row):40s} ÉCHEC (code {row['returncode']}) {row['stderr']}")
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "commit": git_commit(),
+        },
+        "results": results,
+    }
+    for path in filter(None, [args.out, args.save_baseline]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=1), encoding="utf-8")
+        print("OK ->", path)
+
+    ok = True
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        ok = compare(results, baseline, args.tol)
+    sys.exit(0 if ok and all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
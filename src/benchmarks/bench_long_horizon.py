@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des longs horizons (T >> 730) : moteur événementiel contre
+moteur numba du modèle multi-agent (Partie 2)
+
+Avec mean_dR = 365, la majorité des agents est en R une fois l'épidémie
+installée : le moteur "event" ne visite chaque jour que S, I et les
+transitions arrivées à échéance, le moteur "numba" visite les N agents.
+
+Pour chaque horizon T et chaque moteur, on mesure le temps (meilleur de
+--repeat, compilation exclue) et le débit en agents-jours simulés par
+seconde. Les niveaux moyens S,E,I,R sur la dernière année servent de
+contrôle : les deux moteurs suivent la même loi, les écarts ne doivent
+refléter que la variabilité d'une réplication à l'autre.
+
+À lancer depuis la racine du dépôt :
+    python src/benchmarks/bench_long_horizon.py --T 730 3650 7300
+"""
+
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src/part2_multi_agent/python"))
+
+from ma_seirs import Params, simulate  # noqa: E402
+
+ENGINES = ("numba", "event")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Longs horizons : moteurs event et numba")
+    parser.add_argument("--T", nargs="+", type=int, default=[730, 3650, 7300],
+                        help="Horizons (jours)")
+    parser.add_argument("--N", type=int, default=20000, help="Nombre d'individus")
+    parser.add_argument("--L", type=int, default=300, help="Taille de la grille")
+    parser.add_argument("--mean-dR", type=float, default=365.0, help="Durée moyenne en R")
+    parser.add_argument("--seed", type=int, default=12345, help="Graine")
+    parser.add_argument("--repeat", type=int, default=1, help="Lancements par cas")
+    parser.add_argument("--out", type=str, default="data/benchmarks/long_horizon.json",
+                        help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    # compilation des noyaux hors chronométrage
+    for engine in ENGINES:
+        simulate(Params(L=10, N=50, T=2, init_S=45, init_I=5), engine=engine)
+
+    results = []
+    for T in args.T:
+        p = Params(seed=args.seed, T=T, N=args.N, L=args.L, mean_dR=args.mean_dR)
+        p.init_S = p.N - p.init_E - p.init_I - p.init_R
+        for engine in ENGINES:
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                counts = simulate(p, engine=engine)
+                wall = time.perf_counter() - t0
+                best = wall if best is None else min(best, wall)
+
+            last_year = counts[-min(365, T):].mean(axis=0) / p.N
+            row = {"engine": engine, "N": p.N, "L": p.L, "T": T, "mean_dR": p.mean_dR,
+                   "wall_s": best, "agent_days_per_s": p.N * T / best,
+                   "last_year_fraction": dict(zip("SEIR", last_year.round(4).tolist()))}
+            results.append(row)
+            print(f"T={T:6d} {engine:6s} {best:8.2f} s  {row['agent_days_per_s']:10.4g} agents-jours/s  "
+                  "dernière année S,E,I,R = " + ", ".join(f"{v:.3f}" for v in last_year))
+
+        walls = {r["engine"]: r["wall_s"] for r in results if r["T"] == T}
+        print(f"         accélération event/numba : x{walls['numba'] / walls['event']:.2f}")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"results": results}, indent=1), encoding="utf-8")
+    print("OK ->", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Passage à l'échelle du moteur C++ multithread (Partie 2, --threads)
+
+Pour chaque nombre de threads P demandé, mesure le temps (meilleur de
+--repeat lancements) et le débit en mises à jour d'agents par seconde ;
+l'accélération est rapportée à P = 1 (même moteur), et le moteur série
+(sans --threads) est mesuré comme référence. Les trajectoires du moteur
+multithread ne dépendant pas de P, toutes les mesures font le même calcul.
+
+Le programme est compilé (-O2 -fopenmp) dans --build via bench_engines.py.
+À lancer depuis la racine du dépôt :
+    python src/benchmarks/bench_threads.py --threads 1 2 4 8 --N 1000000 --L 1000
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+from bench_engines import ROOT, build, run_once
+
+
+def bench(exe: Path, wrapper: Path, args, threads: int) -> dict:
+    best = None
+    for _ in range(args.repeat):
+        workdir = Path(tempfile.mkdtemp(prefix="bench_"))
+        try:
+            cmd = [str(exe), "--seed", str(args.seed), "--N", str(args.N), "--L", str(args.L),
+                   "--T", str(args.T), "--out", str(workdir / "out.csv")]
+            if threads > 0:
+                cmd += ["--threads", str(threads), "--substeps", str(args.substeps)]
+            res = run_once(cmd, workdir, args.timeout, wrapper)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if res["returncode"] != 0:
+            raise RuntimeError(f"Échec ({' '.join(cmd)}) : {res['stderr']}")
+        if best is None or res["wall_s"] < best["wall_s"]:
+            best = res
+    updates = args.N * args.T
+    return {"engine": "cpp-mt" if threads > 0 else "cpp", "threads": threads,
+            "substeps": args.substeps if threads > 0 else None,
+            "N": args.N, "L": args.L, "T": args.T, "wall_s": best["wall_s"],
+            "peak_rss_bytes": best["peak_rss_bytes"], "updates_per_s": updates / best["wall_s"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Passage à l'échelle du moteur C++ multithread")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4],
+                        help="Nombres de threads mesurés (P = 1, référence, toujours inclus)")
+    parser.add_argument("--substeps", type=int, default=100, help="Sous-pas par jour")
+    parser.add_argument("--N", type=int, default=1000000, help="Nombre d'individus")
+    parser.add_argument("--L", type=int, default=1000, help="Taille de la grille")
+    parser.add_argument("--T", type=int, default=20, help="Nombre de jours")
+    parser.add_argument("--seed", type=int, default=12345, help="Graine")
+    parser.add_argument("--repeat", type=int, default=1, help="Lancements par cas (on garde le meilleur)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Durée max d'un lancement (s)")
+    parser.add_argument("--build", type=str, default=str(ROOT / "build"),
+                        help="Dossier de compilation des moteurs C/C++")
+    parser.add_argument("--out", type=str, default="data/benchmarks/threads.json",
+                        help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    exes = build(Path(args.build))
+    exe, wrapper = exes["cpp"], exes["maxrss"]
+    print(f"Cœurs disponibles : {os.cpu_count()}")
+
+    serial = bench(exe, wrapper, args, 0)
+    print(f"série          {serial['wall_s']:8.3f} s  {serial['updates_per_s']:10.4g} mises à jour/s")
+    results = [serial]
+    # référence de l'accélération : P = 1, mesuré même s'il n'est pas demandé
+    threads = sorted(set(args.threads) | {1})
+    base = None
+    for P in threads:
+        row = bench(exe, wrapper, args, P)
+        if P == 1:
+            base = row["wall_s"]
+        row["speedup"] = base / row["wall_s"]
+        row["efficiency"] = row["speedup"] / P
+        results.append(row)
+        print(f"{P:3d} thread(s)  {row['wall_s']:8.3f} s  {row['updates_per_s']:10.4g} mises à jour/s"
+              f"  accélération x{row['speedup']:.2f} (efficacité {row['efficiency']:.0%})")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=1),
+                   encoding="utf-8")
+    print("OK ->", out)
+
+
+if __name__ == "__main__":
+    main()
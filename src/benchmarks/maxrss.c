@@ -0,0 +1,56 @@
+/*
+ * maxrss <fichier> <commande> [arguments...]
+ *
+ * Lance la commande et écrit dans <fichier> la mémoire résidente maximale
+ * (ru_maxrss : kilo-octets sous Linux, octets sous macOS) du processus
+ * lancé. Intermédiaire utilisé par bench_engines.py : mesuré depuis Python,
+ * ru_maxrss compterait aussi la mémoire du processus Python hérité avant
+ * exec ; ici, le processus copié avant exec est ce petit programme.
+ * Code de sortie : celui de la commande (128 + signal si elle est tuée).
+ */
+#include <signal.h>
+#include <stdio.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static pid_t child = 0;
+
+static void forward(int sig) {
+    if (child > 0) kill(child, sig);
+}
+
+int main(int argc, char **argv) {
+    if (argc < 3) {
+        fprintf(stderr, "Usage: %s <fichier> <commande> [arguments...]\n", argv[0]);
+        return 2;
+    }
+    child = fork();
+    if (child < 0) {
+        perror("fork");
+        return 2;
+    }
+    if (child == 0) {
+        execvp(argv[2], argv + 2);
+        perror(argv[2]);
+        _exit(127);
+    }
+    signal(SIGTERM, forward);
+    signal(SIGINT, forward);
+
+    int status = 0;
+    struct rusage usage;
+    while (wait4(child, &status, 0, &usage) < 0) {
+    }
+
+    FILE *f = fopen(argv[1], "w");
+    if (f == NULL) {
+        perror(argv[1]);
+        return 2;
+    }
+    fprintf(f, "%ld\n", (long)usage.ru_maxrss);
+    fclose(f);
+
+    if (WIFSIGNALED(status)) return 128 + WTERMSIG(status);
+    return WEXITSTATUS(status);
+}
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Partie 1 — SEIRS ODE : intégrateurs à pas adaptatif
+- Dormand–Prince 5(4) (explicite, contrôle d'erreur, sortie dense)
+- Rosenbrock 2(3) (linéairement implicite, L-stable, type ode23s de
+  Shampine & Reichelt) pour les régimes raides (p. ex. rho très petit)
+
+Les deux méthodes renvoient la solution aux jours entiers (sortie dense)
+et un bilan de coût : pas acceptés/rejetés, évaluations du second membre,
+Jacobiens, résolutions linéaires.
+
+Lancé seul, le script compare coût et précision de ces méthodes avec
+Euler et RK4 à pas fixe, par rapport à une solution de référence très
+précise.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from seirs_part1 import Initial, Params, seirs_rhs, simulate
+
+
+# =========================
+# Outils communs
+# =========================
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.0
+
+
+def new_stats():
+    return {"n_accepted": 0, "n_rejected": 0, "n_rhs": 0, "n_jac": 0, "n_solve": 0}
+
+
+def error_norm(err, y, y_new, rtol, atol):
+    scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+    return np.sqrt(np.mean((err / scale) ** 2))
+
+
+def seirs_jacobian(y, p: Params):
+    S, E, I, R = y
+    return np.array([
+        [-p.beta * I, 0.0,      -p.beta * S,  p.rho],
+        [ p.beta * I, -p.sigma,  p.beta * S,  0.0],
+        [ 0.0,         p.sigma, -p.gamma,     0.0],
+        [ 0.0,         0.0,      p.gamma,    -p.rho],
+    ])
+
+
+def initial_step(f, y0, f0, order, rtol, atol, stats):
+    """Choix du premier pas (Hairer, Nørsett & Wanner, II.4)."""
+    scale = atol + np.abs(y0) * rtol
+    d0 = np.sqrt(np.mean((y0 / scale) ** 2))
+    d1 = np.sqrt(np.mean((f0 / scale) ** 2))
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+
+    f1 = f(y0 + h0 * f0)
+    stats["n_rhs"] += 1
+    d2 = np.sqrt(np.mean(((f1 - f0) / scale) ** 2)) / h0
+    if d1 <= 1e-15 and d2 <= 1e-15:
+        h1 = max(1e-6, h0 * 1e-3)
+    else:
+        h1 = (0.01 / max(d1, d2)) ** (1.0 / (order + 1))
+    return min(100 * h0, h1)
+
+
+def _prepare(days, t_eval):
+    if t_eval is None:
+        t_eval = np.arange(0, int(days) + 1, dtype=np.float64)
+    t_eval = np.atleast_1d(np.asarray(t_eval, dtype=np.float64))
+    if np.any(np.diff(t_eval) < 0) or np.any(t_eval < 0) or np.any(t_eval > days):
+        raise ValueError(f"t_eval doit être croissant et compris dans [0, {days}]")
+    return t_eval
+
+
+# =========================
+# Dormand–Prince 5(4)
+# =========================
+DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+DP_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+DP_E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+# Sortie dense d'ordre 4 (coefficients de Hairer) : y(t + x h) = y + h K^T P [x, x², x³, x⁴]
+DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+
+def solve_dopri5(days, p: Params, init: Initial, rtol=1e-6, atol=1e-9, t_eval=None):
+    """
+    Intègre le modèle SEIRS par Dormand–Prince 5(4) à pas adaptatif.
+    Renvoie (t_eval, Y, stats), Y de forme (len(t_eval), 4) ; t_eval
+    (jours entiers par défaut) doit être croissant et inclus dans [0, days].
+    """
+    def f(y):
+        return seirs_rhs(y, p)
+
+    t_eval = _prepare(days, t_eval)
+    stats = new_stats()
+    Y = np.empty((len(t_eval), 4))
+
+    t = 0.0
+    y = np.array([init.S0, init.E0, init.I0, init.R0], dtype=np.float64)
+    K = np.empty((7, 4))
+    K[0] = f(y)
+    stats["n_rhs"] += 1
+    h = initial_step(f, y, K[0], 4, rtol, atol, stats)
+
+    j = 0
+    while j < len(t_eval) and t_eval[j] <= t:
+        Y[j] = y
+        j += 1
+
+    while t < days:
+        h = min(h, days - t)
+
+        for s in range(1, 6):
+            K[s] = f(y + h * (np.asarray(DP_A[s]) @ K[:s]))
+        y_new = y + h * (DP_B @ K[:6])
+        K[6] = f(y_new)
+        stats["n_rhs"] += 6
+
+        err = error_norm(h * (DP_E @ K), y, y_new, rtol, atol)
+        if err <= 1.0:
+            t_new = t + h
+            Q = K.T @ DP_P
+            while j < len(t_eval) and t_eval[j] <= t_new:
+                x = (t_eval[j] - t) / h
+                Y[j] = y + h * (Q @ np.array([x, x**2, x**3, x**4]))
+                j += 1
+
+            t, y = t_new, y_new
+            K[0] = K[6]  # FSAL
+            stats["n_accepted"] += 1
+            factor = MAX_FACTOR if err == 0 else min(MAX_FACTOR, SAFETY * err ** -0.2)
+        else:
+            stats["n_rejected"] += 1
+            factor = max(MIN_FACTOR, SAFETY * err ** -0.2)
+        h *= factor
+
+    return t_eval, Y, stats
+
+
+# =========================
+# Rosenbrock 2(3) (ode23s)
+# =========================
+ROS_D = 1.0 / (2.0 + np.sqrt(2.0))
+ROS_E32 = 6.0 + np.sqrt(2.0)
+
+
+def solve_rosenbrock23(days, p: Params, init: Initial, rtol=1e-3, atol=1e-6, t_eval=None):
+    """
+    Intègre le modèle SEIRS par la méthode de Rosenbrock 2(3) de
+    Shampine & Reichelt (L-stable, Jacobien analytique, un système
+    linéaire 4x4 par étage). Adaptée aux régimes raides.
+    Renvoie (t_eval, Y, stats).
+    """
+    def f(y):
+        return seirs_rhs(y, p)
+
+    t_eval = _prepare(days, t_eval)
+    stats = new_stats()
+    Y = np.empty((len(t_eval), 4))
+    Id = np.eye(4)
+
+    t = 0.0
+    y = np.array([init.S0, init.E0, init.I0, init.R0], dtype=np.float64)
+    F0 = f(y)
+    stats["n_rhs"] += 1
+    h = initial_step(f, y, F0, 2, rtol, atol, stats)
+
+    j = 0
+    while j < len(t_eval) and t_eval[j] <= t:
+        Y[j] = y
+        j += 1
+
+    J = seirs_jacobian(y, p)
+    stats["n_jac"] += 1
+
+    while t < days:
+        h = min(h, days - t)
+
+        W = Id - h * ROS_D * J
+        k1 = np.linalg.solve(W, F0)
+        F1 = f(y + 0.5 * h * k1)
+        k2 = np.linalg.solve(W, F1 - k1) + k1
+        y_new = y + h * k2
+        F2 = f(y_new)
+        k3 = np.linalg.solve(W, F2 - ROS_E32 * (k2 - F1) - 2.0 * (k1 - F0))
+        stats["n_rhs"] += 2
+        stats["n_solve"] += 3
+
+        err = error_norm(h / 6.0 * (k1 - 2.0 * k2 + k3), y, y_new, rtol, atol)
+        if err <= 1.0:
+            t_new = t + h
+            while j < len(t_eval) and t_eval[j] <= t_new:
+                s = (t_eval[j] - t) / h
+                Y[j] = y + h * (s * (1 - s) / (1 - 2 * ROS_D) * k1
+                                + s * (s - 2 * ROS_D) / (1 - 2 * ROS_D) * k2)
+                j += 1
+
+            t, y, F0 = t_new, y_new, F2
+            J = seirs_jacobian(y, p)
+            stats["n_accepted"] += 1
+            stats["n_jac"] += 1
+            factor = MAX_FACTOR if err == 0 else min(MAX_FACTOR, SAFETY * err ** (-1 / 3))
+        else:
+            stats["n_rejected"] += 1
+            factor = max(MIN_FACTOR, SAFETY * err ** (-1 / 3))
+        h *= factor
+
+    return t_eval, Y, stats
+
+
+# =========================
+# Comparaison coût / précision
+# =========================
+def run_fixed(method, dt, days, p, init):
+    t, Y = simulate(method, dt, days, p, init)
+    stride = int(round(1.0 / dt))
+    n_steps = len(t) - 1
+    stages = 1 if method == "euler" else 4
+    stats = new_stats()
+    stats["n_accepted"] = n_steps
+    stats["n_rhs"] = n_steps * stages
+    return Y[::stride], stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SEIRS ODE — intégrateurs adaptatifs (Partie 1)")
+    parser.add_argument("--days", type=int, default=730, help="Horizon (jours)")
+    parser.add_argument("--rho", type=float, default=1.0 / 365.0, help="Taux de perte d'immunité")
+    parser.add_argument("--beta", type=float, default=0.5, help="Taux de transmission")
+    parser.add_argument("--out", type=str, default=None,
+                        help="CSV optionnel du tableau comparatif")
+    args = parser.parse_args()
+
+    p = Params(rho=args.rho, beta=args.beta)
+    init = Initial()
+
+    _, Y_ref, _ = solve_dopri5(args.days, p, init, rtol=1e-12, atol=1e-14)
+
+    cases = [
+        ("euler dt=1", lambda: run_fixed("euler", 1.0, args.days, p, init)),
+        ("euler dt=0.1", lambda: run_fixed("euler", 0.1, args.days, p, init)),
+        ("euler dt=0.01", lambda: run_fixed("euler", 0.01, args.days, p, init)),
+        ("rk4 dt=1", lambda: run_fixed("rk4", 1.0, args.days, p, init)),
+        ("rk4 dt=0.1", lambda: run_fixed("rk4", 0.1, args.days, p, init)),
+        ("dopri5 rtol=1e-3", lambda: solve_dopri5(args.days, p, init, 1e-3, 1e-6)[1:]),
+        ("dopri5 rtol=1e-6", lambda: solve_dopri5(args.days, p, init, 1e-6, 1e-9)[1:]),
+        ("dopri5 rtol=1e-9", lambda: solve_dopri5(args.days, p, init, 1e-9, 1e-12)[1:]),
+        ("rosenbrock23 rtol=1e-3", lambda: solve_rosenbrock23(args.days, p, init, 1e-3, 1e-6)[1:]),
+        ("rosenbrock23 rtol=1e-5", lambda: solve_rosenbrock23(args.days, p, init, 1e-5, 1e-8)[1:]),
+    ]
+
+    rows = []
+    for name, run in cases:
+        t0 = time.perf_counter()
+        Y, stats = run()
+        wall = time.perf_counter() - t0
+        rows.append({"method": name,
+                     "max_abs_err": float(np.abs(Y - Y_ref).max()),
+                     **stats,
+                     "wall_s": wall})
+
+    df = pd.DataFrame(rows)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(df.to_string(index=False, float_format=lambda v: f"{v:.3g}"))
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(out, index=False)
+        print("OK ->", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,30 @@ Partie 1 — SEIRS ODE
 Simulation sur 730 jours
 Méthodes : Euler explicite et Runge–Kutta 4
 Sorties : CSV + figures
+
+Les trajectoires sont calculées par lot (simulate_batch) : M jeux de
+paramètres avancent ensemble, la simulation simple étant le cas M=1.
+iter_states produit les états pas à pas (générateur, puits de
+src/part2_multi_agent/python/streaming.py), sans tableau préalloué.
 """
 
-import csv
 from dataclasses import dataclass
 from pathlib import Path
+import sys
 
 import numpy as np
 import matplotlib.pyplot as plt
 
+ROOT = Path(__file__).resolve().parents[3]
+# DayState et puits (CSV, binaire, statistiques) communs avec la partie 2 ;
+# ajouté en fin de sys.path à l'usage seulement (pas de masquage à l'import)
+PART2 = str(ROOT / "src/part2_multi_agent/python")
+
+
+def _part2_path():
+    if PART2 not in sys.path:
+        sys.path.append(PART2)
+
 
 # =========================
 # Paramètres du modèle
@@ -60,37 +75,161 @@ def step_rk4(y, dt, p):
     return y + (dt / 6.0) * (k1 + 2*k2 + 2*k3 + k4)
 
 
+# =========================
+# Version par lot (M trajectoires)
+# =========================
+# Les états sont rangés en (4, M) : chaque compartiment est contigu.
+# Les opérations suivent exactement l'ordre de seirs_rhs / step_euler /
+# step_rk4, donc chaque trajectoire du lot est identique (bit à bit) à
+# celle de la version scalaire.
+class BatchWorkspace:
+    """Tampons préalloués pour avancer M trajectoires sans allocation."""
+
+    def __init__(self, M):
+        self.k1 = np.empty((4, M))
+        self.k2 = np.empty((4, M))
+        self.k3 = np.empty((4, M))
+        self.k4 = np.empty((4, M))
+        self.tmp = np.empty((4, M))
+        self.w1 = np.empty(M)
+        self.w2 = np.empty(M)
+
+
+def seirs_rhs_batch(Y, beta, sigma, gamma, rho, out, ws):
+    S, E, I, R = Y
+    inf, w = ws.w1, ws.w2
+
+    np.multiply(beta, S, out=inf)
+    np.multiply(inf, I, out=inf)                          # beta * S * I
+
+    np.multiply(rho, R, out=out[0])
+    np.subtract(out[0], inf, out=out[0])                  # rho R - beta S I
+
+    np.multiply(sigma, E, out=out[1])
+    np.subtract(inf, out[1], out=out[1])                  # beta S I - sigma E
+
+    np.multiply(sigma, E, out=out[2])
+    np.multiply(gamma, I, out=w)
+    np.subtract(out[2], w, out=out[2])                    # sigma E - gamma I
+
+    np.multiply(gamma, I, out=out[3])
+    np.multiply(rho, R, out=w)
+    np.subtract(out[3], w, out=out[3])                    # gamma I - rho R
+    return out
+
+
+def step_euler_batch(Y, dt, pars, ws):
+    k = seirs_rhs_batch(Y, *pars, ws.k1, ws)
+    np.multiply(dt, k, out=k)
+    np.add(Y, k, out=Y)
+
+
+def step_rk4_batch(Y, dt, pars, ws):
+    k1, k2, k3, k4, tmp = ws.k1, ws.k2, ws.k3, ws.k4, ws.tmp
+    h = 0.5 * dt
+
+    seirs_rhs_batch(Y, *pars, k1, ws)
+
+    np.multiply(h, k1, out=tmp)
+    np.add(Y, tmp, out=tmp)
+    seirs_rhs_batch(tmp, *pars, k2, ws)
+
+    np.multiply(h, k2, out=tmp)
+    np.add(Y, tmp, out=tmp)
+    seirs_rhs_batch(tmp, *pars, k3, ws)
+
+    np.multiply(dt, k3, out=tmp)
+    np.add(Y, tmp, out=tmp)
+    seirs_rhs_batch(tmp, *pars, k4, ws)
+
+    # y + (dt/6) * (k1 + 2 k2 + 2 k3 + k4)
+    np.multiply(2, k2, out=k2)
+    np.add(k1, k2, out=k1)
+    np.multiply(2, k3, out=k3)
+    np.add(k1, k3, out=k1)
+    np.add(k1, k4, out=k1)
+    np.multiply(dt / 6.0, k1, out=k1)
+    np.add(Y, k1, out=Y)
+
+
 # =========================
 # Simulation
 # =========================
-def simulate(method, dt, days, p, init):
+def simulate_batch(method, dt, days, Y0, beta, sigma, gamma, rho, out=None):
+    """
+    Intègre M trajectoires à la fois.
+    Y0 : états initiaux (M, 4) ; beta, sigma, gamma, rho : scalaires ou
+    vecteurs (M,). Renvoie t (n_steps+1,) et Y (M, n_steps+1, 4)
+    (écrit dans `out` s'il est fourni, p. ex. un tableau mémoire-mappé).
+    """
     n_steps = int(days / dt)
     t = np.linspace(0, days, n_steps + 1)
 
-    Y = np.zeros((n_steps + 1, 4))
-    Y[0] = np.array([init.S0, init.E0, init.I0, init.R0])
+    Y0 = np.atleast_2d(np.asarray(Y0, dtype=np.float64))
+    M = Y0.shape[0]
+    pars = tuple(np.broadcast_to(np.asarray(v, dtype=np.float64), (M,))
+                 for v in (beta, sigma, gamma, rho))
+
+    if out is None:
+        out = np.empty((M, n_steps + 1, 4))
+    ws = BatchWorkspace(M)
+    step = step_euler_batch if method == "euler" else step_rk4_batch
 
+    y = np.ascontiguousarray(Y0.T)   # (4, M)
+    out[:, 0, :] = y.T
     for n in range(n_steps):
-        if method == "euler":
-            Y[n+1] = step_euler(Y[n], dt, p)
-        else:
-            Y[n+1] = step_rk4(Y[n], dt, p)
+        step(y, dt, pars, ws)
+        np.clip(y, 0.0, 1.0, out=y)
+        out[:, n + 1, :] = y.T
 
-        Y[n+1] = np.clip(Y[n+1], 0.0, 1.0)
+    return t, out
 
-    return t, Y
 
+def sweep(method, dt, days, params, init=None, out=None):
+    """
+    Balayage de paramètres : `params` est un tableau (M, 4) de
+    (beta, sigma, gamma, rho) ou une liste de Params. Toutes les
+    trajectoires partent de `init` (Initial par défaut).
+    Renvoie t et Y de forme (M, n_steps+1, 4).
+    """
+    if init is None:
+        init = Initial()
+    if len(params) and isinstance(params[0], Params):
+        params = [(q.beta, q.sigma, q.gamma, q.rho) for q in params]
+    params = np.asarray(params, dtype=np.float64).reshape(-1, 4)
 
-# =========================
-# Sauvegarde CSV
-# =========================
-def write_csv(path, t, Y):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["t", "S", "E", "I", "R"])
-        for ti, (S, E, I, R) in zip(t, Y):
-            w.writerow([ti, S, E, I, R])
+    Y0 = np.tile([init.S0, init.E0, init.I0, init.R0], (params.shape[0], 1))
+    return simulate_batch(method, dt, days, Y0, *params.T, out=out)
+
+
+def simulate(method, dt, days, p, init):
+    t, Y = simulate_batch(method, dt, days,
+                          [init.S0, init.E0, init.I0, init.R0],
+                          p.beta, p.sigma, p.gamma, p.rho)
+    return t, Y[0]
+
+
+def iter_states(method, dt, days, p, init):
+    """
+    Générateur : un DayState par pas de temps (t, y = S,E,I,R), mêmes
+    valeurs que simulate (bit à bit) ; interrompre l'itération arrête
+    l'intégration.
+    """
+    _part2_path()
+    from streaming import DayState
+
+    n_steps = int(days / dt)
+    t = np.linspace(0, days, n_steps + 1)
+    pars = tuple(np.full(1, v, dtype=np.float64) for v in (p.beta, p.sigma, p.gamma, p.rho))
+    ws = BatchWorkspace(1)
+    step = step_euler_batch if method == "euler" else step_rk4_batch
+
+    y = np.array([[init.S0], [init.E0], [init.I0], [init.R0]], dtype=np.float64)   # (4, 1)
+    yield DayState(t[0], y[:, 0].copy())
+    for n in range(n_steps):
+        step(y, dt, pars, ws)
+        np.clip(y, 0.0, 1.0, out=y)
+        yield DayState(t[n + 1], y[:, 0].copy())
 
 
 # =========================
@@ -117,6 +256,9 @@ def plot_curves(path, t, Y, title):
 # Programme principal
 # =========================
 def main():
+    _part2_path()
+    from streaming import CsvSink, MemorySink, consume
+
     dt = 1.0
     days = 730
 
@@ -127,12 +269,16 @@ def main():
     out_fig = Path("figures/part1")
 
     for method in ["euler", "rk4"]:
-        t, Y = simulate(method, dt, days, p, init)
-
         csv_path = out_data / f"python_{method}.csv"
         fig_path = out_fig / f"python_{method}.png"
 
-        write_csv(csv_path, t, Y)
+        # CSV écrit au fil de l'intégration ; états conservés pour la figure
+        csv_sink, states = CsvSink(csv_path, lineterminator="\r\n"), MemorySink()
+        try:
+            consume(iter_states(method, dt, days, p, init), csv_sink, states)
+        finally:
+            csv_sink.close()
+        t, Y = states.arrays()
         plot_curves(fig_path, t, Y, f"SEIRS — Python — {method.upper()}")
 
         print(f"{method} terminé → {csv_path}")
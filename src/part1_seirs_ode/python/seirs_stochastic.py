@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Partie 1 — SEIRS stochastique à compartiments (Gillespie / tau-leaping)
+
+Intermédiaire entre l'ODE et le modèle multi-agent : mêmes taux que
+seirs_part1.Params, mais des effectifs entiers S, E, I, R dans une
+population de N individus, avec quatre réactions :
+    S -> E  au taux beta * S * I / N
+    E -> I  au taux sigma * E
+    I -> R  au taux gamma * I
+    R -> S  au taux rho * R
+Avec les durées moyennes du multi-agent (3, 7 et 365 jours), ce sont les
+taux par défaut de Params ; seule la structure spatiale diffère.
+
+Deux méthodes :
+- "ssa" : algorithme direct de Gillespie, exact ; coût proportionnel au
+  nombre d'événements, donc à N ;
+- "tau" : tau-leaping adaptatif (Cao, Gillespie & Petzold, 2006) ; le pas
+  tau est choisi pour que chaque effectif varie d'au plus une fraction eps,
+  le nombre de pas ne dépend pas de N. Un saut qui rendrait un effectif
+  négatif est refait avec tau / 2 ; quand tau descend sous quelques 1 / a0
+  (petits effectifs, extinction), SSA_STEPS pas exacts sont faits à la place.
+  Le biais du tau-leaping décroît avec eps (N = 20 000 : pic moyen de I
+  surestimé d'environ 0,6 % avec eps = 0,03, 0,2 % avec eps = 0,01).
+
+Sortie : effectifs aux jours entiers 0..T (même format t,S,E,I,R que le
+multi-agent). simulate_ensemble répartit R réplications en lots de
+ENSEMBLE_CHUNK (un flux SeedSequence.spawn par lot, résultat indépendant du
+nombre de workers) ; le noyau relâche le GIL (Numba optionnel), et les
+lots sont traités par un pool de threads.
+
+    python src/part1_seirs_ode/python/seirs_stochastic.py --method tau --reps 100000 \\
+        --out data/part1_seirs_ode/python_tau.npy
+
+Un fichier .npy est écrit au format de part2_multi_agent/python/trajectories.py,
+chargeable tel quel avec les réplications multi-agent.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from seirs_part1 import Initial, Params
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # repli : Python pur
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+ROOT = Path(__file__).resolve().parents[3]
+
+METHODS = ("ssa", "tau")
+EPS = 0.03              # variation relative maximale d'un effectif par saut
+SSA_THRESHOLD = 10.0    # tau * a0 sous ce seuil : pas exacts
+SSA_STEPS = 100         # nombre de pas exacts faits dans ce cas
+ENSEMBLE_CHUNK = 1024   # réplications par flux aléatoire
+
+# Compteurs de coût (stats)
+N_EVENTS, N_LEAPS, N_REJECTED = 0, 1, 2
+
+
+def initial_counts(N: int, init: Initial) -> np.ndarray:
+    """Effectifs entiers (S, E, I, R) de somme N à partir des fractions de Initial."""
+    E, I, R = (int(round(f * N)) for f in (init.E0, init.I0, init.R0))
+    return np.array([N - E - I - R, E, I, R], dtype=np.int64)
+
+
+# =========================
+# Noyaux
+# =========================
+@njit(cache=True)
+def _leap_bound(x, g, mu, s2, eps):
+    """Borne de Cao et al. pour une espèce : |moyenne| et variance de sa variation."""
+    bound = max(eps * x / g, 1.0)
+    tau = np.inf
+    if mu != 0.0:
+        tau = bound / abs(mu)
+    if s2 > 0.0:
+        tau = min(tau, bound * bound / s2)
+    return tau
+
+
+@njit(cache=True, nogil=True)
+def _run(rng, exact, x0, beta, sigma, gamma, rho, N, T, eps, out, stats):
+    """Une trajectoire ; out (T+1, 4) reçoit les effectifs aux jours entiers."""
+    S, E, I, R = x0[0], x0[1], x0[2], x0[3]
+    out[0, 0], out[0, 1], out[0, 2], out[0, 3] = S, E, I, R
+    t = 0.0
+    day = 1
+    ssa_left = 0
+    while day <= T:
+        a_inf = beta * S * I / N
+        a_inc = sigma * E
+        a_rec = gamma * I
+        a_loss = rho * R
+        a0 = a_inf + a_inc + a_rec + a_loss
+        if a0 <= 0.0:  # état absorbant : plus aucune transition
+            for d in range(day, T + 1):
+                out[d, 0], out[d, 1], out[d, 2], out[d, 3] = S, E, I, R
+            break
+
+        if not exact and ssa_left == 0:
+            # g = 2 pour S et I (réaction d'ordre 2 S + I), 1 pour E et R
+            tau = min(_leap_bound(S, 2.0, a_loss - a_inf, a_inf + a_loss, eps),
+                      _leap_bound(E, 1.0, a_inf - a_inc, a_inf + a_inc, eps),
+                      _leap_bound(I, 2.0, a_inc - a_rec, a_inc + a_rec, eps),
+                      _leap_bound(R, 1.0, a_rec - a_loss, a_rec + a_loss, eps))
+            if tau * a0 < SSA_THRESHOLD:
+                ssa_left = SSA_STEPS
+            else:
+                boundary = False
+                if t + tau >= day:
+                    tau = day - t
+                    boundary = True
+                while True:
+                    k_inf = rng.poisson(a_inf * tau)
+                    k_inc = rng.poisson(a_inc * tau)
+                    k_rec = rng.poisson(a_rec * tau)
+                    k_loss = rng.poisson(a_loss * tau)
+                    nS = S - k_inf + k_loss
+                    nE = E + k_inf - k_inc
+                    nI = I + k_inc - k_rec
+                    nR = R + k_rec - k_loss
+                    if nS >= 0 and nE >= 0 and nI >= 0 and nR >= 0:
+                        break
+                    tau *= 0.5
+                    boundary = False
+                    stats[N_REJECTED] += 1
+                S, E, I, R = nS, nE, nI, nR
+                stats[N_LEAPS] += 1
+                if boundary:
+                    t = float(day)
+                    out[day, 0], out[day, 1], out[day, 2], out[day, 3] = S, E, I, R
+                    day += 1
+                else:
+                    t += tau
+                continue
+
+        # Pas exact (méthode directe)
+        t_next = t + rng.exponential(1.0 / a0)
+        while day <= T and day < t_next:
+            out[day, 0], out[day, 1], out[day, 2], out[day, 3] = S, E, I, R
+            day += 1
+        if day > T:
+            break
+        u = rng.random() * a0
+        if u < a_inf:
+            S -= 1
+            E += 1
+        elif u < a_inf + a_inc:
+            E -= 1
+            I += 1
+        elif u < a_inf + a_inc + a_rec:
+            I -= 1
+            R += 1
+        else:
+            R -= 1
+            S += 1
+        t = t_next
+        stats[N_EVENTS] += 1
+        if ssa_left > 0:
+            ssa_left -= 1
+
+
+@njit(cache=True, nogil=True)
+def _run_batch(rng, exact, x0, beta, sigma, gamma, rho, N, T, eps, out, stats):
+    for r in range(out.shape[0]):
+        _run(rng, exact, x0, beta, sigma, gamma, rho, N, T, eps, out[r], stats)
+
+
+def _check(method, eps):
+    if method not in METHODS:
+        raise ValueError(f"Méthode inconnue : {method} (choix : {', '.join(METHODS)})")
+    if not 0.0 < eps < 1.0:
+        raise ValueError(f"eps doit être dans ]0, 1[ : {eps}")
+
+
+# =========================
+# Interface
+# =========================
+def simulate(method, N, days, p: Params, init: Initial, seed=None, eps=EPS, stats=None):
+    """
+    Une trajectoire : renvoie (t, Y), t = 0..days et Y (days+1, 4) entiers.
+    `stats` (tableau int64 de 3 cases, optionnel) cumule événements exacts,
+    sauts et sauts rejetés.
+    """
+    _check(method, eps)
+    rng = np.random.default_rng(seed)
+    Y = np.empty((days + 1, 4), dtype=np.int64)
+    if stats is None:
+        stats = np.zeros(3, dtype=np.int64)
+    _run(rng, method == "ssa", initial_counts(N, init), p.beta, p.sigma, p.gamma, p.rho,
+         float(N), days, eps, Y, stats)
+    return np.arange(days + 1), Y
+
+
+def simulate_ensemble(method, reps, N, days, p: Params, init: Initial, seed=None, eps=EPS,
+                      workers=1, out=None, stats=None):
+    """
+    R réplications indépendantes : tableau int32 (R, days+1, 4), rempli en
+    place si `out` est fourni (p. ex. trajectories.create). Le lot k utilise
+    le k-ième flux de SeedSequence(seed).spawn.
+    """
+    _check(method, eps)
+    if out is None:
+        out = np.empty((reps, days + 1, 4), dtype=np.int32)
+    if out.shape != (reps, days + 1, 4):
+        raise ValueError(f"Forme inattendue: {out.shape} (attendu {(reps, days + 1, 4)})")
+    if stats is None:
+        stats = np.zeros(3, dtype=np.int64)
+    x0 = initial_counts(N, init)
+    n_chunks = (reps + ENSEMBLE_CHUNK - 1) // ENSEMBLE_CHUNK
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    data = np.asarray(out)
+    chunk_stats = np.zeros((n_chunks, 3), dtype=np.int64)
+
+    def run_chunk(k):
+        lo = k * ENSEMBLE_CHUNK
+        _run_batch(np.random.default_rng(children[k]), method == "ssa", x0,
+                   p.beta, p.sigma, p.gamma, p.rho, float(N), days, eps,
+                   data[lo:lo + ENSEMBLE_CHUNK], chunk_stats[k])
+
+    if workers <= 1 or n_chunks == 1:
+        for k in range(n_chunks):
+            run_chunk(k)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run_chunk, range(n_chunks)))
+    stats += chunk_stats.sum(axis=0)
+    return out
+
+
+def write_csv(path, Y):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t", "S", "E", "I", "R"])
+        for t, (S, E, I, R) in enumerate(Y):
+            w.writerow([t, int(S), int(E), int(I), int(R)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SEIRS stochastique : Gillespie / tau-leaping (Partie 1)")
+    parser.add_argument("--method", choices=METHODS, default="tau",
+                        help="ssa : Gillespie exact ; tau : tau-leaping adaptatif")
+    parser.add_argument("--N", type=int, default=20000, help="Taille de la population")
+    parser.add_argument("--T", type=int, default=730, help="Horizon (jours)")
+    parser.add_argument("--reps", type=int, default=1, help="Nombre de réplications")
+    parser.add_argument("--seed", type=int, default=12345, help="Graine")
+    parser.add_argument("--eps", type=float, default=EPS,
+                        help="Variation relative maximale d'un effectif par saut (tau)")
+    parser.add_argument("--rho", type=float, default=1.0 / 365.0, help="Taux de perte d'immunité")
+    parser.add_argument("--beta", type=float, default=0.5, help="Taux de transmission")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Threads pour les réplications")
+    parser.add_argument("--out", type=str, default=None,
+                        help="CSV t,S,E,I,R (une réplication) ou .npy au format de trajectories.py "
+                             "(défaut : data/part1_seirs_ode/python_<méthode>.csv ou .npy)")
+    args = parser.parse_args()
+
+    p = Params(rho=args.rho, beta=args.beta)
+    init = Initial()
+    suffix = ".csv" if args.reps == 1 else ".npy"
+    out = Path(args.out or f"data/part1_seirs_ode/python_{args.method}{suffix}")
+    if args.reps > 1 and out.suffix != ".npy":
+        parser.error("--reps > 1 : la sortie doit être un fichier .npy")
+
+    stats = np.zeros(3, dtype=np.int64)
+    t0 = time.perf_counter()
+    if out.suffix == ".npy":
+        sys.path.insert(0, str(ROOT / "src/part2_multi_agent/python"))
+        import trajectories
+
+        meta = [trajectories.rep_meta(f"python-{args.method}", p, seed=args.seed, N=args.N,
+                                      eps=args.eps, rep=k) for k in range(args.reps)]
+        data = trajectories.create(out, args.reps, args.T, meta)
+        simulate_ensemble(args.method, args.reps, args.N, args.T, p, init, args.seed, args.eps,
+                          args.workers, out=data, stats=stats)
+        data.flush()
+        peak = data[:, :, 2].max(axis=1)
+        print(f"{args.reps} réplications, pic de I : moyenne {peak.mean():.1f}, "
+              f"min {peak.min()}, max {peak.max()}")
+    else:
+        _, Y = simulate(args.method, args.N, args.T, p, init, args.seed, args.eps, stats)
+        write_csv(out, Y)
+        print(f"Pic de I : {Y[:, 2].max()} (jour {Y[:, 2].argmax()}) ; "
+              f"S,E,I,R(T) = {tuple(int(v) for v in Y[-1])}")
+    wall = time.perf_counter() - t0
+
+    print(f"Coût : {stats[N_EVENTS]} événements exacts, {stats[N_LEAPS]} sauts "
+          f"({stats[N_REJECTED]} rejetés), {wall:.2f} s")
+    print("OK ->", out)
+
+
+if __name__ == "__main__":
+    main()
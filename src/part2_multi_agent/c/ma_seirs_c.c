@@ -1,8 +1,11 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <stdint.h>
+#include <string.h>
 #include <math.h>
 
+#include "../common/philox.h"
+
 #define SUS 0
 #define EXP 1
 #define INF 2
@@ -52,9 +55,157 @@ static inline int neighborhood_I(const int16_t *Icount, int x, int y, int L) {
     return total;
 }
 
+/* Grille NIgrid des sommes 3x3 : NIgrid[idx(x,y)] = neighborhood_I(x, y),
+   tenue à jour en O(9) à chaque changement de Icount */
+static void box_sum(const int16_t *Icount, int32_t *NIgrid, int L) {
+    for (int x = 0; x < L; x++)
+        for (int y = 0; y < L; y++)
+            NIgrid[idx(x, y, L)] = neighborhood_I(Icount, x, y, L);
+}
+
+static inline void add_infectious(int16_t *Icount, int32_t *NIgrid, int x, int y, int L, int d) {
+    Icount[idx(x, y, L)] += d;
+    int xs[3] = {x > 0 ? x - 1 : L - 1, x, x < L - 1 ? x + 1 : 0};
+    int ys[3] = {y > 0 ? y - 1 : L - 1, y, y < L - 1 ? y + 1 : 0};
+    for (int a = 0; a < 3; a++)
+        for (int b = 0; b < 3; b++)
+            NIgrid[idx(xs[a], ys[b], L)] += d;
+}
+
+/* Table prob[NI] = 1 - exp(-inf_force * NI) pour NI = 0..K, K <= n_max premier
+   rang où la probabilité vaut 1.0 : la probabilité pour NI est prob[min(NI, K)].
+   Renvoie K, ou -1 si l'allocation échoue. */
+static int infection_prob_table(double inf_force, int n_max, double **prob) {
+    int K = 0;
+    while (K < n_max && 1.0 - exp(-inf_force * (double)K) < 1.0) K++;
+    *prob = (double*)malloc((size_t)(K + 1) * sizeof(double));
+    if (!*prob) return -1;
+    for (int k = 0; k <= K; k++) (*prob)[k] = 1.0 - exp(-inf_force * (double)k);
+    return K;
+}
+
+/* =========================
+   Tirages indexés (--rng philox, voir common/philox.h) : mêmes trajectoires
+   que les moteurs Python et C++ lancés avec --rng philox
+   ========================= */
+
+typedef struct {
+    uint64_t key;
+    int idx;
+} sort_entry;
+
+static int cmp_entry(const void *a, const void *b) {
+    const sort_entry *u = (const sort_entry*)a, *v = (const sort_entry*)b;
+    if (u->key != v->key) return u->key < v->key ? -1 : 1;
+    return (u->idx > v->idx) - (u->idx < v->idx);
+}
+
+/* Population initiale : états par rang de clé, positions et durées par agent */
+static void init_philox(const Params *p, sort_entry *keys, int8_t *state,
+                        double *dE, double *dI, double *dR, int16_t *x, int16_t *y) {
+    uint32_t w[4];
+    for (int i = 0; i < p->N; i++) {
+        philox_agent_block(p->seed, (uint32_t)i, 0, 0, w);
+        keys[i].key = philox_sort_key(w);
+        keys[i].idx = i;
+        x[i] = (int16_t)philox_below(w[2], (uint32_t)p->L);
+        y[i] = (int16_t)philox_below(w[3], (uint32_t)p->L);
+        philox_agent_block(p->seed, (uint32_t)i, 0, 1, w);
+        dE[i] = -p->mean_dE * log(1.0 - philox_u53(w[0], w[1]));
+        dI[i] = -p->mean_dI * log(1.0 - philox_u53(w[2], w[3]));
+        philox_agent_block(p->seed, (uint32_t)i, 0, 2, w);
+        dR[i] = -p->mean_dR * log(1.0 - philox_u53(w[0], w[1]));
+    }
+    qsort(keys, (size_t)p->N, sizeof(sort_entry), cmp_entry);
+    int k = 0;
+    for (int i = 0; i < p->init_S; i++) state[keys[k++].idx] = SUS;
+    for (int i = 0; i < p->init_E; i++) state[keys[k++].idx] = EXP;
+    for (int i = 0; i < p->init_I; i++) state[keys[k++].idx] = INF;
+    for (int i = 0; i < p->init_R; i++) state[keys[k++].idx] = REM;
+}
+
+/* Jour t : ordre de passage (clés du bloc 0) et premières positions (nx, ny) */
+static void philox_day(const Params *p, int t, sort_entry *keys, int16_t *first, int *order) {
+    uint32_t w[4];
+    for (int i = 0; i < p->N; i++) {
+        philox_agent_block(p->seed, (uint32_t)i, (uint32_t)t, 0, w);
+        keys[i].key = philox_sort_key(w);
+        keys[i].idx = i;
+        first[2 * i] = (int16_t)philox_below(w[2], (uint32_t)p->L);
+        first[2 * i + 1] = (int16_t)philox_below(w[3], (uint32_t)p->L);
+    }
+    qsort(keys, (size_t)p->N, sizeof(sort_entry), cmp_entry);
+    for (int i = 0; i < p->N; i++) order[i] = keys[i].idx;
+}
+
+/* =========================
+   Sortie : CSV t,S,E,I,R, ou format binaire (voir trajectories.py) si le
+   chemin finit par .npy : tableau int32 (1, T+1, 4) little-endian
+   + en-tête de métadonnées <nom>.json
+   ========================= */
+
+static int ends_with(const char *s, const char *suffix) {
+    size_t n = strlen(s), m = strlen(suffix);
+    return n >= m && strcmp(s + n - m, suffix) == 0;
+}
+
+static void write_npy_header(FILE *f, int rows) {
+    char dict[128];
+    int len = snprintf(dict, sizeof(dict),
+                       "{'descr': '<i4', 'fortran_order': False, 'shape': (1, %d, 4), }", rows);
+    int total = 10 + len + 1; /* magic + version + longueur + '\n' */
+    int pad = (64 - total % 64) % 64;
+    uint16_t hlen = (uint16_t)(len + pad + 1);
+    const unsigned char head[10] = {0x93, 'N', 'U', 'M', 'P', 'Y', 1, 0,
+                                    (unsigned char)(hlen & 0xff), (unsigned char)(hlen >> 8)};
+    fwrite(head, 1, 10, f);
+    fwrite(dict, 1, (size_t)len, f);
+    for (int i = 0; i < pad; i++) fputc(' ', f);
+    fputc('\n', f);
+}
+
+static int write_meta(const char *npy_path, const Params *p, int philox) {
+    size_t n = strlen(npy_path);
+    char *path = (char*)malloc(n + 2);
+    if (!path) return 0;
+    memcpy(path, npy_path, n - 4);
+    strcpy(path + n - 4, ".json");
+
+    FILE *m = fopen(path, "w");
+    free(path);
+    if (!m) return 0;
+    fprintf(m, "{\"format\": \"seirs-traj\", \"version\": 1, "
+               "\"columns\": [\"S\", \"E\", \"I\", \"R\"], \"reps\": [{"
+               "\"engine\": \"c\", \"seed\": %u, \"params\": {"
+               "\"L\": %d, \"N\": %d, \"T\": %d, \"init_S\": %d, \"init_I\": %d, "
+               "\"init_E\": %d, \"init_R\": %d, \"mean_dE\": %.17g, \"mean_dI\": %.17g, "
+               "\"mean_dR\": %.17g, \"inf_force\": %.17g}%s}]}\n",
+            p->seed, p->L, p->N, p->T, p->init_S, p->init_I, p->init_E, p->init_R,
+            p->mean_dE, p->mean_dI, p->mean_dR, p->inf_force,
+            philox ? ", \"rng\": \"philox\"" : "");
+    fclose(m);
+    return 1;
+}
+
+/* Comptage complet (initialisation et vérification des compteurs) */
+static void count_states(const int8_t *state, int N, int c[4]) {
+    c[SUS] = c[EXP] = c[INF] = c[REM] = 0;
+    for (int i = 0; i < N; i++) c[state[i]]++;
+}
+
+static void write_counts(FILE *f, int npy, int t, int S, int E, int I, int R) {
+    if (npy) {
+        int32_t row[4] = {S, E, I, R};
+        fwrite(row, sizeof(int32_t), 4, f);
+    } else {
+        fprintf(f, "%d,%d,%d,%d,%d\n", t, S, E, I, R);
+    }
+}
+
 int main(int argc, char **argv) {
     if (argc < 3) {
-        fprintf(stderr, "Usage: %s <seed> <output.csv>\n", argv[0]);
+        fprintf(stderr, "Usage: %s <seed> <output.csv|output.npy> [--T N] [--N N] [--L N]"
+                        " [--incidence incidence.csv] [--check] [--rng native|philox]\n", argv[0]);
         return 1;
     }
 
@@ -66,6 +217,36 @@ int main(int argc, char **argv) {
         .inf_force = 0.5
     };
 
+    const char *incidence_path = NULL; /* CSV t,new_infections,new_recoveries,reinfections */
+    int check = 0;                     /* debug : compteurs vérifiés par un comptage complet */
+    int philox = 0;                    /* --rng philox : tirages indexés (sinon rand()) */
+
+    /* Options après les deux arguments positionnels */
+    for (int i = 3; i < argc; i++) {
+        if (strcmp(argv[i], "--T") == 0 && i + 1 < argc) {
+            p.T = atoi(argv[++i]);
+        } else if (strcmp(argv[i], "--N") == 0 && i + 1 < argc) {
+            p.N = atoi(argv[++i]);
+        } else if (strcmp(argv[i], "--L") == 0 && i + 1 < argc) {
+            p.L = atoi(argv[++i]);
+        } else if (strcmp(argv[i], "--incidence") == 0 && i + 1 < argc) {
+            incidence_path = argv[++i];
+        } else if (strcmp(argv[i], "--check") == 0) {
+            check = 1;
+        } else if (strcmp(argv[i], "--rng") == 0 && i + 1 < argc) {
+            const char *kind = argv[++i];
+            if (strcmp(kind, "philox") == 0) philox = 1;
+            else if (strcmp(kind, "native") != 0) {
+                fprintf(stderr, "Erreur: --rng attend native ou philox\n");
+                return 1;
+            }
+        } else {
+            fprintf(stderr, "Option inconnue: %s\n", argv[i]);
+            return 1;
+        }
+    }
+    p.init_S = p.N - p.init_E - p.init_I - p.init_R;
+
     srand(p.seed);
 
     int8_t  *state  = (int8_t*) malloc((size_t)p.N * sizeof(int8_t));
@@ -77,74 +258,122 @@ int main(int argc, char **argv) {
     int16_t *y      = (int16_t*) malloc((size_t)p.N * sizeof(int16_t));
     int16_t *Icount = (int16_t*)calloc((size_t)p.L * (size_t)p.L, sizeof(int16_t));
     int     *order  = (int*)     malloc((size_t)p.N * sizeof(int));
-
-    if (!state || !tstate || !dE || !dI || !dR || !x || !y || !Icount || !order) {
+    uint8_t *recovered = (uint8_t*)calloc((size_t)p.N, sizeof(uint8_t)); /* déjà passé par R->S */
+    int32_t *NIgrid = (int32_t*)malloc((size_t)p.L * (size_t)p.L * sizeof(int32_t));
+    double  *prob = NULL;
+    int      K = infection_prob_table(p.inf_force, p.N, &prob);
+    /* --rng philox : clés de tri et premières positions du jour */
+    sort_entry *keys = philox ? (sort_entry*)malloc((size_t)p.N * sizeof(sort_entry)) : NULL;
+    int16_t *first = philox ? (int16_t*)malloc(2 * (size_t)p.N * sizeof(int16_t)) : NULL;
+
+    if (!state || !tstate || !dE || !dI || !dR || !x || !y || !Icount || !order || !recovered
+        || !NIgrid || K < 0 || (philox && (!keys || !first))) {
         fprintf(stderr, "Erreur: allocation mémoire échouée.\n");
         free(state); free(tstate); free(dE); free(dI); free(dR);
-        free(x); free(y); free(Icount); free(order);
+        free(x); free(y); free(Icount); free(order); free(recovered); free(NIgrid); free(prob);
+        free(keys); free(first);
         return 1;
     }
 
-    /* Initialisation des états (exact) */
-    int k = 0;
-    for (int i = 0; i < p.init_S; i++) state[k++] = SUS;
-    for (int i = 0; i < p.init_E; i++) state[k++] = EXP;
-    for (int i = 0; i < p.init_I; i++) state[k++] = INF;
-    for (int i = 0; i < p.init_R; i++) state[k++] = REM;
-
-    /* Mélange des états */
-    for (int i = p.N - 1; i > 0; i--) {
-        int j = rand() % (i + 1);
-        int8_t tmp = state[i];
-        state[i] = state[j];
-        state[j] = tmp;
-    }
+    if (philox) {
+        init_philox(&p, keys, state, dE, dI, dR, x, y);
+        for (int i = 0; i < p.N; i++) {
+            if (state[i] == INF) Icount[idx((int)x[i], (int)y[i], p.L)]++;
+            order[i] = i;
+        }
+    } else {
+        /* Initialisation des états (exact) */
+        int k = 0;
+        for (int i = 0; i < p.init_S; i++) state[k++] = SUS;
+        for (int i = 0; i < p.init_E; i++) state[k++] = EXP;
+        for (int i = 0; i < p.init_I; i++) state[k++] = INF;
+        for (int i = 0; i < p.init_R; i++) state[k++] = REM;
+
+        /* Mélange des états */
+        for (int i = p.N - 1; i > 0; i--) {
+            int j = rand() % (i + 1);
+            int8_t tmp = state[i];
+            state[i] = state[j];
+            state[j] = tmp;
+        }
 
-    /* Durées individuelles fixes + positions initiales + Icount */
-    for (int i = 0; i < p.N; i++) {
-        dE[i] = neg_exp(p.mean_dE);
-        dI[i] = neg_exp(p.mean_dI);
-        dR[i] = neg_exp(p.mean_dR);
+        /* Durées individuelles fixes + positions initiales + Icount */
+        for (int i = 0; i < p.N; i++) {
+            dE[i] = neg_exp(p.mean_dE);
+            dI[i] = neg_exp(p.mean_dI);
+            dR[i] = neg_exp(p.mean_dR);
 
-        x[i] = (int16_t)(rand() % p.L);
-        y[i] = (int16_t)(rand() % p.L);
+            x[i] = (int16_t)(rand() % p.L);
+            y[i] = (int16_t)(rand() % p.L);
 
-        if (state[i] == INF) {
-            Icount[idx((int)x[i], (int)y[i], p.L)]++;
-        }
+            if (state[i] == INF) {
+                Icount[idx((int)x[i], (int)y[i], p.L)]++;
+            }
 
-        order[i] = i;
+            order[i] = i;
+        }
     }
-
-    FILE *f = fopen(argv[2], "w");
-    if (!f) {
-        fprintf(stderr, "Erreur: impossible d'ouvrir %s\n", argv[2]);
+    box_sum(Icount, NIgrid, p.L);
+
+    int npy = ends_with(argv[2], ".npy");
+    FILE *f = fopen(argv[2], npy ? "wb" : "w");
+    FILE *finc = incidence_path ? fopen(incidence_path, "w") : NULL;
+    if (!f || (npy && !write_meta(argv[2], &p, philox)) || (incidence_path && !finc)) {
+        fprintf(stderr, "Erreur: impossible d'ouvrir %s\n", (f && incidence_path) ? incidence_path : argv[2]);
+        if (f) fclose(f);
         free(state); free(tstate); free(dE); free(dI); free(dR);
-        free(x); free(y); free(Icount); free(order);
+        free(x); free(y); free(Icount); free(order); free(recovered); free(NIgrid); free(prob);
+        free(keys); free(first);
         return 1;
     }
 
-    fprintf(f, "t,S,E,I,R\n");
+    if (npy) write_npy_header(f, p.T + 1);
+    else fprintf(f, "t,S,E,I,R\n");
+    if (finc) fprintf(finc, "t,new_infections,new_recoveries,reinfections\n");
+
+    /* Effectifs tenus à jour à chaque transition (un seul comptage complet) */
+    int c[4];
+    count_states(state, p.N, c);
+    int new_inf = 0, new_rec = 0, reinf = 0; /* incidence du jour */
+    int status = 0;
 
     for (int t = 0; t <= p.T; t++) {
-        /* Comptage S/E/I/R (sortie) */
-        int S=0,E=0,I=0,R=0;
-        for (int i = 0; i < p.N; i++) {
-            if (state[i] == SUS) S++;
-            else if (state[i] == EXP) E++;
-            else if (state[i] == INF) I++;
-            else R++;
+        if (check && t > 0) {
+            int full[4];
+            count_states(state, p.N, full);
+            int grid_ok = 1;
+            for (int cell = 0; cell < p.L * p.L && grid_ok; cell++) {
+                grid_ok = NIgrid[cell] == neighborhood_I(Icount, cell / p.L, cell % p.L, p.L);
+            }
+            if (!grid_ok) {
+                fprintf(stderr, "Erreur: grille N_I incohérente au jour %d (recalcul complet)\n", t);
+                status = 1;
+                break;
+            }
+            if (memcmp(full, c, sizeof(c)) != 0) {
+                fprintf(stderr, "Erreur: compteurs incohérents au jour %d: "
+                                "(%d,%d,%d,%d) != (%d,%d,%d,%d) (comptage complet)\n",
+                        t, c[SUS], c[EXP], c[INF], c[REM], full[SUS], full[EXP], full[INF], full[REM]);
+                status = 1;
+                break;
+            }
         }
-        fprintf(f, "%d,%d,%d,%d,%d\n", t, S, E, I, R);
+        write_counts(f, npy, t, c[SUS], c[EXP], c[INF], c[REM]);
+        if (finc) fprintf(finc, "%d,%d,%d,%d\n", t, new_inf, new_rec, reinf);
 
         if (t == p.T) break;
+        new_inf = new_rec = reinf = 0;
 
         /* Ordre aléatoire (asynchrone) */
-        for (int i = p.N - 1; i > 0; i--) {
-            int j = rand() % (i + 1);
-            int tmp = order[i];
-            order[i] = order[j];
-            order[j] = tmp;
+        if (philox) {
+            philox_day(&p, t + 1, keys, first, order);
+        } else {
+            for (int i = p.N - 1; i > 0; i--) {
+                int j = rand() % (i + 1);
+                int tmp = order[i];
+                order[i] = order[j];
+                order[j] = tmp;
+            }
         }
 
         /* Mise à jour agents */
@@ -152,19 +381,28 @@ int main(int argc, char **argv) {
             int i = order[ii];
 
             int ox = (int)x[i], oy = (int)y[i];
-            int nx = rand() % p.L;
-            int ny = rand() % p.L;
+            uint32_t b1[4];   /* --rng philox : bloc 1 (second essai, U), calculé à la demande */
+            int have_b1 = 0;
+            int nx = philox ? first[2 * i] : rand() % p.L;
+            int ny = philox ? first[2 * i + 1] : rand() % p.L;
 
             /* "autre cellule" : éviter une fois le cas identique */
             if (nx == ox && ny == oy) {
-                nx = rand() % p.L;
-                ny = rand() % p.L;
+                if (philox) {
+                    philox_agent_block(p.seed, (uint32_t)i, (uint32_t)(t + 1), 1, b1);
+                    have_b1 = 1;
+                    nx = (int)philox_below(b1[0], (uint32_t)p.L);
+                    ny = (int)philox_below(b1[1], (uint32_t)p.L);
+                } else {
+                    nx = rand() % p.L;
+                    ny = rand() % p.L;
+                }
             }
 
             /* Mise à jour Icount si infectieux et déplacement */
             if (state[i] == INF && (nx != ox || ny != oy)) {
-                Icount[idx(ox, oy, p.L)]--;
-                Icount[idx(nx, ny, p.L)]++;
+                add_infectious(Icount, NIgrid, ox, oy, p.L, -1);
+                add_infectious(Icount, NIgrid, nx, ny, p.L, +1);
             }
 
             x[i] = (int16_t)nx;
@@ -173,38 +411,54 @@ int main(int argc, char **argv) {
             tstate[i]++;
 
             if (state[i] == SUS) {
-                int NI = neighborhood_I(Icount, nx, ny, p.L); /* Moore + centre */
+                int NI = NIgrid[idx(nx, ny, p.L)]; /* Moore + centre */
                 if (NI > 0) {
-                    double prob = 1.0 - exp(-p.inf_force * (double)NI);
-                    if (urand() < prob) {
+                    double u;
+                    if (philox) {
+                        if (!have_b1) philox_agent_block(p.seed, (uint32_t)i, (uint32_t)(t + 1), 1, b1);
+                        u = philox_u53(b1[2], b1[3]);
+                    } else {
+                        u = urand();
+                    }
+                    if (u < prob[NI < K ? NI : K]) {
                         state[i] = EXP;
                         tstate[i] = 0;
+                        c[SUS]--; c[EXP]++;
+                        new_inf++;
+                        reinf += recovered[i];
                     }
                 }
             } else if (state[i] == EXP) {
                 if ((double)tstate[i] > dE[i]) {
                     state[i] = INF;
                     tstate[i] = 0;
-                    Icount[idx(nx, ny, p.L)]++; /* devient infectieux */
+                    add_infectious(Icount, NIgrid, nx, ny, p.L, +1); /* devient infectieux */
+                    c[EXP]--; c[INF]++;
                 }
             } else if (state[i] == INF) {
                 if ((double)tstate[i] > dI[i]) {
                     state[i] = REM;
                     tstate[i] = 0;
-                    Icount[idx(nx, ny, p.L)]--; /* quitte infectieux */
+                    add_infectious(Icount, NIgrid, nx, ny, p.L, -1); /* quitte infectieux */
+                    c[INF]--; c[REM]++;
+                    new_rec++;
                 }
             } else { /* REM */
                 if ((double)tstate[i] > dR[i]) {
                     state[i] = SUS;
                     tstate[i] = 0;
+                    recovered[i] = 1;
+                    c[REM]--; c[SUS]++;
                 }
             }
         }
     }
 
     fclose(f);
+    if (finc) fclose(finc);
 
     free(state); free(tstate); free(dE); free(dI); free(dR);
-    free(x); free(y); free(Icount); free(order);
-    return 0;
+    free(x); free(y); free(Icount); free(order); free(recovered); free(NIgrid); free(prob);
+    free(keys); free(first);
+    return status;
 }
@@ -0,0 +1,125 @@
+/*
+ * Philox4x32-10 (Salmon et al., « Parallel random numbers: as easy as
+ * 1, 2, 3 », SC 2011) : générateur à compteur. Le bloc n d'un flux est
+ * une fonction pure de (clé, compteur) : chaque thread, tuile ou jour peut
+ * disposer de son propre flux sans état partagé ni saut coûteux.
+ *
+ * Conversions (communes à tous les usages) :
+ * - uniforme [0, 1) : 53 bits tirés de deux entiers (a >> 5, b >> 6) ;
+ * - entier dans [0, n) : (u32 * n) >> 32 (biais relatif < n / 2^32).
+ *
+ * 1) Flux séquentiel (moteur C++ multithread) : clé = (graine, flux),
+ *    compteur = (n, sous-flux, 0, 0), n = 0, 1, 2, ... ; chaque bloc donne
+ *    4 entiers 32 bits consommés dans l'ordre.
+ *
+ * 2) Tirages indexés (option --rng philox des moteurs Python, C et C++,
+ *    trajectoires identiques d'un langage à l'autre) : clé = (graine, 0),
+ *    compteur = (agent, jour, bloc, 0). Chaque tirage est une fonction de
+ *    (graine, jour, agent) : ils se calculent en bloc ou en parallèle, dans
+ *    n'importe quel ordre.
+ *    Jour 0 (initialisation), agent i :
+ *      bloc 0 : (w0, w1) clé de tri 64 bits, w2 -> x, w3 -> y ;
+ *      bloc 1 : (w0, w1) -> U de dE, (w2, w3) -> U de dI ;
+ *      bloc 2 : (w0, w1) -> U de dR.
+ *      Les agents triés par clé (puis par indice) reçoivent dans l'ordre
+ *      init_S états S, init_E états E, init_I états I, puis R.
+ *    Jour t >= 1, agent i :
+ *      bloc 0 : (w0, w1) clé de tri 64 bits (ordre de passage du jour :
+ *               clés croissantes, puis indices croissants), w2 -> nx, w3 -> ny ;
+ *      bloc 1 : w0 -> nx, w1 -> ny du second essai de déplacement,
+ *               (w2, w3) -> U du test d'infection.
+ *    Mêmes durées (-mean * log(1 - U)), même règle de déplacement et de
+ *    transition que le flux natif de chaque moteur.
+ *    Référence Python : philox.py.
+ *
+ * En-tête C99, utilisable tel quel depuis C++.
+ */
+#ifndef PHILOX_H
+#define PHILOX_H
+
+#include <stdint.h>
+
+#define PHILOX_M0 0xD2511F53u
+#define PHILOX_M1 0xCD9E8D57u
+#define PHILOX_W0 0x9E3779B9u
+#define PHILOX_W1 0xBB67AE85u
+
+static inline void philox4x32_10(const uint32_t ctr[4], const uint32_t key[2], uint32_t out[4]) {
+    uint32_t c0 = ctr[0], c1 = ctr[1], c2 = ctr[2], c3 = ctr[3];
+    uint32_t k0 = key[0], k1 = key[1];
+    for (int r = 0; r < 10; ++r) {
+        if (r > 0) {
+            k0 += PHILOX_W0;
+            k1 += PHILOX_W1;
+        }
+        uint64_t p0 = (uint64_t)PHILOX_M0 * c0;
+        uint64_t p1 = (uint64_t)PHILOX_M1 * c2;
+        uint32_t n0 = (uint32_t)(p1 >> 32) ^ c1 ^ k0;
+        uint32_t n2 = (uint32_t)(p0 >> 32) ^ c3 ^ k1;
+        c1 = (uint32_t)p1;
+        c3 = (uint32_t)p0;
+        c0 = n0;
+        c2 = n2;
+    }
+    out[0] = c0;
+    out[1] = c1;
+    out[2] = c2;
+    out[3] = c3;
+}
+
+static inline double philox_u53(uint32_t a, uint32_t b) {
+    return ((a >> 5) * 67108864.0 + (b >> 6)) * (1.0 / 9007199254740992.0);
+}
+
+static inline uint32_t philox_below(uint32_t w, uint32_t n) {
+    return (uint32_t)(((uint64_t)w * n) >> 32);
+}
+
+static inline uint64_t philox_sort_key(const uint32_t w[4]) {
+    return ((uint64_t)w[0] << 32) | w[1];
+}
+
+/* Tirages indexés : bloc `block` de l'agent `agent` au jour `day` */
+static inline void philox_agent_block(uint32_t seed, uint32_t agent, uint32_t day, uint32_t block,
+                                      uint32_t out[4]) {
+    const uint32_t ctr[4] = {agent, day, block, 0};
+    const uint32_t key[2] = {seed, 0};
+    philox4x32_10(ctr, key, out);
+}
+
+typedef struct {
+    uint32_t key[2];
+    uint32_t ctr[4];
+    uint32_t buf[4];
+    int pos;  /* prochain entier à lire dans buf (4 : bloc épuisé) */
+} philox_stream;
+
+static inline void philox_init(philox_stream *s, uint32_t seed, uint32_t stream, uint32_t substream) {
+    s->key[0] = seed;
+    s->key[1] = stream;
+    s->ctr[0] = 0;
+    s->ctr[1] = substream;
+    s->ctr[2] = 0;
+    s->ctr[3] = 0;
+    s->pos = 4;
+}
+
+static inline uint32_t philox_next_u32(philox_stream *s) {
+    if (s->pos == 4) {
+        philox4x32_10(s->ctr, s->key, s->buf);
+        s->ctr[0]++;
+        s->pos = 0;
+    }
+    return s->buf[s->pos++];
+}
+
+static inline double philox_uniform(philox_stream *s) {
+    uint32_t a = philox_next_u32(s);
+    return philox_u53(a, philox_next_u32(s));
+}
+
+static inline uint32_t philox_bounded(philox_stream *s, uint32_t n) {
+    return philox_below(philox_next_u32(s), n);
+}
+
+#endif /* PHILOX_H */
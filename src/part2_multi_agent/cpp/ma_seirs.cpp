@@ -1,13 +1,30 @@
 #include <algorithm>
+#include <array>
+#include <atomic>
+#include <chrono>
 #include <cmath>
 #include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <filesystem>
 #include <fstream>
+#include <iomanip>
 #include <iostream>
 #include <numeric>
+#include <optional>
 #include <random>
+#include <sstream>
+#include <stdexcept>
 #include <string>
+#include <unordered_map>
 #include <vector>
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#include "../common/philox.h"
+
 static constexpr int SUS = 0;
 static constexpr int EXP = 1;
 static constexpr int INF = 2;
@@ -38,10 +55,44 @@ static inline double neg_exp(std::mt19937 &gen, double mean) {
     return -mean * std::log(1.0 - u);
 }
 
-static inline int idx2d(int x, int y, int L) {
-    return x * L + y;
+// Stockage compact des agents (structure de tableaux, cf. agent_store.py) :
+// état sur 2 bits + temps dans l'état sur 14 bits (saturé à TIME_MAX),
+// seuils entiers de sortie k = floor(d) + 1 (t_in_state > d <=> t_in_state >= k),
+// cellule x * L + y sur 64 bits (L > 65 535 possible avec les grilles
+// creuses). 17 octets par agent au lieu de 32.
+static constexpr int STATE_MASK = 0b11;
+static constexpr int TIME_SHIFT = 2;
+static constexpr int TIME_MAX = (1 << 14) - 1;
+
+static inline uint16_t threshold(double d) {
+    return static_cast<uint16_t>(std::min(std::floor(d) + 1.0, static_cast<double>(TIME_MAX)));
+}
+
+using Cell = uint64_t;
+
+struct AgentStore {
+    std::vector<uint16_t> packed;  // état | temps << TIME_SHIFT
+    std::vector<uint16_t> kE, kI, kR;
+    std::vector<Cell> cell;
+    std::vector<uint8_t> recovered;  // déjà passé par R->S (réinfections)
+
+    explicit AgentStore(int N) : packed(N, SUS), kE(N), kI(N), kR(N), cell(N), recovered(N, 0) {}
+
+    int state(int i) const { return packed[i] & STATE_MASK; }
+};
+
+static inline size_t idx2d(int x, int y, int L) {
+    return static_cast<size_t>(x) * L + y;
 }
 
+// Cellule occupée par des infectieux (instantanés : liste des cellules de
+// Icount non nulles, par indice croissant)
+struct CellCount {
+    Cell cell;
+    int64_t n;
+    bool operator==(const CellCount &o) const { return cell == o.cell && n == o.n; }
+};
+
 static inline int wrap(int a, int L) {
     int r = a % L;
     return (r < 0) ? r + L : r;
@@ -61,150 +112,1312 @@ static inline int neighborhood_I(const std::vector<int16_t> &Icount, int x, int
     return total;
 }
 
-static void run_one_sim(const Params &p, const std::string &out_csv) {
-    std::mt19937 gen(p.seed);
-    std::uniform_real_distribution<double> U01(0.0, 1.0);
+// Infectieux par cellule (Icount) et grille des sommes 3x3 (NIgrid) :
+// NIgrid[x,y] = neighborhood_I(Icount, x, y), tenue à jour en O(9) à chaque
+// changement de Icount ; la lecture de N_I se réduit alors à un accès.
+class InfectiousGrid {
+public:
+    explicit InfectiousGrid(int L)
+        : L_(L), Icount_(static_cast<size_t>(L) * L, 0), NIgrid_(static_cast<size_t>(L) * L, 0) {}
+
+    void add(int x, int y, int d) {
+        Icount_[idx2d(x, y, L_)] += d;
+        const int xs[3] = {x > 0 ? x - 1 : L_ - 1, x, x < L_ - 1 ? x + 1 : 0};
+        const int ys[3] = {y > 0 ? y - 1 : L_ - 1, y, y < L_ - 1 ? y + 1 : 0};
+        for (int a : xs)
+            for (int b : ys)
+                NIgrid_[idx2d(a, b, L_)] += d;
+    }
+
+    int ni(int x, int y) const { return NIgrid_[idx2d(x, y, L_)]; }
+
+    std::vector<CellCount> occupied() const {
+        std::vector<CellCount> out;
+        for (size_t k = 0; k < Icount_.size(); ++k)
+            if (Icount_[k] != 0) out.push_back({static_cast<Cell>(k), Icount_[k]});
+        return out;
+    }
+
+    // mode --check : NIgrid comparée à un recalcul complet depuis Icount
+    bool consistent() const {
+        for (int x = 0; x < L_; ++x)
+            for (int y = 0; y < L_; ++y)
+                if (NIgrid_[idx2d(x, y, L_)] != neighborhood_I(Icount_, x, y, L_)) return false;
+        return true;
+    }
+
+private:
+    int L_;
+    std::vector<int16_t> Icount_;
+    std::vector<int32_t> NIgrid_;
+};
+
+// Variante creuse (--grid sparse, ou auto quand L² > SPARSE_RATIO * N) : seules
+// les cellules non nulles de Icount et de NIgrid sont gardées, dans des
+// tables de hachage indexées par x * L + y. La mémoire dépend du nombre
+// d'infectieux et non de L² (L = 50 000 : 15 Go en dense) ; N_I est le même,
+// donc les trajectoires aussi.
+class SparseInfectiousGrid {
+public:
+    explicit SparseInfectiousGrid(int L) : L_(L) {}
+
+    void add(int x, int y, int d) {
+        bump(Icount_, idx2d(x, y, L_), d);
+        const int xs[3] = {x > 0 ? x - 1 : L_ - 1, x, x < L_ - 1 ? x + 1 : 0};
+        const int ys[3] = {y > 0 ? y - 1 : L_ - 1, y, y < L_ - 1 ? y + 1 : 0};
+        for (int a : xs)
+            for (int b : ys)
+                bump(NIgrid_, idx2d(a, b, L_), d);
+    }
+
+    int ni(int x, int y) const {
+        const auto it = NIgrid_.find(static_cast<Cell>(idx2d(x, y, L_)));
+        return it == NIgrid_.end() ? 0 : it->second;
+    }
+
+    std::vector<CellCount> occupied() const {
+        std::vector<CellCount> out;
+        out.reserve(Icount_.size());
+        for (const auto &kv : Icount_) out.push_back({kv.first, kv.second});
+        std::sort(out.begin(), out.end(), [](const CellCount &u, const CellCount &v) { return u.cell < v.cell; });
+        return out;
+    }
+
+    // mode --check : NIgrid recalculée depuis Icount
+    bool consistent() const {
+        SparseInfectiousGrid full(L_);
+        for (const auto &kv : Icount_) {
+            full.add(static_cast<int>(kv.first / L_), static_cast<int>(kv.first % L_), kv.second);
+        }
+        return full.NIgrid_ == NIgrid_;
+    }
+
+private:
+    static void bump(std::unordered_map<Cell, int32_t> &m, size_t cell, int d) {
+        auto it = m.try_emplace(static_cast<Cell>(cell), 0).first;
+        it->second += d;
+        if (it->second == 0) m.erase(it);
+    }
+
+    int L_;
+    std::unordered_map<Cell, int32_t> Icount_;
+    std::unordered_map<Cell, int32_t> NIgrid_;
+};
+
+static constexpr int SPARSE_RATIO = 64;
+
+enum GridKind { GRID_AUTO = 0, GRID_DENSE = 1, GRID_SPARSE = 2 };
+
+static bool sparse_grid(const Params &p, int grid) {
+    if (grid == GRID_AUTO) return static_cast<double>(p.L) * p.L > static_cast<double>(SPARSE_RATIO) * p.N;
+    return grid == GRID_SPARSE;
+}
+
+// Variante partagée entre threads (moteur --threads) : mêmes grilles, mises
+// à jour par additions atomiques. Les lectures (ni) et les écritures (add)
+// ont lieu dans des phases séparées par une barrière : le résultat des
+// additions, commutatives, ne dépend pas de l'ordre des threads.
+class SharedInfectiousGrid {
+public:
+    explicit SharedInfectiousGrid(int L)
+        : L_(L), Icount_(static_cast<size_t>(L) * L), NIgrid_(static_cast<size_t>(L) * L) {
+        for (auto &v : Icount_) v.store(0, std::memory_order_relaxed);
+        for (auto &v : NIgrid_) v.store(0, std::memory_order_relaxed);
+    }
+
+    void add(int x, int y, int d) {
+        Icount_[idx2d(x, y, L_)].fetch_add(d, std::memory_order_relaxed);
+        const int xs[3] = {x > 0 ? x - 1 : L_ - 1, x, x < L_ - 1 ? x + 1 : 0};
+        const int ys[3] = {y > 0 ? y - 1 : L_ - 1, y, y < L_ - 1 ? y + 1 : 0};
+        for (int a : xs)
+            for (int b : ys)
+                NIgrid_[idx2d(a, b, L_)].fetch_add(d, std::memory_order_relaxed);
+    }
+
+    int ni(int x, int y) const { return NIgrid_[idx2d(x, y, L_)].load(std::memory_order_relaxed); }
+
+    std::vector<int16_t> icount() const {
+        std::vector<int16_t> ic(Icount_.size());
+        for (size_t k = 0; k < ic.size(); ++k) ic[k] = static_cast<int16_t>(Icount_[k].load());
+        return ic;
+    }
+
+    std::vector<CellCount> occupied() const {
+        std::vector<CellCount> out;
+        for (size_t k = 0; k < Icount_.size(); ++k) {
+            const int32_t n = Icount_[k].load(std::memory_order_relaxed);
+            if (n != 0) out.push_back({static_cast<Cell>(k), n});
+        }
+        return out;
+    }
+
+    bool consistent() const {
+        const std::vector<int16_t> ic = icount();
+        for (int x = 0; x < L_; ++x)
+            for (int y = 0; y < L_; ++y)
+                if (ni(x, y) != neighborhood_I(ic, x, y, L_)) return false;
+        return true;
+    }
+
+private:
+    int L_;
+    std::vector<std::atomic<int32_t>> Icount_;
+    std::vector<std::atomic<int32_t>> NIgrid_;
+};
+
+// Table prob[NI] = 1 - exp(-inf_force * NI) pour NI = 0..K, K <= n_max premier
+// rang où la probabilité vaut 1.0 : la probabilité pour NI est prob[min(NI, K)].
+static std::vector<double> infection_prob_table(double inf_force, int n_max) {
+    std::vector<double> prob{0.0};
+    while (static_cast<int>(prob.size()) <= n_max && prob.back() < 1.0) {
+        prob.push_back(1.0 - std::exp(-inf_force * static_cast<double>(prob.size())));
+    }
+    return prob;
+}
+
+static bool ends_with(const std::string &s, const std::string &suffix) {
+    return s.size() >= suffix.size() &&
+           s.compare(s.size() - suffix.size(), suffix.size(), suffix) == 0;
+}
+
+// Arrêt anticipé (voir fill_extinct et steady_state dans ma_seirs.py) :
+// extinction (E = I = 0, jours restants remplis exactement) et régime
+// stationnaire optionnel (jours restants = moyenne de la dernière fenêtre)
+struct EarlyStop {
+    int extinction = 1;        // arrêt à l'extinction
+    double steady_tol = 0.0;   // écart max des moyennes de deux fenêtres / N (0 : désactivé)
+    int steady_window = 60;    // fenêtre (jours)
+};
+
+// Jour d'arrêt anticipé (-1 : non atteint) et nombre de jours simulés
+struct RunInfo {
+    int32_t extinct_day = -1;
+    int32_t steady_day = -1;
+    int32_t days_simulated = 0;
+};
+
+// Sortie des effectifs journaliers : CSV t,S,E,I,R, ou format binaire
+// (voir trajectories.py) si le chemin finit par .npy : tableau int32
+// (1, T+1, 4) little-endian + en-tête de métadonnées <nom>.json (réécrit
+// en fin de simulation si elle s'est arrêtée avant T)
+class TrajectoryWriter {
+public:
+    TrajectoryWriter(const std::string &path, const Params &p, const std::string &engine = "cpp",
+                     const std::string &rng = "native")
+        : f_(path, std::ios::binary), npy_(ends_with(path, ".npy")), p_(p), engine_(engine), rng_(rng) {
+        if (!f_) {
+            throw std::runtime_error("Impossible d'ouvrir le fichier: " + path);
+        }
+        if (npy_) {
+            meta_path_ = path.substr(0, path.size() - 4) + ".json";
+            write_npy_header(p.T + 1);
+            write_meta(RunInfo{});
+        } else {
+            f_ << "t,S,E,I,R\n";
+        }
+    }
+
+    void write(int t, const std::array<int,4> &c) {
+        if (npy_) {
+            int32_t row[4] = {c[0], c[1], c[2], c[3]};
+            f_.write(reinterpret_cast<const char *>(row), sizeof(row));
+        } else {
+            f_ << t << "," << c[0] << "," << c[1] << "," << c[2] << "," << c[3] << "\n";
+        }
+    }
+
+    void finish(const RunInfo &info) {
+        if (npy_ && (info.extinct_day >= 0 || info.steady_day >= 0)) write_meta(info);
+    }
+
+private:
+    void write_npy_header(int rows) {
+        std::string dict = "{'descr': '<i4', 'fortran_order': False, 'shape': (1, " +
+                           std::to_string(rows) + ", 4), }";
+        size_t total = 10 + dict.size() + 1;  // magic + version + longueur + '\n'
+        dict.append((64 - total % 64) % 64, ' ');
+        dict.push_back('\n');
+
+        const char magic[8] = {'\x93', 'N', 'U', 'M', 'P', 'Y', 1, 0};
+        uint16_t len = static_cast<uint16_t>(dict.size());
+        const char len_le[2] = {static_cast<char>(len & 0xff), static_cast<char>(len >> 8)};
+        f_.write(magic, 8);
+        f_.write(len_le, 2);
+        f_ << dict;
+    }
+
+    void write_meta(const RunInfo &info) {
+        const Params &p = p_;
+        std::ofstream m(meta_path_);
+        if (!m) {
+            throw std::runtime_error("Impossible d'ouvrir le fichier: " + meta_path_);
+        }
+        m << std::setprecision(17);  // doubles relus à l'identique
+        m << "{\"format\": \"seirs-traj\", \"version\": 1, "
+          << "\"columns\": [\"S\", \"E\", \"I\", \"R\"], \"reps\": [{"
+          << "\"engine\": \"" << engine_ << "\", \"seed\": " << p.seed << ", \"params\": {"
+          << "\"L\": " << p.L << ", \"N\": " << p.N << ", \"T\": " << p.T
+          << ", \"init_S\": " << p.init_S << ", \"init_I\": " << p.init_I
+          << ", \"init_E\": " << p.init_E << ", \"init_R\": " << p.init_R
+          << ", \"mean_dE\": " << p.mean_dE << ", \"mean_dI\": " << p.mean_dI
+          << ", \"mean_dR\": " << p.mean_dR << ", \"inf_force\": " << p.inf_force << "}"
+          << (rng_ == "native" ? "" : ", \"rng\": \"" + rng_ + "\"");
+        if (info.extinct_day >= 0) m << ", \"extinct_day\": " << info.extinct_day;
+        if (info.steady_day >= 0) m << ", \"steady_day\": " << info.steady_day;
+        m << "}]}\n";
+    }
+
+    std::ofstream f_;
+    bool npy_;
+    Params p_;
+    std::string engine_, rng_, meta_path_;
+};
+
+// Instrumentation (--profile) : temps par phase, compteurs, durée de chaque
+// jour ; même rapport JSON que engine_profile.py. Phases disjointes : rng
+// (tirages, mélange compris), move (hors tirages), neighborhood (N_I),
+// transition (hors tirages et N_I), count ; "other" = reste (boucles,
+// surcoût de mesure, non négligeable ici : un appel d'horloge par phase).
+struct Profile {
+    enum Phase { RNG, MOVE, NEIGHBORHOOD, TRANSITION, COUNT, N_PHASES };
+    using clock = std::chrono::steady_clock;
+    struct Mark { clock::time_point t; double nested; };
+
+    double time[N_PHASES] = {};
+    long long rng_calls = 0;
+    long long rng_draws = 0;
+    long long neighborhood_evals = 0;
+    long long transitions[4] = {};  // S->E, E->I, I->R, R->S
+    std::vector<double> day_wall;
+
+    static double since(clock::time_point t0) {
+        return std::chrono::duration<double>(clock::now() - t0).count();
+    }
+    void add(Phase ph, clock::time_point t0) { time[ph] += since(t0); }
+
+    // début d'une phase ; lap retranche les phases imbriquées (rng, N_I)
+    Mark mark() const { return {clock::now(), time[RNG] + time[NEIGHBORHOOD]}; }
+    Mark lap(Phase ph, const Mark &m) {
+        time[ph] += since(m.t) - (time[RNG] + time[NEIGHBORHOOD] - m.nested);
+        return mark();
+    }
+
+    double wall() const {
+        double w = 0.0;
+        for (double d : day_wall) w += d;
+        return w;
+    }
+
+    void write_json(const std::string &path, const Params &p) const {
+        static const char *phase_names[N_PHASES] = {"rng", "move", "neighborhood", "transition", "count"};
+        static const char *tr_names[4] = {"S->E", "E->I", "I->R", "R->S"};
+        std::ofstream f(path);
+        if (!f) {
+            throw std::runtime_error("Impossible d'ouvrir le fichier: " + path);
+        }
+        const double w = wall();
+        const long long updates = static_cast<long long>(p.N) * static_cast<long long>(day_wall.size());
+        double measured = 0.0;
+        for (double t : time) measured += t;
+
+        f << std::setprecision(17);
+        f << "{\"engine\": \"cpp\", \"params\": {\"L\": " << p.L << ", \"N\": " << p.N
+          << ", \"T\": " << p.T << ", \"seed\": " << p.seed << ", \"init_S\": " << p.init_S
+          << ", \"init_I\": " << p.init_I << ", \"init_E\": " << p.init_E
+          << ", \"init_R\": " << p.init_R << ", \"mean_dE\": " << p.mean_dE
+          << ", \"mean_dI\": " << p.mean_dI << ", \"mean_dR\": " << p.mean_dR
+          << ", \"inf_force\": " << p.inf_force << "},\n";
+        f << " \"wall_s\": " << w << ", \"agent_updates\": " << updates
+          << ", \"agent_updates_per_s\": " << (w > 0 ? updates / w : 0.0) << ",\n";
+        f << " \"phases\": {";
+        for (int k = 0; k < N_PHASES; ++k) {
+            f << "\"" << phase_names[k] << "\": {\"seconds\": " << time[k]
+              << ", \"fraction\": " << (w > 0 ? time[k] / w : 0.0) << "}, ";
+        }
+        f << "\"other\": {\"seconds\": " << w - measured
+          << ", \"fraction\": " << (w > 0 ? (w - measured) / w : 0.0) << "}},\n";
+        f << " \"counters\": {\"rng_calls\": " << rng_calls << ", \"rng_draws\": " << rng_draws
+          << ", \"neighborhood_evals\": " << neighborhood_evals << "},\n";
+        f << " \"transitions\": {";
+        for (int k = 0; k < 4; ++k) {
+            f << (k ? ", " : "") << "\"" << tr_names[k] << "\": " << transitions[k];
+        }
+        f << "},\n";
+
+        double dmin = 0.0, dmax = 0.0;
+        if (!day_wall.empty()) {
+            dmin = *std::min_element(day_wall.begin(), day_wall.end());
+            dmax = *std::max_element(day_wall.begin(), day_wall.end());
+        }
+        f << " \"day_wall_s\": {\"min\": " << dmin << ", \"mean\": "
+          << (day_wall.empty() ? 0.0 : w / day_wall.size()) << ", \"max\": " << dmax
+          << ", \"days\": [";
+        for (size_t k = 0; k < day_wall.size(); ++k) {
+            f << (k ? ", " : "") << day_wall[k];
+        }
+        f << "]}}\n";
+    }
+
+    void print(std::ostream &os, const Params &p) const {
+        static const char *phase_names[N_PHASES] = {"rng", "move", "neighborhood", "transition", "count"};
+        const double w = wall();
+        double measured = 0.0;
+        for (double t : time) measured += t;
+        os << "=== Profil cpp : " << w << " s, "
+           << (w > 0 ? static_cast<double>(p.N) * day_wall.size() / w : 0.0)
+           << " mises à jour/s ===\n";
+        for (int k = 0; k < N_PHASES; ++k) {
+            os << "  " << phase_names[k] << " " << time[k] << " s (" << 100.0 * time[k] / w << " %)\n";
+        }
+        os << "  other " << w - measured << " s (" << 100.0 * (w - measured) / w << " %)\n";
+        os << "  rng_calls " << rng_calls << ", rng_draws " << rng_draws
+           << ", neighborhood_evals " << neighborhood_evals << "\n";
+        os << "  transitions S->E: " << transitions[0] << ", E->I: " << transitions[1]
+           << ", I->R: " << transitions[2] << ", R->S: " << transitions[3] << "\n";
+    }
+};
+
+// Population initiale : états mélangés, seuils de sortie, positions (tirages
+// du flux mt19937 `gen`, communs aux moteurs série et multithread)
+static AgentStore init_agents(const Params &p, std::mt19937 &gen) {
     std::uniform_int_distribution<int> Upos(0, p.L - 1);
 
-    // états
-    std::vector<int8_t> state(p.N, SUS);
+    // états (temps dans l'état nul)
+    AgentStore a(p.N);
     // init exact
-    int kS = p.init_S;
-    int kE = p.init_E;
-    int kI = p.init_I;
-    int kR = p.init_R;
-
     int pos = 0;
-    for (int i = 0; i < kS; ++i) state[pos++] = SUS;
-    for (int i = 0; i < kE; ++i) state[pos++] = EXP;
-    for (int i = 0; i < kI; ++i) state[pos++] = INF;
-    for (int i = 0; i < kR; ++i) state[pos++] = REM;
+    for (int i = 0; i < p.init_S; ++i) a.packed[pos++] = SUS;
+    for (int i = 0; i < p.init_E; ++i) a.packed[pos++] = EXP;
+    for (int i = 0; i < p.init_I; ++i) a.packed[pos++] = INF;
+    for (int i = 0; i < p.init_R; ++i) a.packed[pos++] = REM;
 
     // mélanger
-    std::shuffle(state.begin(), state.end(), gen);
+    std::shuffle(a.packed.begin(), a.packed.end(), gen);
 
-    // durées individuelles fixes
-    std::vector<double> dE(p.N), dI(p.N), dR(p.N);
+    // durées individuelles fixes, stockées en seuils entiers
     for (int i = 0; i < p.N; ++i) {
-        dE[i] = neg_exp(gen, p.mean_dE);
-        dI[i] = neg_exp(gen, p.mean_dI);
-        dR[i] = neg_exp(gen, p.mean_dR);
+        a.kE[i] = threshold(neg_exp(gen, p.mean_dE));
+        a.kI[i] = threshold(neg_exp(gen, p.mean_dI));
+        a.kR[i] = threshold(neg_exp(gen, p.mean_dR));
     }
 
-    // temps dans l'état
-    std::vector<int16_t> t_in_state(p.N, 0);
-
     // positions
-    std::vector<int16_t> x(p.N), y(p.N);
     for (int i = 0; i < p.N; ++i) {
-        x[i] = static_cast<int16_t>(Upos(gen));
-        y[i] = static_cast<int16_t>(Upos(gen));
+        int x0 = Upos(gen);
+        int y0 = Upos(gen);
+        a.cell[i] = idx2d(x0, y0, p.L);
     }
+    return a;
+}
 
-    // grille de comptage infectieux
-    std::vector<int16_t> Icount(static_cast<size_t>(p.L) * p.L, 0);
+// Même population initiale avec les tirages indexés (--rng philox, voir
+// common/philox.h) : états par rang de clé, positions et durées par agent
+static AgentStore init_agents_philox(const Params &p) {
+    AgentStore a(p.N);
+    std::vector<uint64_t> key(p.N);
+    uint32_t w[4];
     for (int i = 0; i < p.N; ++i) {
-        if (state[i] == INF) {
-            Icount[idx2d(x[i], y[i], p.L)]++;
+        philox_agent_block(p.seed, i, 0, 0, w);
+        key[i] = philox_sort_key(w);
+        a.cell[i] = static_cast<Cell>(philox_below(w[2], p.L)) * p.L + philox_below(w[3], p.L);
+        philox_agent_block(p.seed, i, 0, 1, w);
+        a.kE[i] = threshold(-p.mean_dE * std::log(1.0 - philox_u53(w[0], w[1])));
+        a.kI[i] = threshold(-p.mean_dI * std::log(1.0 - philox_u53(w[2], w[3])));
+        philox_agent_block(p.seed, i, 0, 2, w);
+        a.kR[i] = threshold(-p.mean_dR * std::log(1.0 - philox_u53(w[0], w[1])));
+    }
+
+    std::vector<int> rank(p.N);
+    std::iota(rank.begin(), rank.end(), 0);
+    std::sort(rank.begin(), rank.end(), [&](int u, int v) {
+        return key[u] < key[v] || (key[u] == key[v] && u < v);
+    });
+    int pos = 0;
+    for (int i = 0; i < p.init_S; ++i) a.packed[rank[pos++]] = SUS;
+    for (int i = 0; i < p.init_E; ++i) a.packed[rank[pos++]] = EXP;
+    for (int i = 0; i < p.init_I; ++i) a.packed[rank[pos++]] = INF;
+    for (int i = 0; i < p.init_R; ++i) a.packed[rank[pos++]] = REM;
+    return a;
+}
+
+// Tirages quotidiens indexés (--rng philox) : day() calcule l'ordre de
+// passage (clés du bloc 0) et les premières positions de tous les agents ;
+// select(i) précède la mise à jour de l'agent i, dont pos() donne nx, ny
+// puis le second essai, et u() l'uniforme d'infection (bloc 1, calculé à
+// la demande).
+class PhiloxDraws {
+public:
+    PhiloxDraws(uint32_t seed, int N, int L) : seed_(seed), L_(L), key_(N), first_(2 * static_cast<size_t>(N)) {}
+
+    void day(int t, std::vector<int> &order) {
+        day_ = t;
+        uint32_t w[4];
+        for (size_t i = 0; i < key_.size(); ++i) {
+            philox_agent_block(seed_, static_cast<uint32_t>(i), day_, 0, w);
+            key_[i] = philox_sort_key(w);
+            first_[2 * i] = philox_below(w[2], L_);
+            first_[2 * i + 1] = philox_below(w[3], L_);
         }
+        std::sort(order.begin(), order.end(), [&](int u, int v) {
+            return key_[u] < key_[v] || (key_[u] == key_[v] && u < v);
+        });
     }
 
-    auto count_states = [&]() {
-        int S=0,E=0,I=0,R=0;
-        for (int i = 0; i < p.N; ++i) {
-            switch (state[i]) {
-                case SUS: S++; break;
-                case EXP: E++; break;
-                case INF: I++; break;
-                case REM: R++; break;
+    void select(int i) {
+        i_ = i;
+        next_ = 0;
+        have_block1_ = false;
+    }
+
+    int pos() {
+        const int k = next_++;
+        if (k < 2) return static_cast<int>(first_[2 * static_cast<size_t>(i_) + k]);
+        return static_cast<int>(philox_below(block1()[k - 2], L_));
+    }
+
+    double u() {
+        const uint32_t *w = block1();
+        return philox_u53(w[2], w[3]);
+    }
+
+private:
+    const uint32_t *block1() {
+        if (!have_block1_) {
+            philox_agent_block(seed_, static_cast<uint32_t>(i_), day_, 1, block1_);
+            have_block1_ = true;
+        }
+        return block1_;
+    }
+
+    uint32_t seed_;
+    uint32_t L_;
+    uint32_t day_ = 0;
+    std::vector<uint64_t> key_;
+    std::vector<uint32_t> first_;
+    int i_ = 0;
+    int next_ = 0;
+    bool have_block1_ = false;
+    uint32_t block1_[4] = {};
+};
+
+// comptage complet (initialisation et mode --check)
+static std::array<int,4> count_states(const AgentStore &a) {
+    int S=0,E=0,I=0,R=0;
+    for (size_t i = 0; i < a.packed.size(); ++i) {
+        switch (a.state(static_cast<int>(i))) {
+            case SUS: S++; break;
+            case EXP: E++; break;
+            case INF: I++; break;
+            case REM: R++; break;
+        }
+    }
+    return std::array<int,4>{S,E,I,R};
+}
+
+// mode --check : compteurs comparés à un comptage complet, grille N_I à un recalcul
+static void check_day(int t, const std::array<int,4> &c, const AgentStore &a, bool grid_ok) {
+    auto full = count_states(a);
+    if (full != c) {
+        throw std::runtime_error(
+            "compteurs incohérents au jour " + std::to_string(t) + ": (" +
+            std::to_string(c[0]) + "," + std::to_string(c[1]) + "," + std::to_string(c[2]) + "," +
+            std::to_string(c[3]) + ") != (" + std::to_string(full[0]) + "," +
+            std::to_string(full[1]) + "," + std::to_string(full[2]) + "," +
+            std::to_string(full[3]) + ") (comptage complet)");
+    }
+    if (!grid_ok) {
+        throw std::runtime_error("grille N_I incohérente au jour " + std::to_string(t) +
+                                 " (recalcul complet)");
+    }
+}
+
+// Destination des effectifs S,E,I,R et de l'incidence de chaque jour t = 0..T
+class DailySink {
+public:
+    virtual ~DailySink() = default;
+    virtual void write(int t, const std::array<int,4> &c, int new_inf, int new_rec, int reinf) = 0;
+    // fin de simulation (après le jour T)
+    virtual void finish(const RunInfo &) {}
+};
+
+// Programme en ligne de commande : trajectoire (CSV ou .npy) et incidence
+// optionnelle (--incidence) écrites sur disque
+class FileSink : public DailySink {
+public:
+    FileSink(const std::string &path, const Params &p, const std::string &engine,
+             const std::string &incidence_csv, const std::string &rng = "native")
+        : f_(path, p, engine, rng) {
+        if (!incidence_csv.empty()) {
+            finc_.open(incidence_csv);
+            if (!finc_) {
+                throw std::runtime_error("Impossible d'ouvrir le fichier: " + incidence_csv);
             }
+            finc_ << "t,new_infections,new_recoveries,reinfections\n";
         }
-        return std::array<int,4>{S,E,I,R};
-    };
+    }
 
-    // ordre aléatoire
-    std::vector<int> order(p.N);
-    std::iota(order.begin(), order.end(), 0);
+    void write(int t, const std::array<int,4> &c, int new_inf, int new_rec, int reinf) override {
+        f_.write(t, c);
+        if (finc_.is_open()) {
+            finc_ << t << "," << new_inf << "," << new_rec << "," << reinf << "\n";
+        }
+    }
 
-    std::ofstream f(out_csv);
-    if (!f) {
-        throw std::runtime_error("Impossible d'ouvrir le fichier: " + out_csv);
+    void finish(const RunInfo &info) override {
+        info_ = info;
+        f_.finish(info);
     }
-    f << "t,S,E,I,R\n";
+
+    const RunInfo &info() const { return info_; }
+
+private:
+    TrajectoryWriter f_;
+    std::ofstream finc_;
+    RunInfo info_;
+};
+
+// Module Python (seirs_run) : écriture directe dans les tableaux int32
+// fournis par l'appelant, (T+1) x 4 et (T+1) x 3 (incidence, optionnel),
+// et RunInfo (3 entiers, optionnel)
+class BufferSink : public DailySink {
+public:
+    BufferSink(int32_t *counts, int32_t *incidence, int32_t *info = nullptr)
+        : counts_(counts), inc_(incidence), info_(info) {}
+
+    void finish(const RunInfo &info) override {
+        if (info_) {
+            info_[0] = info.extinct_day;
+            info_[1] = info.steady_day;
+            info_[2] = info.days_simulated;
+        }
+    }
+
+    void write(int t, const std::array<int,4> &c, int new_inf, int new_rec, int reinf) override {
+        for (int k = 0; k < 4; ++k) counts_[4 * t + k] = c[k];
+        if (inc_) {
+            inc_[3 * t] = new_inf;
+            inc_[3 * t + 1] = new_rec;
+            inc_[3 * t + 2] = reinf;
+        }
+    }
+
+private:
+    int32_t *counts_;
+    int32_t *inc_;
+    int32_t *info_;
+};
+
+// Points de reprise (--checkpoint-every K, --resume F) : instantané binaire
+// de l'état complet au soir du jour t — agents (format compact), cellules
+// occupées de Icount,
+// ordre de passage (mélangé en place d'un jour à l'autre), effectifs,
+// historique des jours 0..t et état du mt19937 (moteur série natif ; les
+// flux Philox ne dépendent que de (graine, jour, agent ou tuile) et n'ont
+// pas d'état). La reprise rejoue l'historique dans la sortie puis continue :
+// même trajectoire qu'un lancement d'un seul tenant. --fork-seed S reprend
+// avec une nouvelle graine, pour lancer plusieurs scénarios depuis un même
+// échauffement.
+//
+// Fichier (binaire natif, relu sur la même architecture) : "SEIRSCK3",
+// Params, jour, chaînes moteur / générateur / état mt19937 (longueur
+// uint32 + octets), puis packed, kE, kI, kR, cell (uint64), recovered (N),
+// nombre de cellules occupées (uint64) et couples (cellule uint64, effectif
+// int64),
+// order (N), effectifs du jour (4), historique ((t+1) x 4 et x 3). La taille
+// ne dépend pas de L : mêmes instantanés avec les grilles denses et creuses.
+struct Snapshot {
+    Params p;
+    std::string engine;      // "cpp" ou "cpp-mt"
+    std::string rng;         // "native" ou "philox"
+    int day = 0;
+    std::string gen_state;   // mt19937 (operator<<) ; vide : pas d'état à restaurer
+    AgentStore a{0};
+    std::vector<CellCount> Icount;
+    std::vector<int> order;
+    std::array<int,4> c{};
+    std::vector<int32_t> counts, incidence;
+};
+
+static constexpr char SNAPSHOT_MAGIC[8] = {'S', 'E', 'I', 'R', 'S', 'C', 'K', '3'};
+
+template <class T>
+static void put(std::ostream &f, const T *v, size_t n) {
+    f.write(reinterpret_cast<const char *>(v), static_cast<std::streamsize>(n * sizeof(T)));
+}
+
+template <class T>
+static void get(std::istream &f, T *v, size_t n) {
+    f.read(reinterpret_cast<char *>(v), static_cast<std::streamsize>(n * sizeof(T)));
+}
+
+static void put_str(std::ostream &f, const std::string &s) {
+    const uint32_t n = static_cast<uint32_t>(s.size());
+    put(f, &n, 1);
+    put(f, s.data(), n);
+}
+
+static std::string get_str(std::istream &f) {
+    uint32_t n = 0;
+    get(f, &n, 1);
+    if (!f || n > (1u << 20)) throw std::runtime_error("chaîne invalide");
+    std::string s(n, '\0');
+    get(f, &s[0], n);
+    return s;
+}
+
+// Écriture dans <path>.tmp puis renommage : un instantané interrompu
+// n'écrase jamais le précédent
+static void save_snapshot(const std::string &path, const Snapshot &s) {
+    const std::string tmp = path + ".tmp";
     {
-        auto c = count_states();
-        f << 0 << "," << c[0] << "," << c[1] << "," << c[2] << "," << c[3] << "\n";
+        std::ofstream f(tmp, std::ios::binary);
+        if (!f) throw std::runtime_error("Impossible d'ouvrir le fichier: " + tmp);
+        const size_t N = s.p.N;
+        const uint64_t cells = s.Icount.size();
+        put(f, SNAPSHOT_MAGIC, 8);
+        put(f, &s.p, 1);
+        put(f, &s.day, 1);
+        put_str(f, s.engine);
+        put_str(f, s.rng);
+        put_str(f, s.gen_state);
+        put(f, s.a.packed.data(), N);
+        put(f, s.a.kE.data(), N);
+        put(f, s.a.kI.data(), N);
+        put(f, s.a.kR.data(), N);
+        put(f, s.a.cell.data(), N);
+        put(f, s.a.recovered.data(), N);
+        put(f, &cells, 1);
+        put(f, s.Icount.data(), cells);
+        put(f, s.order.data(), N);
+        put(f, s.c.data(), 4);
+        put(f, s.counts.data(), 4 * static_cast<size_t>(s.day + 1));
+        put(f, s.incidence.data(), 3 * static_cast<size_t>(s.day + 1));
+        if (!f) throw std::runtime_error("Écriture impossible: " + tmp);
+    }
+    std::filesystem::rename(tmp, path);
+}
+
+[[maybe_unused]] static Snapshot load_snapshot(const std::string &path) {
+    std::ifstream f(path, std::ios::binary);
+    if (!f) throw std::runtime_error("Impossible d'ouvrir le fichier: " + path);
+    char magic[8];
+    get(f, magic, 8);
+    if (!f || std::memcmp(magic, SNAPSHOT_MAGIC, 8) != 0) {
+        throw std::runtime_error("pas un instantané ma_seirs.cpp: " + path);
+    }
+    Snapshot s;
+    get(f, &s.p, 1);
+    get(f, &s.day, 1);
+    if (!f || s.p.N <= 0 || s.p.L <= 0 || s.day < 0 || s.day > s.p.T) {
+        throw std::runtime_error("en-tête d'instantané invalide: " + path);
+    }
+    s.engine = get_str(f);
+    s.rng = get_str(f);
+    s.gen_state = get_str(f);
+    const size_t N = s.p.N;
+    s.a = AgentStore(s.p.N);
+    s.order.resize(N);
+    s.counts.resize(4 * static_cast<size_t>(s.day + 1));
+    s.incidence.resize(3 * static_cast<size_t>(s.day + 1));
+    get(f, s.a.packed.data(), N);
+    get(f, s.a.kE.data(), N);
+    get(f, s.a.kI.data(), N);
+    get(f, s.a.kR.data(), N);
+    get(f, s.a.cell.data(), N);
+    get(f, s.a.recovered.data(), N);
+    uint64_t cells = 0;
+    get(f, &cells, 1);
+    if (!f || cells > N) throw std::runtime_error("instantané invalide (Icount): " + path);
+    s.Icount.resize(cells);
+    get(f, s.Icount.data(), cells);
+    get(f, s.order.data(), N);
+    get(f, s.c.data(), 4);
+    get(f, s.counts.data(), s.counts.size());
+    get(f, s.incidence.data(), s.incidence.size());
+    if (!f) throw std::runtime_error("instantané tronqué: " + path);
+    return s;
+}
+
+struct Checkpointing {
+    int every = 0;                     // instantané tous les `every` jours (0 : jamais)
+    std::string dir;                   // fichiers <dir>/day_<t>.ckpt
+    const Snapshot *resume = nullptr;  // état de départ (nullptr : jour 0)
+};
+
+// Sortie des moteurs : transmet chaque jour à `out` et garde l'historique
+// des effectifs pour les instantanés ; start() écrit le jour 0, ou rejoue
+// l'historique de l'instantané de reprise, et renvoie le premier jour à
+// simuler.
+class CheckpointSink : public DailySink {
+public:
+    CheckpointSink(DailySink &out, const Params &p, const Checkpointing &opt,
+                   const std::string &engine, const std::string &rng)
+        : out_(out), p_(p), opt_(opt), engine_(engine), rng_(rng),
+          counts_(4 * static_cast<size_t>(p.T + 1)), inc_(3 * static_cast<size_t>(p.T + 1)) {
+        if (opt_.every > 0) std::filesystem::create_directories(opt_.dir);
     }
 
-    for (int t = 1; t <= p.T; ++t) {
-        std::shuffle(order.begin(), order.end(), gen);
+    int start(const std::array<int,4> &c) {
+        const Snapshot *rs = opt_.resume;
+        if (!rs) {
+            write(0, c, 0, 0, 0);
+            return 1;
+        }
+        for (int t = 0; t <= rs->day; ++t) {
+            const int32_t *k = &rs->counts[4 * static_cast<size_t>(t)];
+            const int32_t *d = &rs->incidence[3 * static_cast<size_t>(t)];
+            write(t, {k[0], k[1], k[2], k[3]}, d[0], d[1], d[2]);
+        }
+        return rs->day + 1;
+    }
+
+    void write(int t, const std::array<int,4> &c, int new_inf, int new_rec, int reinf) override {
+        for (int k = 0; k < 4; ++k) counts_[4 * static_cast<size_t>(t) + k] = c[k];
+        inc_[3 * static_cast<size_t>(t)] = new_inf;
+        inc_[3 * static_cast<size_t>(t) + 1] = new_rec;
+        inc_[3 * static_cast<size_t>(t) + 2] = reinf;
+        out_.write(t, c, new_inf, new_rec, reinf);
+    }
+
+    bool due(int t) const { return opt_.every > 0 && t % opt_.every == 0; }
+
+    // Extinction au jour t : l'agent R d'indice j de `drain` repasse en S au
+    // jour t + drain[j] (>= 1) ; jours t+1..T écrits sans simulation
+    void fill_extinct(int t, std::array<int,4> c, const std::vector<int> &drain) {
+        std::vector<int> out(p_.T - t + 1, 0);
+        for (int d : drain) {
+            if (d <= p_.T - t) out[d]++;
+        }
+        for (int u = t + 1; u <= p_.T; ++u) {
+            c[SUS] += out[u - t];
+            c[REM] -= out[u - t];
+            write(u, c, 0, 0, 0);
+        }
+    }
+
+    // Régime stationnaire au jour t : moyennes de S,E,I,R sur ]t-w, t] et
+    // ]t-2w, t-w] à moins de tol * N pour chaque compartiment
+    bool steady(int t, int w, double tol) const {
+        if (t < 2 * w) return false;
+        for (int k = 0; k < 4; ++k) {
+            double last = 0.0, prev = 0.0;
+            for (int u = t - w + 1; u <= t; ++u) last += counts_[4 * static_cast<size_t>(u) + k];
+            for (int u = t - 2 * w + 1; u <= t - w; ++u) prev += counts_[4 * static_cast<size_t>(u) + k];
+            if (std::abs(last - prev) / w > tol * p_.N) return false;
+        }
+        return true;
+    }
+
+    // jours t+1..T : moyenne de la dernière fenêtre (effectif total conservé)
+    void fill_steady(int t, int w) {
+        std::array<int,4> c{};
+        int inc[3] = {};
+        for (int k = 0; k < 4; ++k) {
+            double sum = 0.0;
+            for (int u = t - w + 1; u <= t; ++u) sum += counts_[4 * static_cast<size_t>(u) + k];
+            c[k] = static_cast<int>(std::nearbyint(sum / w));
+        }
+        c[REM] = p_.N - c[SUS] - c[EXP] - c[INF];
+        for (int k = 0; k < 3; ++k) {
+            double sum = 0.0;
+            for (int u = t - w + 1; u <= t; ++u) sum += inc_[3 * static_cast<size_t>(u) + k];
+            inc[k] = static_cast<int>(std::nearbyint(sum / w));
+        }
+        for (int u = t + 1; u <= p_.T; ++u) write(u, c, inc[0], inc[1], inc[2]);
+    }
+
+    void finish(const RunInfo &info) override { out_.finish(info); }
+
+    void save(int t, const AgentStore &a, std::vector<CellCount> Icount, const std::vector<int> &order,
+              const std::array<int,4> &c, const std::string &gen_state) {
+        Snapshot s{p_, engine_, rng_, t, gen_state, a, std::move(Icount), order, c,
+                   std::vector<int32_t>(counts_.begin(), counts_.begin() + 4 * (t + 1)),
+                   std::vector<int32_t>(inc_.begin(), inc_.begin() + 3 * (t + 1))};
+        char name[32];
+        std::snprintf(name, sizeof(name), "day_%06d.ckpt", t);
+        save_snapshot((std::filesystem::path(opt_.dir) / name).string(), s);
+    }
+
+private:
+    DailySink &out_;
+    Params p_;
+    Checkpointing opt_;
+    std::string engine_, rng_;
+    std::vector<int32_t> counts_, inc_;
+};
+
+// Reprise : l'instantané doit venir du même moteur et du même générateur,
+// et sa grille Icount doit correspondre aux agents
+static void check_resume(const Snapshot &s, const Params &p, const std::string &engine,
+                         const std::string &rng, const std::vector<CellCount> &Icount) {
+    if (s.engine != engine || s.rng != rng) {
+        throw std::runtime_error("instantané du moteur " + s.engine + " (" + s.rng +
+                                 "), reprise demandée avec " + engine + " (" + rng + ")");
+    }
+    if (s.p.N != p.N || s.p.L != p.L) {
+        throw std::runtime_error("instantané de dimensions différentes (N, L)");
+    }
+    if (s.day > p.T) {
+        throw std::runtime_error("instantané au jour " + std::to_string(s.day) + " > T");
+    }
+    if (s.Icount != Icount) {
+        throw std::runtime_error("instantané incohérent : Icount ne correspond pas aux agents");
+    }
+}
+
+// Après le jour t (< T) : extinction ou régime stationnaire, jours t+1..T
+// remplis ; renvoie true si la simulation s'arrête
+static bool stop_early(int t, const Params &p, const AgentStore &a, const std::array<int,4> &c,
+                       const EarlyStop &stop, CheckpointSink &sink, RunInfo &info) {
+    if (stop.extinction && c[EXP] == 0 && c[INF] == 0) {
+        std::vector<int> drain;
+        drain.reserve(c[REM]);
+        for (int i = 0; i < p.N; ++i) {
+            if (a.state(i) == REM) drain.push_back(std::max(1, a.kR[i] - (a.packed[i] >> TIME_SHIFT)));
+        }
+        sink.fill_extinct(t, c, drain);
+        info.extinct_day = info.days_simulated = t;
+        return true;
+    }
+    if (stop.steady_tol > 0 && sink.steady(t, stop.steady_window, stop.steady_tol)) {
+        sink.fill_steady(t, stop.steady_window);
+        info.steady_day = info.days_simulated = t;
+        return true;
+    }
+    return false;
+}
+
+static std::string gen_state(const std::mt19937 &gen) {
+    std::ostringstream os;
+    os << gen;
+    return os.str();
+}
+
+// Effectifs S,E,I,R tenus à jour à chaque transition (plus de recomptage
+// quotidien), incidence du jour en option (--incidence) et vérification par
+// comptage complet en mode debug (--check). Grid : InfectiousGrid ou
+// SparseInfectiousGrid (voir run_one_sim).
+template <class Grid>
+static void run_one_sim_grid(const Params &p, DailySink &out, Profile *prof, bool check, bool philox,
+                             const Checkpointing &ckpt, const EarlyStop &stop) {
+    std::mt19937 gen(p.seed);
+    std::uniform_real_distribution<double> U01(0.0, 1.0);
+    std::uniform_int_distribution<int> Upos(0, p.L - 1);
+
+    const Snapshot *rs = ckpt.resume;
+    AgentStore a = rs ? rs->a : philox ? init_agents_philox(p) : init_agents(p, gen);
+    if (rs && !rs->gen_state.empty()) {
+        std::istringstream is(rs->gen_state);
+        is >> gen;
+    }
+    PhiloxDraws px(p.seed, philox ? p.N : 0, p.L);
+
+    // grille de comptage infectieux
+    Grid grid(p.L);
+    for (int i = 0; i < p.N; ++i) {
+        if (a.state(i) == INF) {
+            grid.add(static_cast<int>(a.cell[i] / p.L), static_cast<int>(a.cell[i] % p.L), +1);
+        }
+    }
+    const std::vector<double> prob = infection_prob_table(p.inf_force, p.N);
+    const int K = static_cast<int>(prob.size()) - 1;
+    const std::string rng_kind = philox ? "philox" : "native";
+    if (rs) check_resume(*rs, p, "cpp", rng_kind, grid.occupied());
+
+    // ordre aléatoire
+    std::vector<int> order(p.N);
+    std::iota(order.begin(), order.end(), 0);
+    if (rs) order = rs->order;
+
+    // tirages (chronométrés et comptés si --profile)
+    auto draw_pos = [&]() {
+        if (!prof) return philox ? px.pos() : Upos(gen);
+        auto t0 = Profile::clock::now();
+        int v = philox ? px.pos() : Upos(gen);
+        prof->add(Profile::RNG, t0);
+        prof->rng_calls++;
+        prof->rng_draws++;
+        return v;
+    };
+    auto draw_u = [&]() {
+        if (!prof) return philox ? px.u() : U01(gen);
+        auto t0 = Profile::clock::now();
+        double v = philox ? px.u() : U01(gen);
+        prof->add(Profile::RNG, t0);
+        prof->rng_calls++;
+        prof->rng_draws++;
+        return v;
+    };
+
+    std::array<int,4> c = rs ? rs->c : count_states(a);
+    int new_inf = 0, new_rec = 0, reinf = 0;  // incidence du jour
+
+    CheckpointSink sink(out, p, ckpt, "cpp", rng_kind);
+    RunInfo info;
+    info.days_simulated = p.T;
+    const int t_start = sink.start(c);
+    bool stopped = t_start <= p.T && stop_early(t_start - 1, p, a, c, stop, sink, info);
+    for (int t = t_start; t <= p.T && !stopped; ++t) {
+        new_inf = new_rec = reinf = 0;
+        auto t_day = Profile::clock::now();
+        auto shuffle = [&]() {
+            if (philox) px.day(t, order);
+            else std::shuffle(order.begin(), order.end(), gen);
+        };
+        if (prof) {
+            shuffle();
+            prof->add(Profile::RNG, t_day);
+            prof->rng_calls++;
+            prof->rng_draws += philox ? p.N : p.N - 1;
+        } else {
+            shuffle();
+        }
 
         for (int ii = 0; ii < p.N; ++ii) {
             int i = order[ii];
+            Profile::Mark mark;
+            if (prof) mark = prof->mark();
+            if (philox) px.select(i);
 
-            int oldx = x[i], oldy = y[i];
-            int nx = Upos(gen);
-            int ny = Upos(gen);
+            const int oldx = static_cast<int>(a.cell[i] / p.L);
+            const int oldy = static_cast<int>(a.cell[i] % p.L);
+            int nx = draw_pos();
+            int ny = draw_pos();
             if (nx == oldx && ny == oldy) { // "autre cellule" (1 tentative)
-                nx = Upos(gen);
-                ny = Upos(gen);
+                nx = draw_pos();
+                ny = draw_pos();
             }
 
+            int st = a.packed[i] & STATE_MASK;
+
             // mise à jour Icount si infectieux et déplacement
-            if (state[i] == INF && (nx != oldx || ny != oldy)) {
-                Icount[idx2d(oldx, oldy, p.L)]--;
-                Icount[idx2d(nx, ny, p.L)]++;
+            if (st == INF && (nx != oldx || ny != oldy)) {
+                grid.add(oldx, oldy, -1);
+                grid.add(nx, ny, +1);
             }
 
-            x[i] = static_cast<int16_t>(nx);
-            y[i] = static_cast<int16_t>(ny);
-
-            // temps discret (1 jour)
-            t_in_state[i]++;
+            a.cell[i] = idx2d(nx, ny, p.L);
+            if (prof) mark = prof->lap(Profile::MOVE, mark);
 
-            int st = state[i];
+            // temps discret (1 jour), saturé
+            int tis = std::min((a.packed[i] >> TIME_SHIFT) + 1, TIME_MAX);
 
             if (st == SUS) {
-                int NI = neighborhood_I(Icount, nx, ny, p.L);
+                int NI;
+                if (prof) {
+                    auto t0 = Profile::clock::now();
+                    NI = grid.ni(nx, ny);
+                    prof->add(Profile::NEIGHBORHOOD, t0);
+                    prof->neighborhood_evals++;
+                } else {
+                    NI = grid.ni(nx, ny);
+                }
                 if (NI > 0) {
-                    double prob = 1.0 - std::exp(-p.inf_force * static_cast<double>(NI));
-                    if (U01(gen) < prob) {
-                        state[i] = EXP;
-                        t_in_state[i] = 0;
+                    if (draw_u() < prob[std::min(NI, K)]) {
+                        st = EXP;
+                        tis = 0;
+                        c[SUS]--; c[EXP]++;
+                        new_inf++;
+                        reinf += a.recovered[i];
+                        if (prof) prof->transitions[0]++;
                     }
                 }
             } else if (st == EXP) {
-                if (static_cast<double>(t_in_state[i]) > dE[i]) {
-                    state[i] = INF;
-                    t_in_state[i] = 0;
-                    Icount[idx2d(nx, ny, p.L)]++; // devient infectieux
+                if (tis >= a.kE[i]) {
+                    st = INF;
+                    tis = 0;
+                    grid.add(nx, ny, +1); // devient infectieux
+                    c[EXP]--; c[INF]++;
+                    if (prof) prof->transitions[1]++;
                 }
             } else if (st == INF) {
-                if (static_cast<double>(t_in_state[i]) > dI[i]) {
-                    state[i] = REM;
-                    t_in_state[i] = 0;
-                    Icount[idx2d(nx, ny, p.L)]--; // quitte infectieux
+                if (tis >= a.kI[i]) {
+                    st = REM;
+                    tis = 0;
+                    grid.add(nx, ny, -1); // quitte infectieux
+                    c[INF]--; c[REM]++;
+                    new_rec++;
+                    if (prof) prof->transitions[2]++;
                 }
             } else if (st == REM) {
-                if (static_cast<double>(t_in_state[i]) > dR[i]) {
-                    state[i] = SUS;
-                    t_in_state[i] = 0;
+                if (tis >= a.kR[i]) {
+                    st = SUS;
+                    tis = 0;
+                    a.recovered[i] = 1;
+                    c[REM]--; c[SUS]++;
+                    if (prof) prof->transitions[3]++;
+                }
+            }
+            a.packed[i] = static_cast<uint16_t>(st | (tis << TIME_SHIFT));
+            if (prof) prof->lap(Profile::TRANSITION, mark);
+        }
+
+        if (prof) {
+            auto t0 = Profile::clock::now();
+            sink.write(t, c, new_inf, new_rec, reinf);
+            prof->add(Profile::COUNT, t0);
+            prof->day_wall.push_back(Profile::since(t_day));
+        } else {
+            sink.write(t, c, new_inf, new_rec, reinf);
+        }
+        if (check) check_day(t, c, a, grid.consistent());
+        if (sink.due(t)) sink.save(t, a, grid.occupied(), order, c, philox ? "" : gen_state(gen));
+        if (t < p.T) stopped = stop_early(t, p, a, c, stop, sink, info);
+    }
+    sink.finish(info);
+}
+
+// Moteur série ; grid (GridKind) : grilles denses, creuses, ou choix selon
+// la densité L² / N (mêmes trajectoires)
+static void run_one_sim(const Params &p, DailySink &out, Profile *prof = nullptr,
+                        bool check = false, bool philox = false, const Checkpointing &ckpt = {},
+                        const EarlyStop &stop = {}, int grid = GRID_AUTO) {
+    if (sparse_grid(p, grid)) {
+        run_one_sim_grid<SparseInfectiousGrid>(p, out, prof, check, philox, ckpt, stop);
+    } else {
+        run_one_sim_grid<InfectiousGrid>(p, out, prof, check, philox, ckpt, stop);
+    }
+}
+
+// Moteur multithread (--threads P, --substeps B), OpenMP.
+//
+// Les agents sont découpés en tuiles de TILE indices consécutifs ; chaque
+// tuile a son propre flux Philox (clé = (graine, tuile), sous-flux = jour) :
+// les tirages ne dépendent que de la tuile et du jour, pas du thread qui la
+// traite. La population initiale est celle du moteur série (même graine).
+//
+// Relâchement de l'asynchronisme, une journée = B sous-pas :
+//   0) chaque tuile mélange l'ordre de ses agents et le coupe en B parts ;
+//   1) sous-pas b : la part b de chaque tuile est traitée en parallèle
+//      (déplacement, temps dans l'état, transitions) ; N_I est lu dans la
+//      grille telle qu'au début du sous-pas, et les variations de Icount
+//      (déplacements et transitions des infectieux) sont mises en attente
+//      dans un tampon par tuile ;
+//   2) barrière, puis les tampons sont appliqués à la grille (additions
+//      atomiques) : le sous-pas suivant voit tout ce qui précède.
+// Environ N / B agents sont donc mis à jour « simultanément » (comme un
+// sous-lot du moteur Python vectorized) ; la loi se rapproche de celle du
+// moteur série quand B grandit. Les trajectoires ne
+// dépendent ni du nombre de threads ni de l'ordonnancement : à graine et B
+// égaux, elles sont identiques pour tout P. L'équivalence statistique avec
+// le moteur série est vérifiée par check_cpp_threads_part2.py.
+static constexpr int TILE = 4096;
+// grilles denses uniquement ; variations codées cellule * 2 (+ 1) sur 31 bits
+static constexpr int MT_L_MAX = 32767;
+
+static void run_one_sim_mt(const Params &p, DailySink &out, int threads, int substeps,
+                           bool check = false, const Checkpointing &ckpt = {},
+                           const EarlyStop &stop = {}) {
+#ifdef _OPENMP
+    if (threads > 0) omp_set_num_threads(threads);
+#else
+    if (threads > 1) {
+        std::cerr << "Attention : compilé sans OpenMP (-fopenmp), exécution sur un seul thread\n";
+    }
+#endif
+    if (p.L > MT_L_MAX) {
+        throw std::invalid_argument("--threads : L doit être <= " + std::to_string(MT_L_MAX));
+    }
+    const Snapshot *rs = ckpt.resume;
+    std::mt19937 gen(p.seed);
+    AgentStore a = rs ? rs->a : init_agents(p, gen);
+
+    SharedInfectiousGrid grid(p.L);
+    for (int i = 0; i < p.N; ++i) {
+        if (a.state(i) == INF) {
+            grid.add(static_cast<int>(a.cell[i] / p.L), static_cast<int>(a.cell[i] % p.L), +1);
+        }
+    }
+    const std::vector<double> prob = infection_prob_table(p.inf_force, p.N);
+    const int K = static_cast<int>(prob.size()) - 1;
+    if (rs) check_resume(*rs, p, "cpp-mt", "native", grid.occupied());
+
+    // tuiles : ordre local, flux aléatoire, tampon de variations de Icount
+    // (cellule * 2 + 1 pour +1, cellule * 2 pour -1), compteurs du jour
+    struct Tile {
+        int lo, hi;
+        philox_stream rng;
+        std::vector<int32_t> delta;
+        int dS, dE, dI, dR, new_inf, new_rec, reinf;
+    };
+    const int n_tiles = (p.N + TILE - 1) / TILE;
+    std::vector<Tile> tiles(n_tiles);
+    for (int j = 0; j < n_tiles; ++j) {
+        tiles[j].lo = j * TILE;
+        tiles[j].hi = std::min(p.N, (j + 1) * TILE);
+    }
+    std::vector<int> order(p.N);
+    std::iota(order.begin(), order.end(), 0);
+    if (rs) order = rs->order;
+
+    std::array<int,4> c = rs ? rs->c : count_states(a);
+    CheckpointSink sink(out, p, ckpt, "cpp-mt", "native");
+    RunInfo info;
+    info.days_simulated = p.T;
+    const int t_start = sink.start(c);
+    bool stopped = t_start <= p.T && stop_early(t_start - 1, p, a, c, stop, sink, info);
+
+    const uint32_t L = static_cast<uint32_t>(p.L);
+    for (int t = t_start; t <= p.T && !stopped; ++t) {
+        // 0) flux du jour et ordre aléatoire dans chaque tuile
+#pragma omp parallel for schedule(static)
+        for (int j = 0; j < n_tiles; ++j) {
+            Tile &tl = tiles[j];
+            philox_init(&tl.rng, p.seed, static_cast<uint32_t>(j), static_cast<uint32_t>(t));
+            for (int k = tl.hi - tl.lo - 1; k > 0; --k) {
+                int r = static_cast<int>(philox_bounded(&tl.rng, static_cast<uint32_t>(k + 1)));
+                std::swap(order[tl.lo + k], order[tl.lo + r]);
+            }
+            tl.dS = tl.dE = tl.dI = tl.dR = tl.new_inf = tl.new_rec = tl.reinf = 0;
+        }
+
+        for (int b = 0; b < substeps; ++b) {
+            // 1) part b de chaque tuile, grille figée
+#pragma omp parallel for schedule(dynamic)
+            for (int j = 0; j < n_tiles; ++j) {
+                Tile &tl = tiles[j];
+                const int n = tl.hi - tl.lo;
+                const int from = tl.lo + static_cast<int>(static_cast<long long>(n) * b / substeps);
+                const int to = tl.lo + static_cast<int>(static_cast<long long>(n) * (b + 1) / substeps);
+                tl.delta.clear();
+                for (int ii = from; ii < to; ++ii) {
+                    const int i = order[ii];
+                    const Cell oldc = a.cell[i];
+                    Cell nc = philox_bounded(&tl.rng, L) * L + philox_bounded(&tl.rng, L);
+                    if (nc == oldc) {  // "autre cellule" (1 tentative)
+                        nc = philox_bounded(&tl.rng, L) * L + philox_bounded(&tl.rng, L);
+                    }
+                    int st = a.packed[i] & STATE_MASK;
+                    if (st == INF && nc != oldc) {
+                        tl.delta.push_back(static_cast<int32_t>(oldc * 2));
+                        tl.delta.push_back(static_cast<int32_t>(nc * 2 + 1));
+                    }
+                    a.cell[i] = nc;
+
+                    int tis = std::min((a.packed[i] >> TIME_SHIFT) + 1, TIME_MAX);
+                    if (st == SUS) {
+                        const int NI = grid.ni(nc / L, nc % L);
+                        if (NI > 0 && philox_uniform(&tl.rng) < prob[std::min(NI, K)]) {
+                            st = EXP;
+                            tis = 0;
+                            tl.dS--; tl.dE++;
+                            tl.new_inf++;
+                            tl.reinf += a.recovered[i];
+                        }
+                    } else if (st == EXP) {
+                        if (tis >= a.kE[i]) {
+                            st = INF;
+                            tis = 0;
+                            tl.delta.push_back(static_cast<int32_t>(nc * 2 + 1));
+                            tl.dE--; tl.dI++;
+                        }
+                    } else if (st == INF) {
+                        if (tis >= a.kI[i]) {
+                            st = REM;
+                            tis = 0;
+                            tl.delta.push_back(static_cast<int32_t>(nc * 2));
+                            tl.dI--; tl.dR++;
+                            tl.new_rec++;
+                        }
+                    } else {
+                        if (tis >= a.kR[i]) {
+                            st = SUS;
+                            tis = 0;
+                            a.recovered[i] = 1;
+                            tl.dR--; tl.dS++;
+                        }
+                    }
+                    a.packed[i] = static_cast<uint16_t>(st | (tis << TIME_SHIFT));
+                }
+            }
+
+            // 2) variations de Icount du sous-pas (barrière implicite avant)
+#pragma omp parallel for schedule(dynamic)
+            for (int j = 0; j < n_tiles; ++j) {
+                for (int32_t code : tiles[j].delta) {
+                    const int cell = code >> 1;
+                    grid.add(cell / p.L, cell % p.L, (code & 1) ? +1 : -1);
                 }
             }
         }
 
-        auto c = count_states();
-        f << t << "," << c[0] << "," << c[1] << "," << c[2] << "," << c[3] << "\n";
+        int new_inf = 0, new_rec = 0, reinf = 0;
+        for (const Tile &tl : tiles) {
+            c[SUS] += tl.dS; c[EXP] += tl.dE; c[INF] += tl.dI; c[REM] += tl.dR;
+            new_inf += tl.new_inf; new_rec += tl.new_rec; reinf += tl.reinf;
+        }
+        sink.write(t, c, new_inf, new_rec, reinf);
+        if (check) check_day(t, c, a, grid.consistent());
+        if (sink.due(t)) sink.save(t, a, grid.occupied(), order, c, "");
+        if (t < p.T) stopped = stop_early(t, p, a, c, stop, sink, info);
     }
+    sink.finish(info);
+}
 
-    f.close();
+// Point d'entrée de la bibliothèque partagée (-shared -fPIC -DSEIRS_LIBRARY),
+// chargée par ma_seirs_cpp.py : `counts` ((T+1) x 4) et `incidence`
+// ((T+1) x 3, ou nullptr) sont remplis sur place. threads = 0 : moteur série ;
+// philox != 0 : tirages indexés (moteur série uniquement) ; stop (nullptr :
+// valeurs par défaut) : arrêt anticipé, dont le résultat est écrit dans
+// info (extinct_day, steady_day, days_simulated ; ou nullptr) ; grid : GridKind
+// (moteur série). Renvoie 0, ou 1 avec le message d'erreur copié dans err.
+extern "C" int seirs_run(const Params *p, int threads, int substeps, int check, int philox,
+                         const EarlyStop *stop, int grid, int32_t *counts, int32_t *incidence,
+                         int32_t *info, char *err, size_t err_len) {
+    try {
+        if (substeps < 1) {
+            throw std::invalid_argument("substeps doit être >= 1");
+        }
+        if (threads > 0 && philox) {
+            throw std::invalid_argument("--rng philox : moteur série uniquement");
+        }
+        if (threads > 0 && grid == GRID_SPARSE) {
+            throw std::invalid_argument("--grid sparse : moteur série uniquement");
+        }
+        BufferSink sink(counts, incidence, info);
+        const EarlyStop early = stop ? *stop : EarlyStop{};
+        if (threads > 0) {
+            run_one_sim_mt(*p, sink, threads, substeps, check != 0, {}, early);
+        } else {
+            run_one_sim(*p, sink, nullptr, check != 0, philox != 0, {}, early, grid);
+        }
+        return 0;
+    } catch (const std::exception &e) {
+        if (err_len > 0) {
+            std::strncpy(err, e.what(), err_len - 1);
+            err[err_len - 1] = '\0';
+        }
+        return 1;
+    }
 }
 
+#ifndef SEIRS_LIBRARY
 int main(int argc, char **argv) {
     Params p;
     std::string out = "data/part2_multi_agent/cpp_rep01.csv";
+    std::string profile_out;
+    std::string incidence_out;
+    bool profile = false;
+    bool check = false;
+    int threads = 0;
+    int substeps = 100;
+    std::string rng = "native";
+    std::string grid = "auto";
+    Checkpointing ckpt;
+    ckpt.dir = "data/part2_multi_agent/checkpoints";
+    std::string resume;
+    std::optional<uint32_t> fork_seed;
+    std::optional<int> T;
+    std::optional<double> inf_force;
+    EarlyStop stop;
 
-    // Arguments simples : --seed <int> --out <path> --T <int>
+    // Arguments simples : --seed <int> --out <path> --T <int> --N <int> --L <int>
+    //                     --profile [<rapport.json>] --incidence <path> --check
+    //                     --threads <int> --substeps <int> --rng native|philox
+    //                     --inf-force <float> --checkpoint-every <int> --checkpoint-dir <path>
+    //                     --resume <instantané> --fork-seed <int>
+    //                     --no-early-stop --steady-tol <float> --steady-window <int>
+    //                     --grid auto|dense|sparse
     for (int i = 1; i < argc; ++i) {
         std::string a = argv[i];
         if (a == "--seed" && i + 1 < argc) {
@@ -212,17 +1425,130 @@ int main(int argc, char **argv) {
         } else if (a == "--out" && i + 1 < argc) {
             out = argv[++i];
         } else if (a == "--T" && i + 1 < argc) {
-            p.T = std::stoi(argv[++i]);
+            T = std::stoi(argv[++i]);
+        } else if (a == "--N" && i + 1 < argc) {
+            p.N = std::stoi(argv[++i]);
+        } else if (a == "--L" && i + 1 < argc) {
+            p.L = std::stoi(argv[++i]);
+        } else if (a == "--profile") {
+            profile = true;
+            if (i + 1 < argc && argv[i + 1][0] != '-') profile_out = argv[++i];
+        } else if (a == "--incidence" && i + 1 < argc) {
+            incidence_out = argv[++i];
+        } else if (a == "--check") {
+            check = true;
+        } else if (a == "--threads" && i + 1 < argc) {
+            threads = std::stoi(argv[++i]);
+        } else if (a == "--substeps" && i + 1 < argc) {
+            substeps = std::stoi(argv[++i]);
+        } else if (a == "--rng" && i + 1 < argc) {
+            rng = argv[++i];
+        } else if (a == "--inf-force" && i + 1 < argc) {
+            inf_force = std::stod(argv[++i]);
+        } else if (a == "--checkpoint-every" && i + 1 < argc) {
+            ckpt.every = std::stoi(argv[++i]);
+        } else if (a == "--checkpoint-dir" && i + 1 < argc) {
+            ckpt.dir = argv[++i];
+        } else if (a == "--resume" && i + 1 < argc) {
+            resume = argv[++i];
+        } else if (a == "--fork-seed" && i + 1 < argc) {
+            fork_seed = static_cast<uint32_t>(std::stoul(argv[++i]));
+        } else if (a == "--no-early-stop") {
+            stop.extinction = 0;
+        } else if (a == "--steady-tol" && i + 1 < argc) {
+            stop.steady_tol = std::stod(argv[++i]);
+        } else if (a == "--steady-window" && i + 1 < argc) {
+            stop.steady_window = std::stoi(argv[++i]);
+        } else if (a == "--grid" && i + 1 < argc) {
+            grid = argv[++i];
         } else {
             std::cerr << "Option inconnue: " << a << "\n";
-            std::cerr << "Usage: " << argv[0] << " [--seed N] [--out path] [--T N]\n";
+            std::cerr << "Usage: " << argv[0]
+                      << " [--seed N] [--out path] [--T N] [--N N] [--L N]"
+                      << " [--profile [rapport.json]] [--incidence path] [--check]"
+                      << " [--threads P] [--substeps B] [--rng native|philox] [--inf-force F]"
+                      << " [--checkpoint-every K] [--checkpoint-dir D] [--resume F] [--fork-seed S]"
+                      << " [--no-early-stop] [--steady-tol X] [--steady-window W]"
+                      << " [--grid auto|dense|sparse]\n";
             return 1;
         }
     }
+    if (threads > 0 && profile) {
+        std::cerr << "Erreur: --profile n'est disponible qu'avec le moteur série (sans --threads)\n";
+        return 1;
+    }
+    if (substeps < 1) {
+        std::cerr << "Erreur: --substeps doit être >= 1\n";
+        return 1;
+    }
+    if (rng != "native" && rng != "philox") {
+        std::cerr << "Erreur: --rng attend native ou philox\n";
+        return 1;
+    }
+    if (threads > 0 && rng == "philox") {
+        std::cerr << "Erreur: --rng philox n'est disponible qu'avec le moteur série\n";
+        return 1;
+    }
+    if (stop.steady_window < 1) {
+        std::cerr << "Erreur: --steady-window doit être >= 1\n";
+        return 1;
+    }
+    if (grid != "auto" && grid != "dense" && grid != "sparse") {
+        std::cerr << "Erreur: --grid attend auto, dense ou sparse\n";
+        return 1;
+    }
+    if (threads > 0 && grid == "sparse") {
+        std::cerr << "Erreur: --grid sparse n'est disponible qu'avec le moteur série\n";
+        return 1;
+    }
+    if (fork_seed && resume.empty()) {
+        std::cerr << "Erreur: --fork-seed s'utilise avec --resume\n";
+        return 1;
+    }
+    p.init_S = p.N - p.init_E - p.init_I - p.init_R;
 
     try {
-        run_one_sim(p, out);
+        // reprise : paramètres de l'instantané, sauf --T, --inf-force et --fork-seed
+        Snapshot snap;
+        if (!resume.empty()) {
+            snap = load_snapshot(resume);
+            p = snap.p;
+            if (fork_seed) {
+                p.seed = *fork_seed;
+                snap.gen_state.clear();  // générateur réinitialisé avec la nouvelle graine
+            }
+            ckpt.resume = &snap;
+        }
+        if (T) p.T = *T;
+        if (inf_force) p.inf_force = *inf_force;
+
+        Profile prof;
+        FileSink sink(out, p, threads > 0 ? "cpp-mt" : "cpp", incidence_out, rng);
+        if (threads > 0) {
+            run_one_sim_mt(p, sink, threads, substeps, check, ckpt, stop);
+        } else {
+            const int grid_kind = grid == "dense" ? GRID_DENSE : grid == "sparse" ? GRID_SPARSE : GRID_AUTO;
+            run_one_sim(p, sink, profile ? &prof : nullptr, check, rng == "philox", ckpt, stop, grid_kind);
+        }
+        if (sink.info().extinct_day >= 0) {
+            std::cout << "Extinction au jour " << sink.info().extinct_day
+                      << " : jours suivants remplis sans simulation\n";
+        }
+        if (sink.info().steady_day >= 0) {
+            std::cout << "Régime stationnaire au jour " << sink.info().steady_day
+                      << " : jours suivants = moyenne des " << stop.steady_window << " derniers jours\n";
+        }
         std::cout << "Terminé -> " << out << "\n";
+        if (!incidence_out.empty()) {
+            std::cout << "OK -> " << incidence_out << "\n";
+        }
+        if (profile) {
+            prof.print(std::cout, p);
+            if (!profile_out.empty()) {
+                prof.write_json(profile_out, p);
+                std::cout << "OK -> " << profile_out << "\n";
+            }
+        }
     } catch (const std::exception &e) {
         std::cerr << "Erreur: " << e.what() << "\n";
         return 1;
@@ -230,3 +1556,4 @@ int main(int argc, char **argv) {
 
     return 0;
 }
+#endif
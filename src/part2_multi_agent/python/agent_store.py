@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Stockage compact des agents (structure de tableaux)
+
+Utilisé par les moteurs compilés (numba, event) pour les grandes
+populations. Par agent :
+- packed    uint16 : état (2 bits de poids faible) + temps passé dans l'état
+                     (14 bits, saturé à TIME_MAX) ;
+- kE, kI, kR uint16 : seuils entiers de sortie d'état. La règle du sujet
+                     « transition quand t_in_state > d » équivaut, pour un
+                     temps entier, à t_in_state >= floor(d) + 1 = k ;
+- cell      uint32 : cellule x * L + y ;
+- recovered bool   : déjà passé par R->S (réinfections).
+Soit 17 octets par agent (avec le tableau d'ordre), contre 36 pour la
+représentation de init_population (float64 pour les durées).
+
+Les tirages sont ceux de init_population, dans le même ordre (les durées
+sont tirées par blocs, sans jamais matérialiser les N float64) : les
+trajectoires sont identiques à celles du moteur loop tant que T < TIME_MAX
+(au-delà, un séjour plus long que TIME_MAX jours se termine à TIME_MAX).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from ma_seirs import SUS, EXP, INF, REM, Params, pos_dtype
+
+STATE_MASK = 0b11
+TIME_SHIFT = 2
+TIME_MAX = (1 << 14) - 1
+
+# Taille des blocs de tirages des durées
+CHUNK = 1 << 20
+
+
+@dataclass
+class AgentStore:
+    packed: np.ndarray      # uint16 : état | temps << TIME_SHIFT
+    kE: np.ndarray          # uint16
+    kI: np.ndarray          # uint16
+    kR: np.ndarray          # uint16
+    cell: np.ndarray        # uint32 : x * L + y
+    recovered: np.ndarray   # bool
+
+    @property
+    def states(self) -> np.ndarray:
+        return (self.packed & STATE_MASK).astype(np.int8)
+
+    @property
+    def t_in_state(self) -> np.ndarray:
+        return (self.packed >> TIME_SHIFT).astype(np.int16)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.packed, self.kE, self.kI, self.kR,
+                                      self.cell, self.recovered))
+
+
+def thresholds(d: np.ndarray) -> np.ndarray:
+    """Seuils k = floor(d) + 1 (t_in_state >= k  <=>  t_in_state > d), saturés à TIME_MAX."""
+    return np.minimum(np.floor(d) + 1, TIME_MAX).astype(np.uint16)
+
+
+def _draw_thresholds(rng: np.random.Generator, mean: float, n: int) -> np.ndarray:
+    """Mêmes tirages que neg_exp appelé n fois, convertis en seuils par blocs."""
+    k = np.empty(n, dtype=np.uint16)
+    for a in range(0, n, CHUNK):
+        u = rng.random(min(CHUNK, n - a))
+        k[a:a + len(u)] = thresholds(-mean * np.log(1.0 - u))
+    return k
+
+
+def init_store(p: Params):
+    """
+    Équivalent compact de ma_seirs.init_population : renvoie
+    (rng, store, Icount) avec exactement les mêmes tirages.
+    """
+    rng = np.random.default_rng(p.seed)
+
+    states = np.empty(p.N, dtype=np.uint16)
+    states[:p.init_S] = SUS
+    states[p.init_S:p.init_S + p.init_E] = EXP
+    states[p.init_S + p.init_E:p.init_S + p.init_E + p.init_I] = INF
+    states[p.init_S + p.init_E + p.init_I:] = REM
+    rng.shuffle(states)
+
+    kE = _draw_thresholds(rng, p.mean_dE, p.N)
+    kI = _draw_thresholds(rng, p.mean_dI, p.N)
+    kR = _draw_thresholds(rng, p.mean_dR, p.N)
+
+    x = rng.integers(0, p.L, size=p.N, dtype=pos_dtype(p.L))
+    y = rng.integers(0, p.L, size=p.N, dtype=pos_dtype(p.L))
+    cell = x.astype(np.uint32) * np.uint32(p.L) + y.astype(np.uint32)
+
+    Icount = np.zeros((p.L, p.L), dtype=np.int16)
+    inf = states == INF
+    np.add.at(Icount, (x[inf], y[inf]), 1)
+
+    store = AgentStore(packed=states, kE=kE, kI=kI, kR=kR, cell=cell,
+                       recovered=np.zeros(p.N, dtype=np.bool_))
+    return rng, store, Icount
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Pipeline d'analyse unique des réplications multi-agent
+
+1) Découverte de toutes les réplications de data/part2_multi_agent, par
+   langage (CSV t,S,E,I,R et lots binaires de trajectories.py).
+2) Chargement incrémental dans un tableau empilé (R, T+1, 4) par langage,
+   conservé dans <out>/cache/ (mémoire-mappé). Chaque source est identifiée
+   par le hash de son contenu : après l'ajout de quelques réplications,
+   seules les nouvelles sont lues. Une source modifiée ou supprimée
+   entraîne la reconstruction du langage concerné.
+3) En une passe sur chaque tableau : moyennes, bandes de quantiles et
+   premiers pics ; puis Kruskal–Wallis entre langages. Les résultats d'un
+   langage sont réutilisés tant que ses sources n'ont pas changé.
+
+Sorties dans <out>/ : <lang>_mean.csv, <lang>_bands.csv, <lang>_peaks.csv,
+kruskal_peaks.csv.
+"""
+
+from pathlib import Path
+import argparse
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+from scipy.stats import kruskal
+
+import trajectories
+from convert_runs_part2 import read_counts_csv
+from extract_peaks_part2 import first_local_peaks
+
+DATA = Path("data/part2_multi_agent")
+CACHE_VERSION = 1
+
+# Sources par langage (CSV historiques + lots binaires du lanceur de réplications)
+GROUPS = {
+    "python": ["python_rep*.csv", "python_reps*.npy"],
+    "cpp": ["cpp_rep*.csv", "cpp_reps*.npy"],
+    "c": ["c_runs/c_rep*.csv", "c_reps*.npy"],
+}
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+COLS = ["S", "E", "I", "R"]
+
+# Taille maximale (octets) d'un bloc de jours lu en une fois
+CHUNK_BYTES = 64 * 2**20
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def discover(data: Path) -> dict:
+    """Renvoie {langage: [fichiers sources triés]}."""
+    found = {}
+    for name, patterns in GROUPS.items():
+        files = set()
+        for pattern in patterns:
+            files.update(f for f in data.glob(pattern) if not f.name.endswith(".done.npy"))
+        found[name] = sorted(files)
+    return found
+
+
+def read_source(path: Path) -> np.ndarray:
+    """Lit une source et renvoie ses réplications sous forme (k, T+1, 4)."""
+    if path.suffix == ".csv":
+        return read_counts_csv(path)[None]
+
+    arr, _ = trajectories.load(path, mmap=False)
+    done = path.with_name(path.stem + ".done.npy")
+    if done.exists():  # lot du lanceur éventuellement incomplet
+        arr = arr[np.load(done)]
+    return arr
+
+
+# =========================
+# Cache des tableaux empilés
+# =========================
+class GroupCache:
+    def __init__(self, cache_dir: Path, name: str):
+        self.array_path = cache_dir / f"{name}.npy"
+        self.index_path = cache_dir / f"{name}.json"
+        self.index = {"version": CACHE_VERSION, "T": None, "sources": [], "results_key": None}
+        if self.index_path.exists() and self.array_path.exists():
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if index.get("version") == CACHE_VERSION:
+                self.index = index
+
+    def save_index(self):
+        self.index_path.write_text(json.dumps(self.index, indent=1), encoding="utf-8")
+
+    def update(self, files: list) -> tuple[np.ndarray, int]:
+        """
+        Met le tableau empilé à jour avec `files`. Renvoie (tableau, nombre
+        de sources lues).
+        """
+        hashes = {str(f): file_hash(f) for f in files}
+        known = {s["path"]: s["hash"] for s in self.index["sources"]}
+
+        if any(hashes.get(path) != h for path, h in known.items()):
+            # source modifiée ou supprimée : on repart de zéro
+            known = {}
+            self.index["sources"] = []
+
+        new_files = [f for f in files if str(f) not in known]
+        if not new_files:
+            if not known:
+                return np.zeros((0, 0, 4), dtype=np.int32), 0
+            return np.load(self.array_path, mmap_mode="r"), 0
+
+        new_runs = [read_source(f) for f in new_files]
+        lengths = {r.shape[1] for r in new_runs}
+        if self.index["sources"]:
+            lengths.add(self.index["T"] + 1)
+        if len(lengths) != 1:
+            raise ValueError(f"Longueurs différentes dans {self.array_path.stem}: {sorted(lengths)}")
+        n_days = lengths.pop()
+
+        n_old = sum(s["rows"] for s in self.index["sources"])
+        n_new = sum(len(r) for r in new_runs)
+        tmp = self.array_path.with_suffix(".tmp.npy")
+        arr = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int32,
+                                        shape=(n_old + n_new, n_days, 4))
+        if n_old:
+            arr[:n_old] = np.load(self.array_path, mmap_mode="r")
+
+        start = n_old
+        for f, runs in zip(new_files, new_runs):
+            arr[start:start + len(runs)] = runs
+            self.index["sources"].append({"path": str(f), "hash": hashes[str(f)],
+                                          "start": start, "rows": len(runs)})
+            start += len(runs)
+        arr.flush()
+        del arr
+        tmp.replace(self.array_path)
+
+        self.index["T"] = n_days - 1
+        self.index["results_key"] = None
+        self.save_index()
+        return np.load(self.array_path, mmap_mode="r"), len(new_files)
+
+    def results_key(self) -> str:
+        h = hashlib.sha1()
+        for s in self.index["sources"]:
+            h.update(s["hash"].encode())
+        return h.hexdigest()
+
+    def rep_names(self) -> list:
+        names = []
+        for s in self.index["sources"]:
+            stem = Path(s["path"]).stem
+            if s["rows"] == 1:
+                names.append(stem)
+            else:
+                names.extend(f"{stem}_{k + 1:02d}" for k in range(s["rows"]))
+        return names
+
+
+# =========================
+# Statistiques en une passe
+# =========================
+def analyze_group(X: np.ndarray, rep_names: list):
+    """
+    Une passe par blocs de jours sur X (R, T+1, 4) : moyennes, quantiles,
+    et extraction de la série I pour les premiers pics.
+    """
+    R, n_days, _ = X.shape
+    mean = np.empty((n_days, 4))
+    bands = np.empty((len(QUANTILES), n_days, 4))
+    I_all = np.empty((R, n_days), dtype=np.int32)
+
+    step = max(1, CHUNK_BYTES // max(1, R * 4 * 8))
+    for a in range(0, n_days, step):
+        b = min(n_days, a + step)
+        block = np.asarray(X[:, a:b, :], dtype=np.float64)
+        mean[a:b] = block.mean(axis=0)
+        bands[:, a:b] = np.quantile(block, QUANTILES, axis=0)
+        I_all[:, a:b] = block[:, :, 2]
+
+    t = np.arange(n_days)
+    mean_df = pd.DataFrame({"t": t, **{f"{c}_mean": mean[:, k] for k, c in enumerate(COLS)}})
+
+    band_cols = {"t": t}
+    for k, c in enumerate(COLS):
+        for qi, q in enumerate(QUANTILES):
+            band_cols[f"{c}_q{int(round(q * 100)):02d}"] = bands[qi, :, k]
+    bands_df = pd.DataFrame(band_cols)
+
+    day_peak, peak_I = first_local_peaks(I_all)
+    peaks_df = pd.DataFrame({"rep": rep_names, "day_peak": day_peak, "peak_I": peak_I})
+
+    return mean_df, bands_df, peaks_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline d'analyse des réplications (Partie 2)")
+    parser.add_argument("--data", type=str, default=str(DATA), help="Dossier des réplications")
+    parser.add_argument("--out", type=str, default=str(DATA / "pipeline"),
+                        help="Dossier des résultats (et du cache)")
+    args = parser.parse_args()
+
+    data = Path(args.data)
+    out = Path(args.out)
+    cache_dir = out / "cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    peaks = {}
+    for name, files in discover(data).items():
+        if not files:
+            continue
+        cache = GroupCache(cache_dir, name)
+        X, n_read = cache.update(files)
+        key = cache.results_key()
+        paths = {kind: out / f"{name}_{kind}.csv" for kind in ("mean", "bands", "peaks")}
+
+        if cache.index["results_key"] == key and all(p.exists() for p in paths.values()):
+            peaks[name] = pd.read_csv(paths["peaks"])
+            print(f"[{name}] {X.shape[0]} réplications, inchangé (cache)")
+            continue
+
+        mean_df, bands_df, peaks_df = analyze_group(X, cache.rep_names())
+        mean_df.to_csv(paths["mean"], index=False)
+        bands_df.to_csv(paths["bands"], index=False)
+        peaks_df.to_csv(paths["peaks"], index=False)
+        cache.index["results_key"] = key
+        cache.save_index()
+        peaks[name] = peaks_df
+        print(f"[{name}] {X.shape[0]} réplications ({n_read} source(s) lue(s)) -> {out}")
+
+    if len(peaks) >= 2:
+        rows = []
+        for metric in ["peak_I", "day_peak"]:
+            H, pval = kruskal(*[df[metric].values for df in peaks.values()])
+            rows.append({"metric": metric, "groups": "+".join(peaks), "H": H, "p_value": pval})
+            print(f"Kruskal–Wallis {metric}: H={H:.6g}, p-value={pval:.6g}")
+        pd.DataFrame(rows).to_csv(out / "kruskal_peaks.csv", index=False)
+        print("OK ->", out / "kruskal_peaks.csv")
+
+
+if __name__ == "__main__":
+    main()
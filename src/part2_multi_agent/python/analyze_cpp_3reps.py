@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 from pathlib import Path
-import pandas as pd
 import matplotlib.pyplot as plt
 
+from convert_runs_part2 import read_counts_csv
+from online_stats import EnsembleStats
+
 DATA_DIR = Path("data/part2_multi_agent")
 FIG_DIR = Path("figures/part2")
 FIG_DIR.mkdir(parents=True, exist_ok=True)
@@ -13,27 +15,15 @@ files = [
     DATA_DIR / "cpp_rep03.csv",
 ]
 
-dfs = []
+# Charger et accumuler réplication par réplication (mémoire O(T))
+stats = None
 for f in files:
-    df = pd.read_csv(f)
-    if list(df.columns) != ["t", "S", "E", "I", "R"]:
-        raise ValueError(f"Colonnes inattendues dans {f}: {list(df.columns)}")
-    dfs.append(df)
-
-merged = dfs[0][["t"]].copy()
-for k, df in enumerate(dfs, start=1):
-    merged[f"S{k}"] = df["S"].values
-    merged[f"E{k}"] = df["E"].values
-    merged[f"I{k}"] = df["I"].values
-    merged[f"R{k}"] = df["R"].values
-
-mean_df = pd.DataFrame({
-    "t": merged["t"],
-    "S_mean": merged[[f"S{k}" for k in range(1, 4)]].mean(axis=1),
-    "E_mean": merged[[f"E{k}" for k in range(1, 4)]].mean(axis=1),
-    "I_mean": merged[[f"I{k}" for k in range(1, 4)]].mean(axis=1),
-    "R_mean": merged[[f"R{k}" for k in range(1, 4)]].mean(axis=1),
-})
+    counts = read_counts_csv(f)
+    if stats is None:
+        stats = EnsembleStats(len(counts))
+    stats.update(counts)
+
+mean_df = stats.to_frame()[["t", "S_mean", "E_mean", "I_mean", "R_mean"]]
 
 out_csv = DATA_DIR / "cpp_mean_3reps.csv"
 mean_df.to_csv(out_csv, index=False)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Vérification du moteur C++ multithread (--threads) contre le moteur série.
+
+Le moteur multithread relâche l'asynchronisme en sous-pas (voir
+ma_seirs.cpp) et n'utilise pas le même flux aléatoire : on compare donc des
+ensembles de R réplications (graines seed, seed+1, ...), comme
+check_engines_part2.py :
+- premier pic (peak_I, day_peak) : test de Kruskal–Wallis ;
+- courbe moyenne I(t) : écart maximal, rapporté à la hauteur du pic moyen.
+On vérifie aussi que les trajectoires ne dépendent pas du nombre de
+threads (même graine, 1 thread et --threads P : sorties identiques).
+
+Le programme est compilé (-O2 -fopenmp) dans build/ si --exe n'est pas
+donné. À lancer depuis la racine du dépôt :
+    python src/part2_multi_agent/python/check_cpp_threads_part2.py --threads 4
+"""
+
+from pathlib import Path
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from scipy.stats import kruskal
+
+from check_engines_part2 import peaks
+import trajectories
+
+ROOT = Path(__file__).resolve().parents[3]
+SOURCE = ROOT / "src/part2_multi_agent/cpp/ma_seirs.cpp"
+
+
+def build(exe: Path) -> Path:
+    exe.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["g++", "-O2", "-std=c++17", "-fopenmp", "-o", str(exe), str(SOURCE)], check=True)
+    return exe
+
+
+def run_cpp(exe: Path, args, seed: int, extra: list, workdir: Path) -> np.ndarray:
+    out = workdir / f"run_{seed}.npy"
+    subprocess.run([str(exe), "--seed", str(seed), "--N", str(args.N), "--L", str(args.L),
+                    "--T", str(args.T), "--out", str(out)] + extra,
+                   check=True, stdout=subprocess.DEVNULL)
+    counts, _ = trajectories.load(out, mmap=False)
+    return counts[0]
+
+
+def run_ensemble(exe: Path, args, extra: list, workdir: Path) -> tuple[np.ndarray, float]:
+    t0 = time.perf_counter()
+    runs = [run_cpp(exe, args, args.seed + k, extra, workdir) for k in range(args.reps)]
+    return np.stack(runs), time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moteur C++ multithread contre moteur série (Partie 2)")
+    parser.add_argument("--exe", type=str, default=None,
+                        help="Exécutable ma_seirs.cpp déjà compilé avec -fopenmp (sinon compilé dans build/)")
+    parser.add_argument("--threads", type=int, default=4, help="Threads du moteur multithread")
+    parser.add_argument("--substeps", type=int, default=100, help="Sous-pas par jour")
+    parser.add_argument("--reps", type=int, default=20, help="Réplications par moteur")
+    parser.add_argument("--seed", type=int, default=1000, help="Graine de la première réplication")
+    parser.add_argument("--N", type=int, default=20000, help="Nombre d'agents")
+    parser.add_argument("--L", type=int, default=300, help="Taille de la grille")
+    parser.add_argument("--T", type=int, default=200, help="Nombre de jours")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Seuil des tests")
+    parser.add_argument("--tol", type=float, default=0.15,
+                        help="Écart max toléré sur I moyen (fraction du pic moyen)")
+    args = parser.parse_args()
+
+    exe = Path(args.exe) if args.exe else build(ROOT / "build/ma_seirs_cpp_mt")
+    mt = ["--threads", str(args.threads), "--substeps", str(args.substeps)]
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+
+        one = run_cpp(exe, args, args.seed, ["--threads", "1", "--substeps", str(args.substeps)], workdir)
+        many = run_cpp(exe, args, args.seed, mt, workdir)
+        same = bool(np.array_equal(one, many))
+        print(f"1 thread / {args.threads} threads : trajectoires identiques : {'oui' if same else 'NON'}")
+        ok &= same
+
+        ref, dt_ref = run_ensemble(exe, args, [], workdir)
+        print(f"[série] {args.reps} réplications en {dt_ref:.2f} s")
+        runs, dt = run_ensemble(exe, args, mt, workdir)
+        print(f"[{args.threads} threads, {args.substeps} sous-pas] {args.reps} réplications en {dt:.2f} s")
+
+    ref_peaks, pk = peaks(ref), peaks(runs)
+    for metric in ["peak_I", "day_peak"]:
+        H, pval = kruskal(ref_peaks[metric].values, pk[metric].values)
+        print(f"  {metric}: {ref_peaks[metric].mean():.2f} vs {pk[metric].mean():.2f} "
+              f"(H={H:.4g}, p-value={pval:.4g})")
+        ok &= bool(pval >= args.alpha)
+
+    ref_I = ref[:, :, 2].mean(axis=0)
+    dev = np.abs(runs[:, :, 2].mean(axis=0) - ref_I).max() / max(ref_I.max(), 1.0)
+    print(f"  écart max I moyen : {dev:.3%} du pic moyen")
+    ok &= bool(dev <= args.tol)
+
+    print("\nOK" if ok else "\nÉCHEC : écart significatif détecté")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
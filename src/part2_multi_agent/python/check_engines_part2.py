@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Vérification d'équivalence statistique entre moteurs du modèle multi-agent.
+
+Pour chaque moteur, on lance R réplications (graines seed, seed+1, ...),
+puis on compare au moteur de référence (le premier de --engines) :
+- premier pic (peak_I, day_peak) : test de Kruskal–Wallis ;
+- courbe moyenne I(t) : écart maximal, rapporté à la hauteur du pic moyen.
+Les moteurs qui reproduisent exactement les tirages de la référence
+(loop et numba) sont en plus comparés trajectoire par trajectoire.
+Les temps affichés servent de mesure de vitesse relative des moteurs.
+
+Par défaut on travaille sur une population réduite (même densité
+agents/cellule que le sujet) pour garder un temps d'exécution raisonnable
+avec le moteur loop.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import kruskal
+
+from extract_peaks_part2 import first_local_peaks
+from ma_seirs import ENGINES, Params, simulate
+
+# Moteurs qui consomment le même flux aléatoire (trajectoires identiques)
+EXACT_GROUP = {"loop", "numba"}
+
+
+def run_engine(engine: str, args) -> tuple[np.ndarray, float]:
+    # Échauffement (compilation JIT éventuelle) hors chronométrage
+    simulate(Params(L=10, N=50, T=1, init_S=45, init_I=5), engine=engine)
+
+    runs = []
+    t0 = time.perf_counter()
+    for k in range(args.reps):
+        p = Params(L=args.L, N=args.N, T=args.T, seed=args.seed + k,
+                   init_S=args.N - args.init_I, init_I=args.init_I)
+        runs.append(simulate(p, engine=engine, n_batches=args.batches))
+    return np.stack(runs), time.perf_counter() - t0
+
+
+def peaks(runs: np.ndarray) -> pd.DataFrame:
+    day_peak, peak_I = first_local_peaks(runs[:, :, 2])
+    return pd.DataFrame({"day_peak": day_peak, "peak_I": peak_I})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Équivalence statistique des moteurs (Partie 2)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=["loop", "vectorized"],
+                        help="Moteurs comparés (le premier sert de référence)")
+    parser.add_argument("--reps", type=int, default=10, help="Réplications par moteur")
+    parser.add_argument("--seed", type=int, default=1000, help="Graine de la première réplication")
+    parser.add_argument("--N", type=int, default=5000, help="Nombre d'agents")
+    parser.add_argument("--L", type=int, default=150, help="Taille de la grille")
+    parser.add_argument("--T", type=int, default=120, help="Nombre de jours")
+    parser.add_argument("--init-I", type=int, default=20, help="Infectieux initiaux")
+    parser.add_argument("--batches", type=int, default=100, help="Sous-lots (moteur vectorized)")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Seuil des tests")
+    parser.add_argument("--tol", type=float, default=0.15,
+                        help="Écart max toléré sur I moyen (fraction du pic moyen)")
+    args = parser.parse_args()
+
+    ref_name = args.engines[0]
+    results = {}
+    for engine in args.engines:
+        runs, dt = run_engine(engine, args)
+        results[engine] = runs
+        print(f"[{engine}] {args.reps} réplications en {dt:.2f} s "
+              f"({dt / args.reps:.3f} s/rép.)")
+
+    ref = results[ref_name]
+    ref_peaks = peaks(ref)
+    ref_I = ref[:, :, 2].mean(axis=0)
+
+    ok = True
+    for engine in args.engines[1:]:
+        runs = results[engine]
+        pk = peaks(runs)
+        print(f"\n=== {engine} vs {ref_name} ===")
+        if {ref_name, engine} <= EXACT_GROUP:
+            same = bool(np.array_equal(runs, ref))
+            print(f"  trajectoires identiques : {'oui' if same else 'NON'}")
+            ok &= same
+        for metric in ["peak_I", "day_peak"]:
+            H, pval = kruskal(ref_peaks[metric].values, pk[metric].values)
+            print(f"  {metric}: {ref_peaks[metric].mean():.2f} vs {pk[metric].mean():.2f} "
+                  f"(H={H:.4g}, p-value={pval:.4g})")
+            ok &= bool(pval >= args.alpha)
+
+        dev = np.abs(runs[:, :, 2].mean(axis=0) - ref_I).max() / max(ref_I.max(), 1.0)
+        print(f"  écart max I moyen : {dev:.3%} du pic moyen")
+        ok &= bool(dev <= args.tol)
+
+    print("\nOK" if ok else "\nÉCHEC : écart significatif détecté")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
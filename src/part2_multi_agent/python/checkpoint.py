@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Points de reprise (checkpoint/restart) du modèle multi-agent
+
+Un instantané (Snapshot) contient l'état complet d'une simulation de
+ma_seirs.simulate au soir du jour t :
+- les agents au format du moteur (tableaux de init_population pour loop et
+  vectorized, AgentStore pour numba et event, plus l'échéancier d'event) ;
+- Icount (dense, ou cellules occupées et effectifs avec les grilles
+  creuses de sparse_grid.py), l'ordre de passage (mélangé en place d'un
+  jour à l'autre) et les compteurs `tally` ;
+- les effectifs et l'incidence des jours 0..t ;
+- l'état du générateur (PCG64 : bit_generator.state ; Philox : la graine
+  seule, les tirages ne dépendent que de (graine, jour, agent)).
+
+Fichier : archive NumPy .npz non compressée dont l'entrée "header" contient
+l'en-tête JSON (paramètres, moteur, générateur, jour). Avec
+simulate(p, checkpoint_every=K, checkpoint=save_to(dossier)), un instantané
+day_<t>.npz est écrit tous les K jours ; simulate(p, resume=snap) repart du
+jour t + 1 et donne exactement la trajectoire d'un lancement d'un seul
+tenant (même moteur, même générateur). Moteur event : si l'horizon T
+s'allonge, les échéances situées au-delà de l'ancien T sont rangées à la
+reprise ; même loi, mais pas exactement la trajectoire d'un lancement
+direct sur le nouvel horizon.
+
+Scénarios depuis un échauffement commun : fork(snap, seed, **changes) donne
+un instantané dont le générateur repart d'une nouvelle graine, avec
+éventuellement un autre horizon T ou une autre force d'infection ; les
+autres paramètres ont servi à tirer la population et ne changent pas.
+En ligne de commande, une série de scénarios depuis un instantané :
+    python src/part2_multi_agent/python/checkpoint.py data/part2_multi_agent/checkpoints/day_000365.npz \\
+        --inf-force 0.5 0.3 --reps 10 --T 1460 --out data/part2_multi_agent/forks.npy
+"""
+
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+import argparse
+import json
+import os
+
+import numpy as np
+
+import trajectories
+from ma_seirs import INF, Params, simulate
+from sparse_grid import count_infectious, icount_from_arrays, same_counts
+
+# Paramètres qui ont servi à tirer la population : identiques à la reprise
+FIXED = ("L", "N", "init_S", "init_E", "init_I", "init_R", "mean_dE", "mean_dI", "mean_dR")
+# Paramètres modifiables par fork
+CHANGEABLE = ("T", "inf_force")
+
+
+@dataclass
+class Snapshot:
+    params: dict        # asdict(Params), graine au format seed_to_json
+    engine: str
+    rng_kind: str
+    day: int
+    rng_state: dict     # None : générateur à réinitialiser avec params["seed"] (fork)
+    arrays: dict        # tableaux nommés (voir ma_seirs.simulate)
+
+    @classmethod
+    def capture(cls, p: Params, engine: str, rng_kind: str, day: int, rng, arrays: dict):
+        """Copie de l'état courant ; `rng` : Generator ou PhiloxGenerator."""
+        params = asdict(p)
+        params["seed"] = trajectories.seed_to_json(p.seed)
+        if rng_kind == "philox":
+            rng_state = {"philox_seed": rng.seed}
+        else:
+            rng_state = rng.bit_generator.state
+        return cls(params, engine, rng_kind, day, rng_state,
+                   {k: np.array(v, copy=True) for k, v in arrays.items()})
+
+    def to_params(self) -> Params:
+        params = dict(self.params)
+        params["seed"] = trajectories.seed_from_json(params["seed"])
+        return Params(**params)
+
+    def save(self, path: Path) -> Path:
+        """Écriture dans <path>.tmp puis renommage (un instantané interrompu n'écrase rien)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {"params": self.params, "engine": self.engine, "rng": self.rng_kind,
+                  "day": self.day, "rng_state": self.rng_state}
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(f, header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+                     **self.arrays)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path):
+        with np.load(path, allow_pickle=False) as z:
+            header = json.loads(z["header"].tobytes().decode("utf-8"))
+            arrays = {k: z[k] for k in z.files if k != "header"}
+        return cls(header["params"], header["engine"], header["rng"], header["day"],
+                   header["rng_state"], arrays)
+
+
+def save_to(directory: Path):
+    """Callback de simulate(checkpoint=...) : instantanés <directory>/day_<t>.npz."""
+    directory = Path(directory)
+
+    def save(snap: Snapshot):
+        snap.save(directory / f"day_{snap.day:06d}.npz")
+
+    return save
+
+
+def fork(snap: Snapshot, seed, **changes) -> Snapshot:
+    """Instantané dont le générateur repart de `seed` (T et inf_force modifiables)."""
+    unknown = set(changes) - set(CHANGEABLE)
+    if unknown:
+        raise ValueError(f"Paramètres non modifiables à la reprise : {sorted(unknown)} "
+                         f"(modifiables : {', '.join(CHANGEABLE)})")
+    params = dict(snap.params, **changes)
+    params["seed"] = trajectories.seed_to_json(seed)
+    return replace(snap, params=params, rng_state=None)
+
+
+def restore(snap: Snapshot, p: Params, engine: str, rng_kind: str):
+    """
+    Générateur et copies des tableaux d'un instantané, pour
+    simulate(resume=snap) ; p doit garder les paramètres FIXED de
+    l'instantané et un horizon p.T >= snap.day.
+    """
+    if (snap.engine, snap.rng_kind) != (engine, rng_kind):
+        raise ValueError(f"Instantané du moteur {snap.engine} ({snap.rng_kind}), "
+                         f"reprise demandée avec {engine} ({rng_kind})")
+    diff = [k for k in FIXED if getattr(p, k) != snap.params[k]]
+    if diff:
+        raise ValueError(f"Paramètres différents de l'instantané : {', '.join(diff)}")
+    if snap.day > p.T:
+        raise ValueError(f"Instantané au jour {snap.day} > T = {p.T}")
+
+    a = {k: v.copy() for k, v in snap.arrays.items()}
+    if "packed" in a:
+        inf = (a["packed"] & 0b11) == INF
+        x, y = np.divmod(a["cell"][inf].astype(np.int64), p.L)
+    else:
+        inf = a["states"] == INF
+        x, y = a["x"][inf], a["y"][inf]
+    sparse = "Icount" not in a
+    if not same_counts(count_infectious(p.L, x, y, sparse), icount_from_arrays(a, p.L, sparse)):
+        raise ValueError("Instantané incohérent : Icount ne correspond pas aux agents")
+
+    if rng_kind == "philox":
+        from philox import PhiloxGenerator
+        seed = p.seed if snap.rng_state is None else snap.rng_state["philox_seed"]
+        rng = PhiloxGenerator(seed, p.L, p.N)
+        rng.day = snap.day
+    else:
+        rng = np.random.default_rng(p.seed)
+        if snap.rng_state is not None:
+            rng.bit_generator.state = snap.rng_state
+    return rng, a
+
+
+def run_from(snap: Snapshot, **kwargs):
+    """simulate() repris depuis un instantané, avec les paramètres de celui-ci."""
+    return simulate(snap.to_params(), engine=snap.engine, rng_kind=snap.rng_kind,
+                    resume=snap, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scénarios lancés depuis un instantané (Partie 2)")
+    parser.add_argument("snapshot", type=str, help="Instantané .npz (ma_seirs.py --checkpoint-every)")
+    parser.add_argument("--inf-force", nargs="+", type=float, default=None,
+                        help="Forces d'infection des scénarios (défaut : celle de l'instantané)")
+    parser.add_argument("--reps", type=int, default=10, help="Réplications par scénario")
+    parser.add_argument("--seed", type=int, default=2024,
+                        help="Graine maîtresse des embranchements (SeedSequence.spawn)")
+    parser.add_argument("--T", type=int, default=None, help="Horizon (défaut : celui de l'instantané)")
+    parser.add_argument("--out", type=str, default="data/part2_multi_agent/forks.npy",
+                        help="Trajectoires (R, T+1, 4) au format de trajectories.py")
+    args = parser.parse_args()
+
+    snap = Snapshot.load(Path(args.snapshot))
+    T = snap.params["T"] if args.T is None else args.T
+    forces = args.inf_force or [snap.params["inf_force"]]
+    children = np.random.SeedSequence(args.seed).spawn(len(forces) * args.reps)
+
+    runs, meta = [], []
+    for k, seed in enumerate(children):
+        branch = fork(snap, seed, T=T, inf_force=forces[k // args.reps])
+        runs.append(run_from(branch))
+        extra = {"rng": snap.rng_kind} if snap.rng_kind != "native" else {}
+        meta.append(trajectories.rep_meta(f"python-{snap.engine}", branch.to_params(),
+                                          source=str(args.snapshot), fork_day=snap.day, **extra))
+        print(f"[{k + 1}/{len(children)}] inf_force={forces[k // args.reps]} "
+              f"S,E,I,R(T) = {tuple(int(v) for v in runs[-1][-1])}")
+
+    out = Path(args.out)
+    trajectories.save(out, np.stack(runs), meta)
+    print("OK ->", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Conversion des CSV t,S,E,I,R de data/part2_multi_agent vers le format
+binaire de trajectories.py (un lot .npy + .json par langage) :
+- python_rep*.csv      -> python_runs.npy
+- cpp_rep*.csv         -> cpp_runs.npy
+- c_runs/c_rep*.csv    -> c_runs.npy
+"""
+
+from pathlib import Path
+import argparse
+import time
+
+import numpy as np
+
+import trajectories
+
+DATA = Path("data/part2_multi_agent")
+
+GROUPS = {
+    "python": "python_rep*.csv",
+    "cpp": "cpp_rep*.csv",
+    "c": "c_runs/c_rep*.csv",
+}
+
+
+def read_counts_csv(path: Path) -> np.ndarray:
+    """Lit un CSV t,S,E,I,R et renvoie les effectifs (T+1, 4) en int32."""
+    with path.open(encoding="utf-8") as f:
+        header = f.readline().strip()
+        if header != "t,S,E,I,R":
+            raise ValueError(f"Colonnes inattendues dans {path}: {header}")
+        arr = np.loadtxt(f, delimiter=",", dtype=np.int64, ndmin=2)
+    if not (arr[:, 0] == np.arange(len(arr))).all():
+        raise ValueError(f"Temps t non aligné dans {path}")
+    return arr[:, 1:].astype(np.int32)
+
+
+def convert_group(name: str, files: list, out: Path):
+    runs = [read_counts_csv(f) for f in files]
+    lengths = {len(r) for r in runs}
+    if len(lengths) != 1:
+        raise ValueError(f"Longueurs différentes dans le groupe {name}: {sorted(lengths)}")
+
+    meta = [trajectories.rep_meta(name, source=str(f)) for f in files]
+    trajectories.save(out, np.stack(runs), meta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversion CSV -> format binaire (Partie 2)")
+    parser.add_argument("--data", type=str, default=str(DATA), help="Dossier des CSV")
+    args = parser.parse_args()
+
+    data = Path(args.data)
+    for name, pattern in GROUPS.items():
+        files = sorted(data.glob(pattern))
+        if not files:
+            print(f"[WARN] aucun fichier pour {name} ({pattern})")
+            continue
+        out = data / f"{name}_runs.npy"
+        convert_group(name, files, out)
+
+        t0 = time.perf_counter()
+        arr, _ = trajectories.load(out)
+        arr.sum()  # force la lecture
+        dt = (time.perf_counter() - t0) * 1000
+        print(f"OK -> {out} {arr.shape} ({len(files)} fichiers, relu en {dt:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Instrumentation des moteurs multi-agent (option --profile)
+
+EngineProfile accumule, pendant une simulation :
+- le temps par phase : rng (tirages, mélange de l'ordre compris), move
+  (déplacement et mise à jour de Icount, hors tirages), neighborhood
+  (calcul de N_I), transition (S->E, E->I, I->R, R->S, hors tirages et
+  N_I), count (relevé des effectifs du jour) ; "other" regroupe le
+  reste (boucles, surcoût de mesure) ;
+- le nombre d'appels au générateur et de valeurs tirées ;
+- le nombre d'évaluations de N_I ;
+- le nombre de transitions de chaque type ;
+- la durée de chaque jour.
+
+Chaque agent est mis à jour une fois par jour et change d'état au plus
+une fois : les transitions sont donc comptées exactement en comparant les
+états avant et après la journée, quel que soit le moteur. Pour les
+moteurs compilés (numba, event), seules les durées par jour (phase unique
+"kernel", chargement du noyau compris le premier jour) et les transitions
+sont disponibles (les autres compteurs valent None).
+
+Les durées incluent le surcoût de la mesure : elles servent à comparer
+les phases entre elles, pas à chronométrer un lancement normal.
+"""
+
+from dataclasses import asdict
+from pathlib import Path
+from time import perf_counter
+import argparse
+import json
+
+import numpy as np
+
+import trajectories
+
+PHASES = ("rng", "move", "neighborhood", "transition", "count")
+TRANSITIONS = ("S->E", "E->I", "I->R", "R->S")
+
+# (ancien état, nouvel état) -> indice dans TRANSITIONS, codé ancien*4 + nouveau
+_TRANSITION_CODES = (0 * 4 + 1, 1 * 4 + 2, 2 * 4 + 3, 3 * 4 + 0)
+
+# Phases mesurées à l'intérieur d'autres phases (retranchées par lap)
+_NESTED = ("rng", "neighborhood")
+
+
+class ProfiledGenerator:
+    """Enveloppe d'un np.random.Generator qui chronomètre et compte les tirages."""
+
+    def __init__(self, rng: np.random.Generator, prof: "EngineProfile"):
+        self._rng = rng
+        self._prof = prof
+
+    def _call(self, fn, n, *args, **kwargs):
+        t0 = perf_counter()
+        out = fn(*args, **kwargs)
+        self._prof.time["rng"] += perf_counter() - t0
+        self._prof.rng_calls += 1
+        self._prof.rng_draws += n
+        return out
+
+    def integers(self, *args, size=None, **kwargs):
+        n = 1 if size is None else int(np.prod(size))
+        return self._call(self._rng.integers, n, *args, size=size, **kwargs)
+
+    def random(self, size=None, **kwargs):
+        n = 1 if size is None else int(np.prod(size))
+        return self._call(self._rng.random, n, size, **kwargs)
+
+    def shuffle(self, x, **kwargs):
+        return self._call(self._rng.shuffle, max(len(x) - 1, 0), x, **kwargs)
+
+
+class EngineProfile:
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.time = dict.fromkeys(PHASES, 0.0)
+        self.rng_calls = 0
+        self.rng_draws = 0
+        self.neighborhood_evals = 0
+        self.transitions = dict.fromkeys(TRANSITIONS, 0)
+        self.day_wall = []
+        self.wall = 0.0
+        self.detailed = engine in ("loop", "vectorized")
+
+    def wrap_rng(self, rng: np.random.Generator) -> ProfiledGenerator:
+        return ProfiledGenerator(rng, self)
+
+    # ---------- chronométrage des phases
+    def mark(self):
+        """Point de départ d'une phase (lap retranche les phases imbriquées)."""
+        return perf_counter(), sum(self.time[k] for k in _NESTED)
+
+    def lap(self, phase: str, mark):
+        t0, nested0 = mark
+        nested = sum(self.time[k] for k in _NESTED) - nested0
+        self.time[phase] += perf_counter() - t0 - nested
+        return self.mark()
+
+    def count_transitions(self, before: np.ndarray, after: np.ndarray):
+        codes = np.bincount(before.astype(np.intp) * 4 + after, minlength=16)
+        for name, code in zip(TRANSITIONS, _TRANSITION_CODES):
+            self.transitions[name] += int(codes[code])
+
+    # ---------- rapport
+    def report(self, p) -> dict:
+        updates = p.N * len(self.day_wall)
+        measured = sum(self.time.values())
+        phases = {k: {"seconds": v, "fraction": v / self.wall if self.wall else 0.0}
+                  for k, v in self.time.items()}
+        phases["other"] = {"seconds": self.wall - measured,
+                           "fraction": (self.wall - measured) / self.wall if self.wall else 0.0}
+        if not self.detailed:  # numba, event : noyau opaque (comptage de fin de jour inclus)
+            phases = {"kernel": {"seconds": self.wall, "fraction": 1.0 if self.wall else 0.0}}
+
+        params = asdict(p)
+        params["seed"] = trajectories.seed_to_json(p.seed)
+        day = np.asarray(self.day_wall)
+        return {
+            "engine": f"python-{self.engine}",
+            "params": params,
+            "wall_s": self.wall,
+            "agent_updates": updates,
+            "agent_updates_per_s": updates / self.wall if self.wall else None,
+            "phases": phases,
+            "counters": {
+                "rng_calls": self.rng_calls if self.detailed else None,
+                "rng_draws": self.rng_draws if self.detailed else None,
+                "neighborhood_evals": self.neighborhood_evals if self.detailed else None,
+            },
+            "transitions": dict(self.transitions),
+            "day_wall_s": {
+                "min": float(day.min()) if len(day) else None,
+                "mean": float(day.mean()) if len(day) else None,
+                "max": float(day.max()) if len(day) else None,
+                "days": day.tolist(),
+            },
+        }
+
+    def save(self, path: Path, p):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(p), indent=1), encoding="utf-8")
+
+
+def format_report(report: dict) -> str:
+    """Résumé texte d'un rapport (Python ou C++)."""
+    lines = [f"=== Profil {report['engine']} : {report['wall_s']:.3f} s, "
+             f"{report['agent_updates_per_s'] or 0:.4g} mises à jour/s ==="]
+    for name, ph in report["phases"].items():
+        lines.append(f"  {name:13s} {ph['seconds']:9.3f} s  {100 * ph['fraction']:5.1f} %")
+    for name, v in report["counters"].items():
+        if v is not None:
+            lines.append(f"  {name:19s} {v}")
+    lines.append("  transitions " + ", ".join(f"{k}: {v}" for k, v in report["transitions"].items()))
+    day = report["day_wall_s"]
+    if day["mean"] is not None:
+        lines.append(f"  jour (s)      min {day['min']:.4f}  moyenne {day['mean']:.4f}  "
+                     f"max {day['max']:.4f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Affiche un rapport --profile (Python ou C++)")
+    parser.add_argument("reports", nargs="+", help="Rapports JSON")
+    args = parser.parse_args()
+
+    for path in args.reports:
+        print(format_report(json.loads(Path(path).read_text(encoding="utf-8"))))
+
+
+if __name__ == "__main__":
+    main()
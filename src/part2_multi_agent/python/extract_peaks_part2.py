@@ -1,9 +1,55 @@
 #!/usr/bin/env python3
 from pathlib import Path
+import argparse
+
+import numpy as np
 import pandas as pd
 
 DATA = Path("data/part2_multi_agent")
 
+def first_local_peaks(I):
+    """
+    Version par lot : I est une matrice (R, T+1), une réplication par ligne.
+    Retourne (day_peak, peak_I), deux vecteurs (R,).
+
+    Même définition que first_local_peak, appliquée à toutes les lignes
+    d'un coup :
+    - premier maximum local : I[t-1] < I[t] >= I[t+1]
+    - sinon (cas rare), argmax global (premier indice en cas d'égalité).
+    """
+    I = np.atleast_2d(np.asarray(I))
+    rows = np.arange(I.shape[0])
+    fallback = I.argmax(axis=1)
+    if I.shape[1] < 3:
+        return fallback, I[rows, fallback]
+
+    is_peak = (I[:, :-2] < I[:, 1:-1]) & (I[:, 1:-1] >= I[:, 2:])
+    day = np.where(is_peak.any(axis=1), is_peak.argmax(axis=1) + 1, fallback)
+    return day, I[rows, day]
+
+def smoothed_first_peaks(I, window: int = 7):
+    """
+    Premier pic de I lissé par moyenne mobile centrée sur `window` jours
+    (fenêtre tronquée aux bords). Retourne (day_peak, peak_smoothed).
+    """
+    I = np.atleast_2d(np.asarray(I, dtype=np.float64))
+    n = I.shape[1]
+    half = window // 2
+    csum = np.concatenate([np.zeros((I.shape[0], 1)), np.cumsum(I, axis=1)], axis=1)
+    lo = np.clip(np.arange(n) - half, 0, n)
+    hi = np.clip(np.arange(n) + window - half, 0, n)
+    smooth = (csum[:, hi] - csum[:, lo]) / (hi - lo)
+    return first_local_peaks(smooth)
+
+def threshold_crossing(I, threshold: float):
+    """
+    Premier jour où I(t) >= threshold, pour chaque ligne de I (R, T+1).
+    Retourne -1 pour les réplications qui n'atteignent jamais le seuil.
+    """
+    I = np.atleast_2d(np.asarray(I))
+    above = I >= threshold
+    return np.where(above.any(axis=1), above.argmax(axis=1), -1)
+
 def first_local_peak(I_series):
     """
     Retourne (day_peak, peak_I) pour le *premier pic* de I(t).
@@ -12,55 +58,55 @@ def first_local_peak(I_series):
     - on cherche le premier maximum local : I[t-1] < I[t] >= I[t+1]
     - si aucun maximum local n'est trouvé (cas rare), on prend argmax global.
     """
-    I = I_series.values
-    n = len(I)
-    # Chercher le premier pic local
-    for t in range(1, n - 1):
-        if I[t-1] < I[t] and I[t] >= I[t+1]:
-            return t, int(I[t])
-    # Fallback : maximum global
-    tmax = int(I.argmax())
-    return tmax, int(I[tmax])
+    day, peak = first_local_peaks(I_series.values[None])
+    return int(day[0]), int(peak[0])
+
+def load_I(files):
+    """Lit la colonne I de plusieurs CSV t,S,E,I,R et renvoie une matrice (R, T+1)."""
+    series = []
+    for f in files:
+        with open(f, encoding="utf-8") as fh:
+            header = fh.readline().strip()
+            if header != "t,S,E,I,R":
+                raise ValueError(f"Colonnes inattendues dans {f}: {header.split(',')}")
+            series.append(np.loadtxt(fh, delimiter=",", usecols=3, dtype=np.int64, ndmin=1))
+    if len({len(s) for s in series}) != 1:
+        raise ValueError("Les réplications n'ont pas toutes la même durée.")
+    return np.stack(series)
+
+def peaks_table(names, I, smooth: int = 0, threshold: float = None):
+    day, peak = first_local_peaks(I)
+    df = pd.DataFrame({"rep": names, "day_peak": day, "peak_I": peak})
+    if smooth:
+        sday, speak = smoothed_first_peaks(I, smooth)
+        df["day_peak_smooth"] = sday
+        df["peak_I_smooth"] = speak
+    if threshold is not None:
+        df["day_threshold"] = threshold_crossing(I, threshold)
+    return df
 
-def process_one(file_csv: Path, rep_name: str):
-    df = pd.read_csv(file_csv)
-    if list(df.columns) != ["t", "S", "E", "I", "R"]:
-        raise ValueError(f"Colonnes inattendues dans {file_csv}: {list(df.columns)}")
-    day_peak, peak_I = first_local_peak(df["I"])
-    return {"rep": rep_name, "day_peak": day_peak, "peak_I": peak_I}
 
 def main():
-    # Python (3 reps)
-    py_files = [
-        ("python_rep01", DATA / "python_rep01.csv"),
-        ("python_rep02", DATA / "python_rep02.csv"),
-        ("python_rep03", DATA / "python_rep03.csv"),
-    ]
-    py_rows = [process_one(f, name) for (name, f) in py_files]
-    pd.DataFrame(py_rows).to_csv(DATA / "python_peaks.csv", index=False)
-    print("OK ->", DATA / "python_peaks.csv")
+    parser = argparse.ArgumentParser(description="Extraction des premiers pics (Partie 2)")
+    parser.add_argument("--smooth", type=int, default=0,
+                        help="Si > 0 : ajoute le premier pic de I lissé sur cette fenêtre (jours)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Si donné : ajoute le premier jour où I >= seuil")
+    args = parser.parse_args()
 
-    # C++ (3 reps)
-    cpp_files = [
-        ("cpp_rep01", DATA / "cpp_rep01.csv"),
-        ("cpp_rep02", DATA / "cpp_rep02.csv"),
-        ("cpp_rep03", DATA / "cpp_rep03.csv"),
+    groups = [
+        ("python", sorted(DATA.glob("python_rep*.csv"))),   # Python (3 reps)
+        ("cpp", sorted(DATA.glob("cpp_rep*.csv"))),         # C++ (3 reps)
+        ("c", sorted((DATA / "c_runs").glob("c_rep*.csv"))),  # C (30 reps) dans c_runs/
     ]
-    cpp_rows = [process_one(f, name) for (name, f) in cpp_files]
-    pd.DataFrame(cpp_rows).to_csv(DATA / "cpp_peaks.csv", index=False)
-    print("OK ->", DATA / "cpp_peaks.csv")
-
-    # C (30 reps) dans c_runs/
-    c_dir = DATA / "c_runs"
-    c_files = sorted(c_dir.glob("c_rep*.csv"))
-    if len(c_files) != 30:
-        raise ValueError(f"Attendu 30 fichiers dans {c_dir}, trouvé {len(c_files)}")
-    c_rows = []
-    for f in c_files:
-        rep = f.stem  # ex: c_rep01
-        c_rows.append(process_one(f, rep))
-    pd.DataFrame(c_rows).to_csv(DATA / "c_peaks.csv", index=False)
-    print("OK ->", DATA / "c_peaks.csv")
+    for name, files in groups:
+        if not files:
+            raise FileNotFoundError(f"Aucune réplication {name} dans {DATA}")
+        names = [f.stem for f in files]  # ex: c_rep01
+        df = peaks_table(names, load_I(files), args.smooth, args.threshold)
+        out = DATA / f"{name}_peaks.csv"
+        df.to_csv(out, index=False)
+        print("OK ->", out)
 
 if __name__ == "__main__":
     main()
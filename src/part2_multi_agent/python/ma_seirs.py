@@ -11,25 +11,48 @@ Partie 2 — Modèle multi-agent SEIRS (CONFORME SUJET)
 - Durées individuelles fixes tirées au début :
     dE ~ Exp(mean=3), dI ~ Exp(mean=7), dR ~ Exp(mean=365)
 - 730 itérations (jours)
-Sortie : CSV t,S,E,I,R
+Sortie : CSV t,S,E,I,R (ou format binaire de trajectories.py si --out finit par .npy)
+
+Moteurs disponibles (--engine) :
+- loop       : boucle agent par agent (référence, sémantique exacte du sujet)
+- vectorized : traitement NumPy par sous-lots de l'ordre aléatoire
+               (approximation documentée dans step_day_vectorized)
+- numba      : noyau compilé de ma_seirs_numba.py, mêmes tirages et mêmes
+               trajectoires que loop (Python pur si Numba est absent)
+- event      : noyau événementiel de ma_seirs_event.py (échéancier des
+               transitions E->I, I->R, R->S ; seuls S, I et les échéances
+               du jour sont visités), même loi que loop
 """
 
 from dataclasses import dataclass
 from pathlib import Path
+from time import perf_counter
 import argparse
 import numpy as np
 
+import trajectories
+from engine_profile import EngineProfile, format_report
+from sparse_grid import (GRIDS, SparseCounts, icount_arrays, icount_from_arrays, new_icount,
+                         same_counts, use_sparse)
+from streaming import BinarySink, CsvSink, DayState, consume
+
 
 # États
 SUS, EXP, INF, REM = 0, 1, 2, 3
 
+# Compteurs tenus à jour à chaque transition (tableau `tally`) :
+# effectifs S,E,I,R (indices SUS..REM) puis incidence du jour en cours
+NEW_INF, NEW_REC, REINF = 4, 5, 6
+N_TALLY = 7
+INCIDENCE_COLS = ["new_infections", "new_recoveries", "reinfections"]
+
 
 @dataclass
 class Params:
     L: int = 300          # grille LxL
     N: int = 20000        # nombre d'individus
     T: int = 730          # itérations (jours)
-    seed: int = 12345     # graine principale
+    seed: int = 12345     # graine principale (entier ou np.random.SeedSequence)
 
     # Initialisation imposée
     init_S: int = 19980
@@ -46,6 +69,11 @@ class Params:
     inf_force: float = 0.5
 
 
+def pos_dtype(L: int):
+    """Coordonnées x, y : int16 tant que L <= 2^15 (tirages inchangés), int32 au-delà."""
+    return np.int16 if L <= 1 << 15 else np.int32
+
+
 # Offsets Moore (8 voisins)
 MOORE = [(-1, -1), (-1, 0), (-1, 1),
          ( 0, -1),          ( 0, 1),
@@ -61,7 +89,8 @@ def neg_exp(rng: np.random.Generator, mean: float) -> float:
     return -mean * np.log(1.0 - u)
 
 
-def init_population(p: Params):
+def init_population(p: Params, sparse: bool = False):
+    """Population initiale ; sparse : Icount creuse (voir sparse_grid.py)."""
     rng = np.random.default_rng(p.seed)
 
     # États init (exact)
@@ -83,11 +112,11 @@ def init_population(p: Params):
     t_in_state = np.zeros(p.N, dtype=np.int16)
 
     # Positions initiales aléatoires sur la grille (plusieurs agents par cellule autorisés)
-    x = rng.integers(0, p.L, size=p.N, dtype=np.int16)
-    y = rng.integers(0, p.L, size=p.N, dtype=np.int16)
+    x = rng.integers(0, p.L, size=p.N, dtype=pos_dtype(p.L))
+    y = rng.integers(0, p.L, size=p.N, dtype=pos_dtype(p.L))
 
     # Grille de comptage des infectieux par cellule (pour calculer N_I rapidement)
-    Icount = np.zeros((p.L, p.L), dtype=np.int16)
+    Icount = new_icount(p.L, sparse)
     for i in range(p.N):
         if states[i] == INF:
             Icount[x[i], y[i]] += 1
@@ -96,6 +125,7 @@ def init_population(p: Params):
 
 
 def count_S_E_I_R(states: np.ndarray):
+    """Comptage complet (initialisation et vérification des compteurs)."""
     S = int(np.sum(states == SUS))
     E = int(np.sum(states == EXP))
     I = int(np.sum(states == INF))
@@ -114,6 +144,75 @@ def neighborhood_I(Icount: np.ndarray, x: int, y: int, L: int) -> int:
     return total
 
 
+def box_sum(Icount: np.ndarray) -> np.ndarray:
+    """
+    Grille NIgrid des sommes 3x3 (tore) : NIgrid[x, y] = neighborhood_I(Icount, x, y, L).
+    Calculée une fois au départ, puis tenue à jour par add_infectious.
+    """
+    if isinstance(Icount, SparseCounts):
+        return Icount.box_sum()
+    NIgrid = Icount.astype(np.int32)
+    for dx, dy in MOORE:
+        NIgrid += np.roll(Icount, (dx, dy), axis=(0, 1))
+    return NIgrid
+
+
+def add_infectious(Icount: np.ndarray, NIgrid: np.ndarray, x: int, y: int, L: int, d: int):
+    """
+    Ajoute d infectieux (+1 ou -1) en (x, y) : Icount et les 9 cellules de
+    NIgrid dont le voisinage contient (x, y).
+    """
+    if isinstance(Icount, SparseCounts):
+        Icount.add(x, y, d)
+        NIgrid.add_box(x, y, d)
+        return
+    Icount[x, y] += d
+    if 0 < x < L - 1 and 0 < y < L - 1:
+        NIgrid[x - 1:x + 2, y - 1:y + 2] += d
+        return
+    for xx in ((x - 1) % L, x, (x + 1) % L):  # bord du tore
+        for yy in ((y - 1) % L, y, (y + 1) % L):
+            NIgrid[xx, yy] += d
+
+
+# Décalages (dx, dy) du voisinage 3x3, cellule centrale comprise
+BOX = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.intp)
+
+
+def add_infectious_vec(Icount: np.ndarray, NIgrid: np.ndarray,
+                       x: np.ndarray, y: np.ndarray, L: int, d: np.ndarray):
+    """
+    Version vectorisée de add_infectious : ajoute d[k] infectieux en
+    (x[k], y[k]) (positions répétées autorisées), en un seul np.add.at
+    sur les 9 cellules de chaque position.
+    """
+    if len(x) == 0:
+        return
+    x = x.astype(np.intp)
+    y = y.astype(np.intp)
+    xx = (x[None, :] + BOX[:, :1]) % L
+    yy = (y[None, :] + BOX[:, 1:]) % L
+    if isinstance(Icount, SparseCounts):
+        Icount.add_at(x, y, d)
+        NIgrid.add_at(xx.ravel(), yy.ravel(), np.tile(d, len(BOX)))
+        return
+    np.add.at(Icount, (x, y), d.astype(Icount.dtype))
+    np.add.at(NIgrid.reshape(-1), (xx * L + yy).ravel(), np.tile(d, len(BOX)))
+
+
+def infection_prob_table(inf_force: float, n_max: int) -> np.ndarray:
+    """
+    Table prob[NI] = 1 - exp(-inf_force * NI) pour NI = 0..K, avec K <= n_max
+    le premier rang où la probabilité vaut 1.0 en double précision : la
+    probabilité pour NI est prob[min(NI, K)]. Valeurs calculées une à une,
+    comme dans step_one_agent auparavant (mêmes arrondis).
+    """
+    values = [0.0]
+    while len(values) <= n_max and values[-1] < 1.0:
+        values.append(1.0 - np.exp(-inf_force * len(values)))
+    return np.array(values, dtype=np.float64)
+
+
 def step_one_agent(i: int,
                    rng: np.random.Generator,
                    p: Params,
@@ -121,15 +220,27 @@ def step_one_agent(i: int,
                    t_in_state: np.ndarray,
                    dE: np.ndarray, dI: np.ndarray, dR: np.ndarray,
                    x: np.ndarray, y: np.ndarray,
-                   Icount: np.ndarray):
+                   Icount: np.ndarray,
+                   NIgrid: np.ndarray,
+                   prob: np.ndarray,
+                   tally: np.ndarray,
+                   recovered: np.ndarray,
+                   prof=None):
     """
     Mise à jour asynchrone d'un agent i :
     1) déplacement global aléatoire
     2) incrément temps dans l'état
     3) transitions (S->E probabiliste ; E->I ; I->R ; R->S)
-    Mise à jour immédiate (Icount et états sont modifiés sur le champ).
+    Mise à jour immédiate (Icount, NIgrid, états et compteurs `tally` sont
+    modifiés sur le champ). N_I est lu dans NIgrid (voir box_sum) et la
+    probabilité d'infection dans la table `prob` (infection_prob_table).
+    `recovered` marque les agents déjà passés par R->S (réinfections).
+    `prof` : EngineProfile optionnel (voir engine_profile.py).
     """
     L = p.L
+    K = len(prob) - 1
+    if prof is not None:
+        mark = prof.mark()
 
     # ---------- 1) Déplacement global aléatoire (cellule choisie au hasard dans la grille)
     oldx, oldy = int(x[i]), int(y[i])
@@ -143,11 +254,14 @@ def step_one_agent(i: int,
 
     # Mettre à jour Icount si l'agent est infectieux et change de cellule
     if states[i] == INF and (nx != oldx or ny != oldy):
-        Icount[oldx, oldy] -= 1
-        Icount[nx, ny] += 1
+        add_infectious(Icount, NIgrid, oldx, oldy, L, -1)
+        add_infectious(Icount, NIgrid, nx, ny, L, +1)
 
     x[i], y[i] = nx, ny
 
+    if prof is not None:
+        mark = prof.lap("move", mark)
+
     # ---------- 2) temps écoulé dans l'état (discret, 1 pas = 1 jour)
     t_in_state[i] += 1
 
@@ -155,13 +269,23 @@ def step_one_agent(i: int,
     st = states[i]
 
     if st == SUS:
-        NI = neighborhood_I(Icount, nx, ny, L)
+        if prof is None:
+            NI = int(NIgrid[nx, ny])
+        else:
+            t0 = perf_counter()
+            NI = int(NIgrid[nx, ny])
+            prof.time["neighborhood"] += perf_counter() - t0
+            prof.neighborhood_evals += 1
         if NI > 0:
-            # p = 1 - exp(-0.5 * N_I)
-            prob = 1.0 - np.exp(-p.inf_force * NI)
-            if rng.random() < prob:
+            # p = 1 - exp(-0.5 * N_I), tabulé
+            if rng.random() < prob[min(NI, K)]:
                 states[i] = EXP
                 t_in_state[i] = 0  # reset temps dans l'état
+                tally[SUS] -= 1
+                tally[EXP] += 1
+                tally[NEW_INF] += 1
+                if recovered[i]:
+                    tally[REINF] += 1
 
     elif st == EXP:
         # devient I si temps écoulé > dE
@@ -169,54 +293,682 @@ def step_one_agent(i: int,
             states[i] = INF
             t_in_state[i] = 0
             # devient infectieux -> Icount +1 à la cellule actuelle
-            Icount[nx, ny] += 1
+            add_infectious(Icount, NIgrid, nx, ny, L, +1)
+            tally[EXP] -= 1
+            tally[INF] += 1
 
     elif st == INF:
         if float(t_in_state[i]) > float(dI[i]):
             states[i] = REM
             t_in_state[i] = 0
             # quitte infectieux -> Icount -1
-            Icount[nx, ny] -= 1
+            add_infectious(Icount, NIgrid, nx, ny, L, -1)
+            tally[INF] -= 1
+            tally[REM] += 1
+            tally[NEW_REC] += 1
 
     elif st == REM:
         if float(t_in_state[i]) > float(dR[i]):
             states[i] = SUS
             t_in_state[i] = 0
+            recovered[i] = True
+            tally[REM] -= 1
+            tally[SUS] += 1
+
+    if prof is not None:
+        prof.lap("transition", mark)
+
+
+def step_day_vectorized(rng: np.random.Generator,
+                        p: Params,
+                        states: np.ndarray,
+                        t_in_state: np.ndarray,
+                        dE: np.ndarray, dI: np.ndarray, dR: np.ndarray,
+                        x: np.ndarray, y: np.ndarray,
+                        Icount: np.ndarray,
+                        NIgrid: np.ndarray,
+                        prob: np.ndarray,
+                        tally: np.ndarray,
+                        recovered: np.ndarray,
+                        order: np.ndarray,
+                        n_batches: int,
+                        prof=None):
+    """
+    Un jour complet traité par sous-lots NumPy (moteur "vectorized").
+
+    Tous les tirages du jour (déplacements, second essai de déplacement,
+    uniformes d'infection) sont faits d'un bloc ; le k-ième agent visité
+    dans `order` consomme la k-ième valeur de chaque tableau.
+
+    Approximation de l'asynchronisme : l'ordre aléatoire `order` est découpé
+    en `n_batches` sous-lots consécutifs, traités l'un après l'autre. Dans un
+    sous-lot :
+      1) tous les agents se déplacent (Icount et NIgrid mis à jour) ;
+      2) les susceptibles lisent N_I dans NIgrid (ils voient donc les
+         déplacements de tout leur sous-lot, mais pas encore ses transitions
+         E->I / I->R) ;
+      3) les transitions E->I, I->R et R->S du sous-lot sont appliquées.
+    Les sous-lots suivants voient tout ce qui précède, comme dans la boucle
+    de référence. Avec n_batches = N (un agent par sous-lot), on retrouve la
+    même loi que le moteur "loop" ; seul le flux de nombres aléatoires diffère.
+
+    Les compteurs `tally` sont mis à jour à partir des masques de transition
+    de chaque sous-lot (voir step_one_agent). `prof` : EngineProfile optionnel (voir engine_profile.py).
+    """
+    L = p.L
+    N = p.N
+
+    rng.shuffle(order)
+
+    # Tirages du jour, faits en une fois
+    nx_all = rng.integers(0, L, size=N, dtype=pos_dtype(L))
+    ny_all = rng.integers(0, L, size=N, dtype=pos_dtype(L))
+    rx_all = rng.integers(0, L, size=N, dtype=pos_dtype(L))
+    ry_all = rng.integers(0, L, size=N, dtype=pos_dtype(L))
+    u_all = rng.random(N)
+
+    bounds = np.linspace(0, N, max(1, min(n_batches, N)) + 1).astype(np.intp)
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        if prof is not None:
+            mark = prof.mark()
+        idx = order[a:b]
+
+        # ---------- 1) déplacements du sous-lot
+        ox, oy = x[idx], y[idx]
+        nx, ny = nx_all[a:b], ny_all[a:b]
+        same = (nx == ox) & (ny == oy)
+        nx = np.where(same, rx_all[a:b], nx)
+        ny = np.where(same, ry_all[a:b], ny)
+
+        st = states[idx]
+        is_inf = st == INF
+        moved = is_inf & ((nx != ox) | (ny != oy))
+        n_moved = np.count_nonzero(moved)
+        add_infectious_vec(Icount, NIgrid,
+                           np.concatenate([ox[moved], nx[moved]]),
+                           np.concatenate([oy[moved], ny[moved]]), L,
+                           np.repeat(np.array([-1, 1], dtype=np.int32), n_moved))
+
+        x[idx] = nx
+        y[idx] = ny
+
+        if prof is not None:
+            mark = prof.lap("move", mark)
+
+        t_in_state[idx] += 1
+        tis = t_in_state[idx]
+
+        # ---------- 2) S -> E
+        is_sus = st == SUS
+        if is_sus.any():
+            if prof is None:
+                NI = NIgrid[nx[is_sus], ny[is_sus]]
+            else:
+                t0 = perf_counter()
+                NI = NIgrid[nx[is_sus], ny[is_sus]]
+                prof.time["neighborhood"] += perf_counter() - t0
+                prof.neighborhood_evals += len(NI)
+            p_inf = prob[np.minimum(NI, len(prob) - 1)]
+            new_E = idx[is_sus][u_all[a:b][is_sus] < p_inf]
+            states[new_E] = EXP
+            t_in_state[new_E] = 0
+            tally[SUS] -= len(new_E)
+            tally[EXP] += len(new_E)
+            tally[NEW_INF] += len(new_E)
+            tally[REINF] += np.count_nonzero(recovered[new_E])
+
+        # ---------- 3) E -> I, I -> R, R -> S
+        e_to_i = (st == EXP) & (tis > dE[idx])
+        i_to_r = is_inf & (tis > dI[idx])
+        r_to_s = (st == REM) & (tis > dR[idx])
+
+        changed = e_to_i | i_to_r
+        add_infectious_vec(Icount, NIgrid, nx[changed], ny[changed], L,
+                           np.where(e_to_i[changed], 1, -1).astype(np.int32))
+
+        states[idx[e_to_i]] = INF
+        states[idx[i_to_r]] = REM
+        states[idx[r_to_s]] = SUS
+        t_in_state[idx[e_to_i | i_to_r | r_to_s]] = 0
+        recovered[idx[r_to_s]] = True
+
+        n_ei = np.count_nonzero(e_to_i)
+        n_ir = np.count_nonzero(i_to_r)
+        n_rs = np.count_nonzero(r_to_s)
+        tally[EXP] -= n_ei
+        tally[INF] += n_ei - n_ir
+        tally[REM] += n_ir - n_rs
+        tally[SUS] += n_rs
+        tally[NEW_REC] += n_ir
+
+        if prof is not None:
+            prof.lap("transition", mark)
+
+
+ENGINES = ("loop", "vectorized", "numba", "event")
+RNG_KINDS = ("native", "philox")
+
+# Tableaux des agents conservés dans un instantané (checkpoint.py), selon le
+# format du moteur : init_population (loop, vectorized) ou AgentStore
+AGENT_ARRAYS = ("states", "t_in_state", "dE", "dI", "dR", "x", "y")
+STORE_ARRAYS = ("packed", "kE", "kI", "kR", "cell", "recovered")
+# AgentStore.cell = x * L + y sur 32 bits
+COMPACT_L_MAX = 65535
+
+
+# Arrêt anticipé des noyaux compilés : extinction et régime stationnaire
+# sont testés tous les EARLY_STOP_CHUNK jours (les jours déjà simulés restent
+# exacts, le remplissage part de la fin du bloc)
+EARLY_STOP_CHUNK = 10
+
+
+def fill_extinct(counts: np.ndarray, inc: np.ndarray, t: int, drain: np.ndarray):
+    """
+    Extinction au jour t (E = I = 0) : plus aucune infection possible, seuls
+    les agents R repassent en S, chacun au jour t + drain (drain >= 1, connu
+    d'avance). Remplit les jours t+1..T sans simuler : mêmes effectifs que la
+    simulation complète, incidence nulle.
+    """
+    T = counts.shape[0] - 1
+    drains = np.bincount(drain[drain <= T - t], minlength=T - t + 1)
+    out = np.cumsum(drains)[1:]
+    counts[t + 1:] = 0
+    counts[t + 1:, SUS] = counts[t, SUS] + out
+    counts[t + 1:, REM] = counts[t, REM] - out
+    inc[t + 1:] = 0
 
 
-def run_one_sim(p: Params, out_csv: Path):
-    rng, states, t_in_state, dE, dI, dR, x, y, Icount = init_population(p)
-
-    out_csv.parent.mkdir(parents=True, exist_ok=True)
+def steady_state(counts: np.ndarray, t: int, window: int, tol: float) -> bool:
+    """
+    Régime stationnaire au jour t : les moyennes de S,E,I,R sur les
+    fenêtres de `window` jours ]t-window, t] et ]t-2*window, t-window]
+    diffèrent de moins de tol * N pour chaque compartiment.
+    """
+    if t < 2 * window:
+        return False
+    last = counts[t - window + 1:t + 1].mean(axis=0)
+    prev = counts[t - 2 * window + 1:t - window + 1].mean(axis=0)
+    return bool(np.all(np.abs(last - prev) <= tol * counts[t].sum()))
+
+
+def fill_steady(counts: np.ndarray, inc: np.ndarray, t: int, window: int):
+    """Régime stationnaire : jours t+1..T remplis par la moyenne de la dernière fenêtre."""
+    mean = np.rint(counts[t - window + 1:t + 1].mean(axis=0)).astype(np.int64)
+    mean[REM] = counts[t].sum() - mean[:REM].sum()  # effectif total conservé
+    counts[t + 1:] = mean
+    inc[t + 1:] = np.rint(inc[t - window + 1:t + 1].mean(axis=0))
+
+
+def check_tally(tally: np.ndarray, states: np.ndarray, t: int):
+    """Mode debug : compare les compteurs incrémentaux à un comptage complet."""
+    full = count_S_E_I_R(states)
+    if tuple(int(v) for v in tally[:4]) != full:
+        raise RuntimeError(f"Compteurs incohérents au jour {t}: "
+                           f"{tuple(int(v) for v in tally[:4])} != {full} (comptage complet)")
+
+
+def iter_days(p: Params, engine: str = "loop", n_batches: int = 100, prof=None,
+              check: bool = False, rng_kind: str = "native", resume=None,
+              checkpoint_every: int = 0, checkpoint=None, early_stop: bool = True,
+              steady_tol: float = 0.0, steady_window: int = 60, info: dict = None,
+              grid: str = "auto", spatial_every: int = 0, spatial=None):
+    """
+    Générateur : simule p.T jours et produit un DayState (streaming.py) par
+    jour 0..T, dès qu'il est calculé (par paquets de jours avec les noyaux
+    compilés). Interrompre l'itération arrête la simulation.
+
+    Les effectifs S,E,I,R (DayState.y) sont tenus à jour à chaque transition
+    (pas de recomptage de la population). DayState.incidence : nouvelles
+    infections (S->E), guérisons (I->R), réinfections (S->E d'agents déjà
+    passés par R). Avec check=True, les compteurs et la grille N_I sont
+    comparés chaque jour à un recalcul complet.
+
+    `prof` : EngineProfile optionnel, rempli pendant la simulation
+    (mêmes tirages, donc mêmes trajectoires qu'un lancement normal).
+
+    `rng_kind` : "native" (np.random.Generator, PCG64) ou "philox" (tirages
+    indexés de philox.py, communs aux moteurs C et C++ ; moteurs loop,
+    vectorized et numba).
+
+    Points de reprise (checkpoint.py) : `resume` (Snapshot) reprend au
+    lendemain de l'instantané (les jours précédents sont produits depuis
+    l'instantané) ;
+    avec checkpoint_every = K, `checkpoint(snap)` reçoit un instantané tous
+    les K jours.
+
+    Arrêt anticipé : avec early_stop, la simulation s'arrête à l'extinction
+    (E = I = 0) et les jours restants sont remplis exactement (fill_extinct) ;
+    avec steady_tol > 0, elle s'arrête aussi en régime stationnaire
+    (steady_state) et les jours restants reçoivent la moyenne de la
+    dernière fenêtre (approximation). Les jours remplis sont produits avec
+    DayState.simulated = False, sans instantané. `info` : dict optionnel,
+    rempli avec extinct_day, steady_day (None si non atteint) et
+    days_simulated, dernier jour simulé produit (tenu à jour au fil des
+    jours : exact aussi si le consommateur s'arrête avant la fin).
+
+    `grid` : grilles Icount / NIgrid "dense", "sparse" (sparse_grid.py,
+    mémoire proportionnelle au nombre d'infectieux ; moteurs loop et
+    vectorized) ou "auto" (creuses si L² > SPARSE_RATIO * N). Mêmes
+    trajectoires dans tous les cas.
+
+    Instantanés spatiaux (spatial.py) : avec spatial_every = K,
+    `spatial(t, states, x, y, Icount)` est appelé au jour 0 puis tous les
+    K jours simulés (p. ex. un SpatialWriter) ; trajectoires inchangées.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur inconnu: {engine} (attendu: {', '.join(ENGINES)})")
+    if rng_kind not in RNG_KINDS:
+        raise ValueError(f"Générateur inconnu: {rng_kind} (attendu: {', '.join(RNG_KINDS)})")
+    philox = rng_kind == "philox"
+    if philox and engine == "event":
+        raise ValueError("--rng philox : moteurs loop, vectorized et numba uniquement")
+
+    # imports locaux : agent_store, philox et checkpoint importent ce module
+    compact = engine in ("numba", "event")
+    if compact and p.L > COMPACT_L_MAX:
+        raise ValueError(f"Moteurs numba et event : L doit être <= {COMPACT_L_MAX} "
+                         f"(cellule sur 32 bits) ; moteurs loop, vectorized ou C++ au-delà")
+    sparse = use_sparse(p.L, p.N, grid)
+    if sparse and compact:
+        if grid == "sparse":
+            raise ValueError("--grid sparse : moteurs loop et vectorized uniquement")
+        sparse = False
+    t_start = 0
+    if resume is not None:
+        from checkpoint import restore
+        rng, saved = restore(resume, p, engine, rng_kind)
+        t_start = resume.day
+        Icount = icount_from_arrays(saved, p.L, sparse)
+        if compact:
+            from agent_store import AgentStore
+            store = AgentStore(**{k: saved[k] for k in STORE_ARRAYS})
+        else:
+            states, t_in_state, dE, dI, dR, x, y = (saved[k] for k in AGENT_ARRAYS)
+            recovered = saved["recovered"]
+    elif compact:
+        if philox:
+            from philox import init_store
+        else:
+            from agent_store import init_store
+        rng, store, Icount = init_store(p)
+    else:
+        if philox:
+            from philox import init_population as init_philox
+            rng, states, t_in_state, dE, dI, dR, x, y, Icount = init_philox(p, sparse)
+        else:
+            rng, states, t_in_state, dE, dI, dR, x, y, Icount = init_population(p, sparse)
+        recovered = np.zeros(p.N, dtype=np.bool_)
+    if compact:
+        recovered = store.recovered
+    draws = rng  # PhiloxGenerator : select(i) avant chaque agent (moteur loop)
+
+    def current_states():
+        return store.states if compact else states
+
+    NIgrid = box_sum(Icount)
+    prob = infection_prob_table(p.inf_force, p.N)
     order = np.arange(p.N, dtype=np.int32)
-
+    tally = np.zeros(N_TALLY, dtype=np.int64)
+    tally[:4] = count_S_E_I_R(current_states())
+
+    counts = np.zeros((p.T + 1, 4), dtype=np.int32)
+    inc = np.zeros((p.T + 1, 3), dtype=np.int32)
+    counts[0] = tally[:4]
+    if resume is not None:
+        order[:] = saved["order"]
+        tally[:] = saved["tally"]
+        counts[:t_start + 1] = saved["counts"]
+        inc[:t_start + 1] = saved["incidence"]
+
+    if info is None:
+        info = {}
+    info.update(extinct_day=None, steady_day=None, days_simulated=t_start)
+    emitted = -1
+
+    def emit(t1, simulated=True):
+        """Jours emitted+1..t1, désormais définitifs."""
+        nonlocal emitted
+        for d in range(emitted + 1, t1 + 1):
+            if simulated:
+                info["days_simulated"] = d
+            yield DayState(d, counts[d].copy(), inc[d].copy(), simulated)
+        emitted = t1
+
+    yield from emit(t_start)
+
+    def snapshot(t):
+        from checkpoint import Snapshot
+        arrays = {**icount_arrays(Icount), "order": order, "tally": tally, "recovered": recovered,
+                  "counts": counts[:t + 1], "incidence": inc[:t + 1]}
+        if compact:
+            arrays.update((k, getattr(store, k)) for k in STORE_ARRAYS)
+        else:
+            arrays.update(zip(AGENT_ARRAYS, (states, t_in_state, dE, dI, dR, x, y)))
+        if engine == "event":
+            arrays.update(queue.saved())
+        return Snapshot.capture(p, engine, rng_kind, t, draws, arrays)
+
+    every = checkpoint_every if checkpoint is not None else 0
+    spatial_every = spatial_every if spatial is not None else 0
+
+    def spatial_snapshot(t):
+        if compact:
+            x_, y_ = np.divmod(store.cell.astype(np.int64), p.L)
+            spatial(t, store.states, x_, y_, Icount)
+        else:
+            spatial(t, states, x, y, Icount)
+
+    def stop_early(t):
+        """Après le jour t : extinction ou régime stationnaire, jours t+1..T remplis."""
+        if early_stop and tally[EXP] == 0 and tally[INF] == 0:
+            if compact:
+                rem = store.states == REM
+                if engine == "event":  # temps dans l'état non tenu : échéances
+                    drain = queue.due[rem] - t
+                else:
+                    drain = store.kR[rem].astype(np.int64) - store.t_in_state[rem]
+            else:
+                rem = states == REM
+                drain = np.floor(dR[rem]).astype(np.int64) + 1 - t_in_state[rem]
+            fill_extinct(counts, inc, t, np.maximum(drain, 1))
+            info.update(extinct_day=t)
+            return True
+        if steady_tol > 0 and steady_state(counts, t, steady_window, steady_tol):
+            fill_steady(counts, inc, t, steady_window)
+            info.update(steady_day=t)
+            return True
+        return False
+
+    # noyaux compilés : run_kernel(t0, t1) simule les jours t0..t1-1
+    run_kernel = None
+    if engine == "numba":
+        from ma_seirs_numba import run_days
+
+        kernel_rng, philox_seed = rng, -1
+        if philox:  # le générateur NumPy n'est pas utilisé par le noyau
+            kernel_rng, philox_seed = np.random.default_rng(0), rng.seed
+
+        def run_kernel(t0, t1):
+            run_days(kernel_rng, t0, t1, p.L, store.packed, store.kE, store.kI, store.kR,
+                     store.cell, Icount, NIgrid, prob, order, recovered, tally, counts, inc,
+                     philox_seed)
+    elif engine == "event":
+        from ma_seirs_event import EventQueue, run_days_event
+        queue = EventQueue(p.T, store, saved if resume is not None else None)
+
+        def run_kernel(t0, t1):
+            run_days_event(rng, t0, t1, p.L, p.T, store.packed, store.kE, store.kI, store.kR,
+                           store.cell, Icount, NIgrid, prob, recovered, tally, counts, inc,
+                           *queue.arrays())
+    elif prof is not None:
+        rng = prof.wrap_rng(rng)
+
+    if spatial_every and t_start % spatial_every == 0 and resume is None:
+        spatial_snapshot(t_start)
+    if t_start < p.T and stop_early(t_start):
+        yield from emit(p.T, simulated=False)
+        return
+
+    if run_kernel is not None and prof is None and not check:
+        # noyau d'un seul tenant entre deux instantanés / tests d'arrêt
+        t = t_start
+        while t < p.T:
+            t1 = p.T
+            if early_stop or steady_tol > 0:
+                t1 = min(t1, t + EARLY_STOP_CHUNK)
+            for k in (every, spatial_every):
+                if k:
+                    t1 = min(t1, (t // k + 1) * k)
+            run_kernel(t + 1, t1 + 1)
+            t = t1
+            if spatial_every and t % spatial_every == 0:
+                spatial_snapshot(t)
+            if every and t % every == 0:
+                checkpoint(snapshot(t))
+            yield from emit(t)
+            if t < p.T and stop_early(t):
+                yield from emit(p.T, simulated=False)
+                break
+        return
+
+    for t in range(t_start + 1, p.T + 1):
+        if prof is not None:
+            before = current_states().copy()
+            t_day = perf_counter()
+
+        if run_kernel is not None:
+            # noyau compilé opaque : seule la durée du jour est mesurée
+            run_kernel(t, t + 1)
+        else:
+            tally[NEW_INF:] = 0
+            if engine == "loop":
+                rng.shuffle(order)  # planification aléatoire
+                for i in order:
+                    if philox:
+                        draws.select(int(i))
+                    step_one_agent(int(i), rng, p, states, t_in_state, dE, dI, dR, x, y, Icount,
+                                   NIgrid, prob, tally, recovered, prof)
+            else:
+                step_day_vectorized(rng, p, states, t_in_state, dE, dI, dR, x, y, Icount,
+                                    NIgrid, prob, tally, recovered, order, n_batches, prof)
+
+            if prof is not None:
+                t0 = perf_counter()
+            counts[t] = tally[:4]
+            inc[t] = tally[NEW_INF:]
+            if prof is not None:
+                prof.time["count"] += perf_counter() - t0
+
+        if prof is not None:
+            # la copie des états et le comptage des transitions sont hors mesure
+            prof.day_wall.append(perf_counter() - t_day)
+            prof.count_transitions(before, current_states())
+        if check:
+            check_tally(tally, current_states(), t)
+            if not same_counts(NIgrid, box_sum(Icount)):
+                raise RuntimeError(f"Grille N_I incohérente au jour {t} (recalcul complet)")
+        if spatial_every and t % spatial_every == 0:
+            spatial_snapshot(t)
+        if every and t % every == 0:
+            checkpoint(snapshot(t))
+        yield from emit(t)
+        if t < p.T and stop_early(t):
+            yield from emit(p.T, simulated=False)
+            break
+
+    if prof is not None:
+        prof.wall = sum(prof.day_wall)
+
+
+def simulate(p: Params, engine: str = "loop", n_batches: int = 100, prof=None,
+             incidence: bool = False, check: bool = False, rng_kind: str = "native",
+             resume=None, checkpoint_every: int = 0, checkpoint=None,
+             early_stop: bool = True, steady_tol: float = 0.0, steady_window: int = 60,
+             info: dict = None, grid: str = "auto", spatial_every: int = 0, spatial=None):
+    """
+    Simule p.T jours et renvoie les effectifs journaliers S,E,I,R
+    sous forme d'un tableau (T+1, 4), et l'incidence (T+1, 3) avec
+    incidence=True. Options : voir iter_days.
+    """
+    counts = np.zeros((p.T + 1, 4), dtype=np.int32)
+    inc = np.zeros((p.T + 1, 3), dtype=np.int32)
+    for s in iter_days(p, engine=engine, n_batches=n_batches, prof=prof, check=check,
+                       rng_kind=rng_kind, resume=resume, checkpoint_every=checkpoint_every,
+                       checkpoint=checkpoint, early_stop=early_stop, steady_tol=steady_tol,
+                       steady_window=steady_window, info=info, grid=grid,
+                       spatial_every=spatial_every, spatial=spatial):
+        counts[s.t] = s.y
+        inc[s.t] = s.incidence
+    return (counts, inc) if incidence else counts
+
+
+def write_csv(out_csv: Path, counts: np.ndarray):
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
     with out_csv.open("w", encoding="utf-8") as f:
         f.write("t,S,E,I,R\n")
-        S, E, I, R = count_S_E_I_R(states)
-        f.write(f"0,{S},{E},{I},{R}\n")
+        for t, (S, E, I, R) in enumerate(counts):
+            f.write(f"{t},{S},{E},{I},{R}\n")
 
-        for t in range(1, p.T + 1):
-            rng.shuffle(order)  # planification aléatoire
-            for i in order:
-                step_one_agent(int(i), rng, p, states, t_in_state, dE, dI, dR, x, y, Icount)
 
-            S, E, I, R = count_S_E_I_R(states)
-            f.write(f"{t},{S},{E},{I},{R}\n")
+def write_incidence_csv(out_csv: Path, inc: np.ndarray):
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", encoding="utf-8") as f:
+        f.write("t," + ",".join(INCIDENCE_COLS) + "\n")
+        for t, (a, b, c) in enumerate(inc):
+            f.write(f"{t},{a},{b},{c}\n")
+
+
+def run_one_sim(p: Params, out_csv: Path, engine: str = "loop", n_batches: int = 100,
+                prof=None, incidence_csv: Path = None, check: bool = False,
+                rng_kind: str = "native", resume=None, checkpoint_every: int = 0,
+                checkpoint_dir: Path = None, early_stop: bool = True, steady_tol: float = 0.0,
+                steady_window: int = 60, grid: str = "auto", spatial_every: int = 0,
+                spatial_out: Path = None, raster_block: int = None) -> dict:
+    """
+    Simule et écrit les sorties au fil des jours (puits de streaming.py) ;
+    renvoie `info` de iter_days (arrêt anticipé).
+    """
+    checkpoint = None
+    if checkpoint_every > 0:
+        from checkpoint import save_to
+        checkpoint = save_to(checkpoint_dir)
+    extra = {"rng": rng_kind} if rng_kind != "native" else {}
+    if resume is not None:
+        extra["resumed_from_day"] = resume.day
+    spatial = None
+    if spatial_every > 0:
+        from spatial import SpatialWriter
+        spatial = SpatialWriter(spatial_out, p.L, raster_block,
+                                trajectories.rep_meta(f"python-{engine}", p, **extra))
+    if out_csv.suffix == ".npy":
+        out = BinarySink(out_csv, p.T, trajectories.rep_meta(f"python-{engine}", p, **extra))
+    else:
+        out = CsvSink(out_csv)
+    sinks = [out]
+    if incidence_csv is not None:
+        sinks.append(CsvSink(incidence_csv, ["t", *INCIDENCE_COLS], field="incidence"))
+    info = {}
+    try:
+        consume(iter_days(p, engine=engine, n_batches=n_batches, prof=prof, check=check,
+                          rng_kind=rng_kind, resume=resume, checkpoint_every=checkpoint_every,
+                          checkpoint=checkpoint, early_stop=early_stop, steady_tol=steady_tol,
+                          steady_window=steady_window, info=info, grid=grid,
+                          spatial_every=spatial_every, spatial=spatial), *sinks)
+        if isinstance(out, BinarySink):
+            out.meta.update(stop_meta(info))
+    finally:
+        for sink in sinks:
+            sink.close()
+        if spatial is not None:
+            spatial.close()
+    return info
+
+
+def stop_meta(info: dict) -> dict:
+    """Métadonnées d'arrêt anticipé (seulement si la simulation s'est arrêtée avant T)."""
+    return {k: info[k] for k in ("extinct_day", "steady_day") if info.get(k) is not None}
 
 
 def main():
     parser = argparse.ArgumentParser(description="SEIRS multi-agent (Partie 2)")
     parser.add_argument("--seed", type=int, default=12345, help="Graine RNG")
     parser.add_argument("--out", type=str, default="data/part2_multi_agent/python_rep01.csv",
-                        help="Chemin du CSV de sortie")
-    parser.add_argument("--T", type=int, default=730, help="Nombre d'itérations (jours)")
+                        help="Chemin de sortie (CSV, ou .npy pour le format binaire)")
+    parser.add_argument("--T", type=int, default=None,
+                        help="Nombre d'itérations (jours ; défaut 730, ou celui de l'instantané)")
+    parser.add_argument("--N", type=int, default=20000, help="Nombre d'individus")
+    parser.add_argument("--L", type=int, default=300, help="Taille de la grille LxL")
+    parser.add_argument("--engine", choices=ENGINES, default="loop",
+                        help="Moteur de simulation (loop = référence agent par agent)")
+    parser.add_argument("--batches", type=int, default=100,
+                        help="Nombre de sous-lots par jour (moteur vectorized)")
+    parser.add_argument("--profile", nargs="?", const="-", default=None, metavar="JSON",
+                        help="Mesure par phase (affichée, et écrite en JSON si un chemin est donné)")
+    parser.add_argument("--incidence", type=str, default=None,
+                        help="CSV t,new_infections,new_recoveries,reinfections (optionnel)")
+    parser.add_argument("--check-counts", action="store_true",
+                        help="Debug : vérifie chaque jour les compteurs par un comptage complet")
+    parser.add_argument("--rng", choices=RNG_KINDS, default="native",
+                        help="Générateur : native (PCG64) ou philox (tirages communs Python/C/C++)")
+    parser.add_argument("--inf-force", type=float, default=None,
+                        help="Coefficient d'infection (défaut 0.5, ou celui de l'instantané)")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="Instantané de reprise tous les K jours (0 = aucun)")
+    parser.add_argument("--checkpoint-dir", type=str, default="data/part2_multi_agent/checkpoints",
+                        help="Dossier des instantanés day_<t>.npz")
+    parser.add_argument("--resume", type=str, default=None,
+                        help="Reprend depuis un instantané (moteur, générateur et paramètres de "
+                             "l'instantané ; --T et --inf-force peuvent changer)")
+    parser.add_argument("--fork-seed", type=int, default=None,
+                        help="Avec --resume : nouvelle graine à partir du jour de l'instantané")
+    parser.add_argument("--no-early-stop", action="store_true",
+                        help="Simule tous les jours même après l'extinction (E = I = 0)")
+    parser.add_argument("--steady-tol", type=float, default=0.0,
+                        help="Arrêt en régime stationnaire : écart max des moyennes de deux "
+                             "fenêtres successives, en fraction de N (0 = désactivé)")
+    parser.add_argument("--steady-window", type=int, default=60,
+                        help="Fenêtre (jours) du test de régime stationnaire")
+    parser.add_argument("--grid", choices=GRIDS, default="auto",
+                        help="Grilles Icount / NIgrid : dense, sparse (creuses, grands L ; moteurs "
+                             "loop et vectorized) ou auto (creuses si L² > 64 N)")
+    parser.add_argument("--spatial-every", type=int, default=0,
+                        help="Instantané spatial (Icount, densités S,E,I,R par bloc) tous les K "
+                             "jours (0 = aucun)")
+    parser.add_argument("--spatial-out", type=str, default=None,
+                        help="Fichier des instantanés spatiaux (défaut : --out avec l'extension "
+                             ".spatial)")
+    parser.add_argument("--raster-block", type=int, default=None,
+                        help="Côté (cellules) des blocs de la carte de densité (défaut 10, "
+                             "agrandi pour que la carte ait au plus 1024 x 1024 blocs)")
 
     args = parser.parse_args()
 
-    p = Params(seed=args.seed, T=args.T)
+    resume = None
+    if args.resume:
+        from checkpoint import Snapshot, fork
+        resume = Snapshot.load(Path(args.resume))
+        changes = {k: v for k, v in (("T", args.T), ("inf_force", args.inf_force)) if v is not None}
+        if args.fork_seed is not None:
+            resume = fork(resume, args.fork_seed, **changes)
+        else:
+            resume.params.update(changes)
+        p = resume.to_params()
+        args.engine, args.rng = resume.engine, resume.rng_kind
+    elif args.fork_seed is not None:
+        parser.error("--fork-seed s'utilise avec --resume")
+    else:
+        p = Params(seed=args.seed, T=730 if args.T is None else args.T, N=args.N, L=args.L)
+        p.init_S = p.N - p.init_E - p.init_I - p.init_R
+        if args.inf_force is not None:
+            p.inf_force = args.inf_force
     out = Path(args.out)
-    run_one_sim(p, out)
+    prof = EngineProfile(args.engine) if args.profile else None
+    incidence_csv = Path(args.incidence) if args.incidence else None
+    spatial_out = Path(args.spatial_out) if args.spatial_out else out.with_suffix(".spatial")
+    info = run_one_sim(p, out, engine=args.engine, n_batches=args.batches, prof=prof,
+                       incidence_csv=incidence_csv, check=args.check_counts, rng_kind=args.rng,
+                       resume=resume, checkpoint_every=args.checkpoint_every,
+                       checkpoint_dir=Path(args.checkpoint_dir),
+                       early_stop=not args.no_early_stop, steady_tol=args.steady_tol,
+                       steady_window=args.steady_window, grid=args.grid,
+                       spatial_every=args.spatial_every, spatial_out=spatial_out,
+                       raster_block=args.raster_block)
+    if info["extinct_day"] is not None:
+        print(f"Extinction au jour {info['extinct_day']} : jours suivants remplis sans simulation")
+    if info["steady_day"] is not None:
+        print(f"Régime stationnaire au jour {info['steady_day']} : jours suivants = moyenne "
+              f"des {args.steady_window} derniers jours")
     print("Terminé ->", out)
+    if incidence_csv is not None:
+        print("OK ->", incidence_csv)
+    if args.spatial_every > 0:
+        print("OK ->", spatial_out)
+
+    if prof is not None:
+        print(format_report(prof.report(p)))
+        if args.profile != "-":
+            prof.save(Path(args.profile), p)
+            print("OK ->", args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Appel du moteur C++ depuis Python (ctypes, sans CSV)
+
+ma_seirs.cpp est compilé en bibliothèque partagée (build/libma_seirs_cpp.so,
+recompilée automatiquement si la source est plus récente) et sa fonction
+seirs_run est appelée directement :
+- les paramètres sont ceux de la dataclass Params de ma_seirs.py ;
+- les effectifs journaliers (T+1, 4) et l'incidence (T+1, 3) sont écrits
+  par le moteur dans des tableaux NumPy int32 alloués côté Python (ou
+  fournis par l'appelant via `out`, p. ex. une ligne du tableau
+  mémoire-mappé de run_replications_part2.py) : aucune copie, aucun fichier
+  intermédiaire ;
+- ctypes relâche le GIL pendant l'appel : plusieurs simulations peuvent
+  tourner en parallèle dans des threads d'un même processus.
+
+Graine : le moteur C++ prend une graine 32 bits. Une SeedSequence (voir
+run_replications_part2.py) est réduite à son premier mot généré.
+
+Usage en ligne de commande (mêmes options que ma_seirs.py) :
+    python src/part2_multi_agent/python/ma_seirs_cpp.py --out data/part2_multi_agent/cpp_rep01.csv
+"""
+
+from pathlib import Path
+import argparse
+import ctypes
+import os
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+
+import trajectories
+from ma_seirs import Params, stop_meta, write_csv, write_incidence_csv
+from sparse_grid import GRIDS
+
+ROOT = Path(__file__).resolve().parents[3]
+CPP_DIR = ROOT / "src/part2_multi_agent/cpp"
+SOURCES = (CPP_DIR / "ma_seirs.cpp", ROOT / "src/part2_multi_agent/common/philox.h")
+LIBRARY = ROOT / "build/libma_seirs_cpp.so"
+
+_lib = None
+_lock = threading.Lock()
+
+
+class CParams(ctypes.Structure):
+    """Miroir de la structure Params de ma_seirs.cpp (même ordre des champs)."""
+    _fields_ = [
+        ("L", ctypes.c_int), ("N", ctypes.c_int), ("T", ctypes.c_int),
+        ("seed", ctypes.c_uint32),
+        ("init_S", ctypes.c_int), ("init_E", ctypes.c_int),
+        ("init_I", ctypes.c_int), ("init_R", ctypes.c_int),
+        ("mean_dE", ctypes.c_double), ("mean_dI", ctypes.c_double), ("mean_dR", ctypes.c_double),
+        ("inf_force", ctypes.c_double),
+    ]
+
+
+class CEarlyStop(ctypes.Structure):
+    """Miroir de la structure EarlyStop de ma_seirs.cpp."""
+    _fields_ = [("extinction", ctypes.c_int), ("steady_tol", ctypes.c_double),
+                ("steady_window", ctypes.c_int)]
+
+
+def cpp_seed(seed) -> int:
+    """Graine 32 bits du moteur C++ (entier, ou premier mot d'une SeedSequence)."""
+    if isinstance(seed, np.random.SeedSequence):
+        return int(seed.generate_state(1, np.uint32)[0])
+    seed = int(seed)
+    if not 0 <= seed < 2**32:
+        raise ValueError(f"Graine hors de [0, 2^32) pour le moteur C++ : {seed}")
+    return seed
+
+
+def to_cparams(p: Params) -> CParams:
+    return CParams(L=p.L, N=p.N, T=p.T, seed=cpp_seed(p.seed),
+                   init_S=p.init_S, init_E=p.init_E, init_I=p.init_I, init_R=p.init_R,
+                   mean_dE=p.mean_dE, mean_dI=p.mean_dI, mean_dR=p.mean_dR,
+                   inf_force=p.inf_force)
+
+
+def build(path: Path = LIBRARY) -> Path:
+    """Compile la bibliothèque (fichier temporaire puis renommage : sûr entre processus)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".so")
+    os.close(fd)
+    try:
+        subprocess.run(["g++", "-O2", "-std=c++17", "-fopenmp", "-shared", "-fPIC",
+                        "-DSEIRS_LIBRARY", "-o", tmp, str(SOURCES[0])], check=True)
+        os.replace(tmp, path)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+    return path
+
+
+def load_library(rebuild: bool = False) -> ctypes.CDLL:
+    global _lib
+    with _lock:
+        if _lib is None:
+            stale = (not LIBRARY.exists() or
+                     LIBRARY.stat().st_mtime < max(s.stat().st_mtime for s in SOURCES))
+            if rebuild or stale:
+                build()
+            lib = ctypes.CDLL(str(LIBRARY))  # CDLL : le GIL est relâché pendant les appels
+            lib.seirs_run.argtypes = [ctypes.POINTER(CParams), ctypes.c_int, ctypes.c_int,
+                                      ctypes.c_int, ctypes.c_int, ctypes.POINTER(CEarlyStop),
+                                      ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+                                      ctypes.c_char_p, ctypes.c_size_t]
+            lib.seirs_run.restype = ctypes.c_int
+            _lib = lib
+    return _lib
+
+
+def _buffer(a, shape, name):
+    if a.shape != shape or a.dtype != np.int32 or not a.flags.c_contiguous or not a.flags.writeable:
+        raise ValueError(f"{name} : tableau int32 C-contigu inscriptible de forme {shape} attendu")
+    return a.ctypes.data
+
+
+def simulate_cpp(p: Params, threads: int = 0, substeps: int = 100, incidence: bool = False,
+                 check: bool = False, out: np.ndarray = None, out_incidence: np.ndarray = None,
+                 rng_kind: str = "native", early_stop: bool = True, steady_tol: float = 0.0,
+                 steady_window: int = 60, info: dict = None, grid: str = "auto"):
+    """
+    Simule p.T jours avec le moteur C++ et renvoie les effectifs (T+1, 4),
+    comme ma_seirs.simulate (et l'incidence (T+1, 3) si incidence=True).
+    threads = 0 : moteur série ; sinon moteur multithread (voir ma_seirs.cpp).
+    `out` / `out_incidence` : tableaux de sortie fournis par l'appelant.
+    rng_kind = "philox" : tirages indexés communs aux trois langages (moteur série).
+    early_stop / steady_tol / steady_window / info : arrêt anticipé, comme
+    ma_seirs.simulate.
+    grid : grilles Icount / NIgrid "dense", "sparse" ou "auto" (voir
+    sparse_grid.py ; moteur série, le moteur multithread est toujours dense).
+    """
+    if grid not in GRIDS:
+        raise ValueError(f"Grille inconnue: {grid} (attendu: {', '.join(GRIDS)})")
+    if rng_kind not in ("native", "philox"):
+        raise ValueError(f"rng_kind inconnu : {rng_kind}")
+    lib = load_library()
+    counts = np.empty((p.T + 1, 4), dtype=np.int32) if out is None else out
+    inc = None
+    if incidence:
+        inc = np.empty((p.T + 1, 3), dtype=np.int32) if out_incidence is None else out_incidence
+
+    err = ctypes.create_string_buffer(512)
+    cp = to_cparams(p)
+    stop = CEarlyStop(extinction=int(early_stop), steady_tol=steady_tol, steady_window=steady_window)
+    run_info = np.zeros(3, dtype=np.int32)
+    status = lib.seirs_run(ctypes.byref(cp), threads, substeps, int(check), int(rng_kind == "philox"),
+                           ctypes.byref(stop), GRIDS.index(grid), _buffer(counts, (p.T + 1, 4), "out"),
+                           None if inc is None else _buffer(inc, (p.T + 1, 3), "out_incidence"),
+                           run_info.ctypes.data, err, len(err))
+    if status != 0:
+        raise RuntimeError(f"Moteur C++ : {err.value.decode(errors='replace')}")
+    if info is not None:
+        extinct, steady, days = (int(v) for v in run_info)
+        info.update(extinct_day=extinct if extinct >= 0 else None,
+                    steady_day=steady if steady >= 0 else None, days_simulated=days)
+    return (counts, inc) if incidence else counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SEIRS multi-agent, moteur C++ appelé en Python (Partie 2)")
+    parser.add_argument("--seed", type=int, default=12345, help="Graine RNG")
+    parser.add_argument("--out", type=str, default="data/part2_multi_agent/cpp_rep01.csv",
+                        help="Chemin de sortie (CSV, ou .npy pour le format binaire)")
+    parser.add_argument("--T", type=int, default=730, help="Nombre d'itérations (jours)")
+    parser.add_argument("--N", type=int, default=20000, help="Nombre d'individus")
+    parser.add_argument("--L", type=int, default=300, help="Taille de la grille LxL")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Threads du moteur multithread (0 = moteur série)")
+    parser.add_argument("--substeps", type=int, default=100, help="Sous-pas par jour (multithread)")
+    parser.add_argument("--incidence", type=str, default=None,
+                        help="CSV t,new_infections,new_recoveries,reinfections (optionnel)")
+    parser.add_argument("--check", action="store_true",
+                        help="Debug : vérifie chaque jour les compteurs par un comptage complet")
+    parser.add_argument("--rng", choices=("native", "philox"), default="native",
+                        help="Générateur : mt19937 (native) ou Philox indexé commun aux langages")
+    parser.add_argument("--no-early-stop", action="store_true",
+                        help="Simule tous les jours même après l'extinction (E = I = 0)")
+    parser.add_argument("--steady-tol", type=float, default=0.0,
+                        help="Arrêt en régime stationnaire (voir ma_seirs.py ; 0 = désactivé)")
+    parser.add_argument("--steady-window", type=int, default=60,
+                        help="Fenêtre (jours) du test de régime stationnaire")
+    parser.add_argument("--grid", choices=GRIDS, default="auto",
+                        help="Grilles Icount/NIgrid denses, creuses (très grands L) ou choix selon L²/N")
+    args = parser.parse_args()
+
+    p = Params(seed=args.seed, T=args.T, N=args.N, L=args.L)
+    p.init_S = p.N - p.init_E - p.init_I - p.init_R
+    info = {}
+    counts, inc = simulate_cpp(p, threads=args.threads, substeps=args.substeps,
+                               incidence=True, check=args.check, rng_kind=args.rng,
+                               early_stop=not args.no_early_stop, steady_tol=args.steady_tol,
+                               steady_window=args.steady_window, info=info, grid=args.grid)
+
+    out = Path(args.out)
+    if out.suffix == ".npy":
+        engine = "cpp-mt" if args.threads > 0 else "cpp"
+        meta = trajectories.rep_meta(engine, p)
+        if args.rng != "native":
+            meta["rng"] = args.rng
+        meta.update(stop_meta(info))
+        trajectories.save(out, counts, [meta])
+    else:
+        write_csv(out, counts)
+    if info["extinct_day"] is not None:
+        print(f"Extinction au jour {info['extinct_day']} : jours suivants remplis sans simulation")
+    if info["steady_day"] is not None:
+        print(f"Régime stationnaire au jour {info['steady_day']} : jours suivants = moyenne "
+              f"des {args.steady_window} derniers jours")
+    print("Terminé ->", out)
+    if args.incidence:
+        write_incidence_csv(Path(args.incidence), inc)
+        print("OK ->", args.incidence)
+
+
+if __name__ == "__main__":
+    main()
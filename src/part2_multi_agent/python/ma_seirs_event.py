@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Moteur événementiel (échéancier) du modèle multi-agent SEIRS
+
+Les transitions E->I, I->R et R->S sont déterministes une fois la durée
+individuelle connue : un agent entré dans l'état au jour t0 en sort à son
+passage du jour t0 + floor(d) + 1 (premier jour où t_in_state > d). Ce
+jour est calculé à l'entrée dans l'état et rangé dans un échéancier
+(timing wheel : une liste chaînée d'agents par jour, tableaux head/next).
+
+Chaque jour, seuls sont mis à jour, dans un ordre aléatoire :
+- les agents mobiles « utiles » : S (infection possible) et I (leur
+  déplacement modifie Icount), tenus dans un ensemble indexé ;
+- les agents E et R dont la transition tombe ce jour-là.
+Un agent E ou R qui n'a pas de transition ce jour n'a aucun effet sur les
+autres : son déplacement (saut uniforme sur la grille) n'est pas simulé,
+sa position est redevenue uniforme quand elle compte à nouveau. Le coût
+d'une journée est donc proportionnel à S + I + événements du jour, et non
+plus à N : c'est le cas favorable des longs horizons où la majorité des
+agents est en R (mean_dR = 365).
+
+Même loi que le moteur "loop", mais pas le même flux de tirages (les
+trajectoires diffèrent à graine égale) : voir check_engines_part2.py.
+Les agents sont au format compact de agent_store.py ; le temps dans
+l'état n'est pas tenu à jour par ce moteur (seul l'état est écrit dans
+`packed`, l'échéance `due` remplace le compteur) et le jour de sortie
+vaut simplement t + k.
+
+Si Numba n'est pas installé, le noyau s'exécute en Python pur.
+"""
+
+import numpy as np
+
+from ma_seirs import SUS, EXP, INF, REM, NEW_INF, NEW_REC, REINF
+from agent_store import STATE_MASK, TIME_SHIFT
+from ma_seirs_numba import add_infectious, njit
+
+
+@njit(cache=True)
+def _schedule(i, day, T, due, wheel_head, wheel_next):
+    """Range l'agent i dans l'échéancier au jour `day` (ignoré au-delà de T)."""
+    due[i] = day
+    if day <= T:
+        wheel_next[i] = wheel_head[day]
+        wheel_head[day] = i
+
+
+@njit(cache=True)
+def _mobile_add(i, mobile, mpos, n_mobile):
+    mpos[i] = n_mobile[0]
+    mobile[n_mobile[0]] = i
+    n_mobile[0] += 1
+
+
+@njit(cache=True)
+def _mobile_remove(i, mobile, mpos, n_mobile):
+    k = mpos[i]
+    last = mobile[n_mobile[0] - 1]
+    mobile[k] = last
+    mpos[last] = k
+    mpos[i] = -1
+    n_mobile[0] -= 1
+
+
+@njit(cache=True)
+def init_events(T, packed, kE, kI, kR,
+                due, wheel_head, wheel_next, mobile, mpos, n_mobile):
+    """Échéances initiales (au jour 0, d'après le temps dans l'état) et ensemble S+I."""
+    N = packed.shape[0]
+    for i in range(N):
+        pk = np.int64(packed[i])
+        st = pk & STATE_MASK
+        tis = pk >> TIME_SHIFT
+        if st == SUS:
+            _mobile_add(i, mobile, mpos, n_mobile)
+        elif st == EXP:
+            _schedule(i, np.int64(kE[i]) - tis, T, due, wheel_head, wheel_next)
+        elif st == INF:
+            due[i] = np.int64(kI[i]) - tis
+            _mobile_add(i, mobile, mpos, n_mobile)
+        else:
+            _schedule(i, np.int64(kR[i]) - tis, T, due, wheel_head, wheel_next)
+
+
+@njit(cache=True)
+def run_days_event(rng, t0, t1, L, T,
+                   packed, kE, kI, kR, cell, Icount, NIgrid, prob,
+                   recovered, tally, counts, incidence,
+                   due, wheel_head, wheel_next, mobile, mpos, n_mobile, active):
+    """
+    Simule les jours t0..t1-1 (inclus) ; mêmes sorties que
+    ma_seirs_numba.run_days. `active` est un tampon de N entiers.
+    """
+    K = prob.shape[0] - 1
+    for t in range(t0, t1):
+        tally[NEW_INF] = 0
+        tally[NEW_REC] = 0
+        tally[REINF] = 0
+
+        # agents à mettre à jour : S et I, puis E/R arrivés à échéance
+        n = n_mobile[0]
+        active[:n] = mobile[:n]
+        i = wheel_head[t]
+        while i >= 0:
+            active[n] = i
+            n += 1
+            i = wheel_next[i]
+        wheel_head[t] = -1
+
+        rng.shuffle(active[:n])  # planification aléatoire
+
+        for k in range(n):
+            i = active[k]
+
+            # ---------- 1) déplacement global aléatoire
+            c = np.int64(cell[i])
+            oldx = c // L
+            oldy = c % L
+            nx = rng.integers(0, L)
+            ny = rng.integers(0, L)
+            if nx == oldx and ny == oldy:
+                nx = rng.integers(0, L)
+                ny = rng.integers(0, L)
+
+            st = packed[i] & STATE_MASK
+            if st == INF and (nx != oldx or ny != oldy):
+                add_infectious(Icount, NIgrid, oldx, oldy, L, -1)
+                add_infectious(Icount, NIgrid, nx, ny, L, 1)
+
+            cell[i] = nx * L + ny
+
+            # ---------- 2) transitions
+            if st == SUS:
+                NI = NIgrid[nx, ny]
+                if NI > 0:
+                    if rng.random() < prob[min(NI, K)]:
+                        packed[i] = EXP
+                        _mobile_remove(i, mobile, mpos, n_mobile)
+                        _schedule(i, t + kE[i], T, due, wheel_head, wheel_next)
+                        tally[SUS] -= 1
+                        tally[EXP] += 1
+                        tally[NEW_INF] += 1
+                        if recovered[i]:
+                            tally[REINF] += 1
+
+            elif st == EXP:  # échéance du jour
+                packed[i] = INF
+                add_infectious(Icount, NIgrid, nx, ny, L, 1)
+                _mobile_add(i, mobile, mpos, n_mobile)
+                due[i] = t + kI[i]
+                tally[EXP] -= 1
+                tally[INF] += 1
+
+            elif st == INF:
+                if due[i] == t:
+                    packed[i] = REM
+                    add_infectious(Icount, NIgrid, nx, ny, L, -1)
+                    _mobile_remove(i, mobile, mpos, n_mobile)
+                    _schedule(i, t + kR[i], T, due, wheel_head, wheel_next)
+                    tally[INF] -= 1
+                    tally[REM] += 1
+                    tally[NEW_REC] += 1
+
+            else:  # REM, échéance du jour
+                packed[i] = SUS
+                recovered[i] = True
+                _mobile_add(i, mobile, mpos, n_mobile)
+                tally[REM] -= 1
+                tally[SUS] += 1
+
+        for k in range(4):
+            counts[t, k] = tally[k]
+        incidence[t, 0] = tally[NEW_INF]
+        incidence[t, 1] = tally[NEW_REC]
+        incidence[t, 2] = tally[REINF]
+
+
+# Tableaux de l'échéancier conservés dans un instantané (checkpoint.py)
+QUEUE_ARRAYS = ("due", "wheel_head", "wheel_next", "mobile", "mpos", "n_mobile")
+
+
+class EventQueue:
+    """
+    Échéancier et ensemble des agents mobiles d'une simulation ; `saved` :
+    tableaux d'un instantané (reprise), éventuellement d'horizon différent.
+    """
+
+    def __init__(self, T: int, store, saved: dict = None):
+        N = store.packed.shape[0]
+        self.T = T
+        self.due = np.zeros(N, dtype=np.int64)
+        self.wheel_head = np.full(T + 2, -1, dtype=np.int64)
+        self.wheel_next = np.full(N, -1, dtype=np.int64)
+        self.mobile = np.empty(N, dtype=np.int64)
+        self.mpos = np.full(N, -1, dtype=np.int64)
+        self.n_mobile = np.zeros(1, dtype=np.int64)
+        self.active = np.empty(N, dtype=np.int64)
+        if saved is None:
+            init_events(T, store.packed, store.kE, store.kI, store.kR, self.due, self.wheel_head,
+                        self.wheel_next, self.mobile, self.mpos, self.n_mobile)
+        else:
+            self._restore(store, saved)
+
+    def _restore(self, store, saved: dict):
+        for name in ("due", "wheel_next", "mobile", "mpos", "n_mobile"):
+            getattr(self, name)[:] = saved[name]
+        old = saved["wheel_head"]
+        n = min(len(old), self.T + 2)
+        self.wheel_head[:n] = old[:n]
+        # horizon allongé : échéances E/R au-delà de l'ancien T, jamais rangées
+        old_T = len(old) - 2
+        st = store.packed & STATE_MASK
+        late = np.flatnonzero(((st == EXP) | (st == REM)) & (self.due > old_T))
+        for i in late:
+            _schedule(i, self.due[i], self.T, self.due, self.wheel_head, self.wheel_next)
+
+    def saved(self) -> dict:
+        return {name: getattr(self, name) for name in QUEUE_ARRAYS}
+
+    def arrays(self) -> tuple:
+        return (self.due, self.wheel_head, self.wheel_next, self.mobile, self.mpos,
+                self.n_mobile, self.active)
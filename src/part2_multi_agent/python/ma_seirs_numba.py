@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Noyau compilé (Numba) du modèle multi-agent SEIRS
+
+Même sémantique que le moteur de référence "loop" de ma_seirs.py :
+ordre aléatoire, mise à jour asynchrone et immédiate de Icount et NIgrid. La boucle
+sur les jours, le mélange de `order`, le déplacement et les transitions
+sont fusionnés dans un seul noyau.
+
+Les tirages passent par le même np.random.Generator et dans le même ordre
+que step_one_agent : à graine égale, les trajectoires sont identiques à
+celles du moteur "loop" (tant que T < agent_store.TIME_MAX).
+
+Les agents sont stockés au format compact de agent_store.py : seuils
+entiers kE/kI/kR au lieu des durées float64, état et temps dans l'état
+regroupés sur 16 bits, position en indice de cellule.
+
+Avec philox_seed >= 0, les tirages sont ceux de philox.py (--rng philox,
+indexés par graine, jour et agent) au lieu du générateur `rng` : mêmes
+trajectoires que les moteurs C et C++ lancés avec --rng philox.
+
+Si Numba n'est pas installé, le noyau s'exécute tel quel en Python pur
+(résultats identiques, sans le gain de vitesse).
+"""
+
+import numpy as np
+
+from ma_seirs import SUS, EXP, INF, REM, NEW_INF, NEW_REC, REINF
+from agent_store import STATE_MASK, TIME_SHIFT, TIME_MAX
+from philox import SHIFT32, philox4x32_10 as _philox4x32_10
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # repli : Python pur
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+# Tirages Philox agent par agent (mêmes conversions que philox.py / philox.h)
+philox4x32_10 = njit(cache=True)(_philox4x32_10)
+
+
+@njit(cache=True)
+def agent_block(seed, agent, day, block):
+    """Bloc `block` de l'agent `agent` au jour `day` (4 mots, uint64 < 2^32)."""
+    return philox4x32_10(np.uint64(agent), np.uint64(day), np.uint64(block), np.uint64(0),
+                         np.uint64(seed), np.uint64(0))
+
+
+@njit(cache=True)
+def u53(a, b):
+    """Uniforme [0, 1) sur 53 bits."""
+    return (float(a >> np.uint64(5)) * 67108864.0 + float(b >> np.uint64(6))) * (1.0 / 9007199254740992.0)
+
+
+@njit(cache=True)
+def below(w, n):
+    """Entier dans [0, n) : (w * n) >> 32."""
+    return np.int64((w * np.uint64(n)) >> SHIFT32)
+
+
+@njit(cache=True)
+def add_infectious(Icount, NIgrid, x, y, L, d):
+    """Comme ma_seirs.add_infectious : Icount et les 9 cellules de NIgrid."""
+    Icount[x, y] += d
+    for dx in range(-1, 2):
+        for dy in range(-1, 2):
+            NIgrid[(x + dx) % L, (y + dy) % L] += d
+
+
+@njit(cache=True)
+def run_days(rng, t0, t1, L,
+             packed, kE, kI, kR, cell, Icount, NIgrid, prob,
+             order, recovered, tally, counts, incidence, philox_seed=-1):
+    """
+    Simule les jours t0..t1-1 (inclus) et écrit les effectifs S,E,I,R
+    de chaque jour t dans counts[t], son incidence dans incidence[t].
+    Les agents sont au format compact de agent_store.py (packed, kE, kI,
+    kR, cell) ; ces tableaux, la grille NIgrid et les compteurs `tally`
+    (voir ma_seirs.py) sont modifiés sur place.
+    """
+    N = packed.shape[0]
+    K = prob.shape[0] - 1
+    philox = philox_seed >= 0
+    keys = np.empty(N if philox else 0, dtype=np.uint64)
+    first = np.empty((N if philox else 0, 2), dtype=np.int64)
+    for t in range(t0, t1):
+        tally[NEW_INF] = 0
+        tally[NEW_REC] = 0
+        tally[REINF] = 0
+        if philox:  # ordre du jour : clés du bloc 0 de chaque agent
+            for i in range(N):
+                w0, w1, w2, w3 = agent_block(philox_seed, i, t, 0)
+                keys[i] = (w0 << SHIFT32) | w1
+                first[i, 0] = below(w2, L)
+                first[i, 1] = below(w3, L)
+            order[:] = np.argsort(keys, kind="mergesort")
+        else:
+            rng.shuffle(order)  # planification aléatoire
+
+        for ii in range(N):
+            i = order[ii]
+            drawn = False  # bloc 1 (Philox) déjà calculé
+
+            # ---------- 1) déplacement global aléatoire
+            c = np.int64(cell[i])
+            oldx = c // L
+            oldy = c % L
+            if philox:
+                nx = first[i, 0]
+                ny = first[i, 1]
+                if nx == oldx and ny == oldy:
+                    v0, v1, v2, v3 = agent_block(philox_seed, i, t, 1)
+                    drawn = True
+                    nx = below(v0, L)
+                    ny = below(v1, L)
+            else:
+                nx = rng.integers(0, L)
+                ny = rng.integers(0, L)
+                if nx == oldx and ny == oldy:
+                    nx = rng.integers(0, L)
+                    ny = rng.integers(0, L)
+
+            pk = np.int64(packed[i])
+            st = pk & STATE_MASK
+            if st == INF and (nx != oldx or ny != oldy):
+                add_infectious(Icount, NIgrid, oldx, oldy, L, -1)
+                add_infectious(Icount, NIgrid, nx, ny, L, 1)
+
+            cell[i] = nx * L + ny
+
+            # ---------- 2) temps écoulé dans l'état (saturé)
+            tis = min((pk >> TIME_SHIFT) + 1, TIME_MAX)
+
+            # ---------- 3) transitions (t_in_state > d  <=>  tis >= k)
+            if st == SUS:
+                NI = NIgrid[nx, ny]  # Moore + cellule centrale, tore
+                if NI > 0:
+                    if philox:
+                        if not drawn:
+                            v0, v1, v2, v3 = agent_block(philox_seed, i, t, 1)
+                        u = u53(v2, v3)
+                    else:
+                        u = rng.random()
+                    if u < prob[min(NI, K)]:
+                        st = EXP
+                        tis = 0
+                        tally[SUS] -= 1
+                        tally[EXP] += 1
+                        tally[NEW_INF] += 1
+                        if recovered[i]:
+                            tally[REINF] += 1
+
+            elif st == EXP:
+                if tis >= kE[i]:
+                    st = INF
+                    tis = 0
+                    add_infectious(Icount, NIgrid, nx, ny, L, 1)
+                    tally[EXP] -= 1
+                    tally[INF] += 1
+
+            elif st == INF:
+                if tis >= kI[i]:
+                    st = REM
+                    tis = 0
+                    add_infectious(Icount, NIgrid, nx, ny, L, -1)
+                    tally[INF] -= 1
+                    tally[REM] += 1
+                    tally[NEW_REC] += 1
+
+            else:  # REM
+                if tis >= kR[i]:
+                    st = SUS
+                    tis = 0
+                    recovered[i] = True
+                    tally[REM] -= 1
+                    tally[SUS] += 1
+
+            packed[i] = st | (tis << TIME_SHIFT)
+
+        for k in range(4):
+            counts[t, k] = tally[k]
+        incidence[t, 0] = tally[NEW_INF]
+        incidence[t, 1] = tally[NEW_REC]
+        incidence[t, 2] = tally[REINF]
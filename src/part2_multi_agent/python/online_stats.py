@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Statistiques en ligne sur un ensemble de réplications
+
+EnsembleStats reçoit les réplications une par une (tableaux (T+1, 4) de
+S,E,I,R) et tient à jour, pour chaque jour et chaque compartiment :
+- la moyenne (somme exacte / n) et la variance (Welford) ;
+- des quantiles approchés par l'algorithme P² (Jain & Chlamtac, 1985),
+  5 marqueurs par quantile ;
+- le minimum et le maximum.
+
+La mémoire est en O(T) quel que soit le nombre R de réplications, ce qui
+permet de calculer des bandes d'ensemble sur 10 000 réplications et plus
+sans jamais les empiler. Les 5 premières réplications sont conservées pour
+initialiser P² ; tant que n <= 5, les quantiles sont exacts.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLS = ["S", "E", "I", "R"]
+
+
+def welford_update(n: int, mean: np.ndarray, M2: np.ndarray, x: np.ndarray):
+    """Ajoute la n-ième observation x à la moyenne et à M2 (Welford), sur place."""
+    delta = x - mean
+    mean += delta / n
+    M2 += delta * (x - mean)
+
+
+class EnsembleStats:
+    def __init__(self, n_days: int, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        self.n = 0
+        self.quantiles = tuple(quantiles)
+        shape = (n_days, 4)
+        self.total = np.zeros(shape)
+        self.wmean = np.zeros(shape)   # moyenne de Welford (pour M2)
+        self.M2 = np.zeros(shape)
+
+        # P² : hauteurs et positions des marqueurs, par quantile et par cellule
+        nq = len(self.quantiles)
+        p = np.asarray(self.quantiles)[:, None]
+        self._dn = np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+        self._q = np.zeros((nq,) + shape + (5,))
+        self._pos = np.zeros((nq,) + shape + (5,))
+        self._desired = np.zeros((nq, 5))
+        self._first = []
+
+    @property
+    def n_days(self) -> int:
+        return self.total.shape[0]
+
+    def update(self, counts: np.ndarray):
+        """Ajoute une réplication (T+1, 4)."""
+        x = np.asarray(counts, dtype=np.float64)
+        if x.shape != self.total.shape:
+            raise ValueError(f"Forme inattendue: {x.shape} (attendu {self.total.shape})")
+
+        self.n += 1
+        self.total += x
+        welford_update(self.n, self.wmean, self.M2, x)
+
+        if self.n <= 5:
+            self._first.append(x.copy())
+            if self.n == 5:
+                self._init_p2()
+        else:
+            self._update_p2(x)
+
+    def update_many(self, runs):
+        for counts in runs:
+            self.update(counts)
+
+    # ---------- P²
+    def _init_p2(self):
+        first = np.sort(np.stack(self._first, axis=-1), axis=-1)   # (T+1, 4, 5)
+        self._q[:] = first[None]
+        self._pos[:] = np.arange(1, 6, dtype=np.float64)
+        self._desired[:] = 1 + 4 * self._dn
+
+    def _update_p2(self, x):
+        q, pos = self._q, self._pos
+        x = np.broadcast_to(x, q.shape[:-1])
+
+        # cellule k telle que q[k] <= x < q[k+1] (extrêmes mis à jour)
+        np.minimum(q[..., 0], x, out=q[..., 0])
+        np.maximum(q[..., 4], x, out=q[..., 4])
+        k = (x[..., None] >= q[..., 1:4]).sum(axis=-1)
+        pos += np.arange(5) > k[..., None]
+        self._desired += self._dn
+
+        desired = self._desired[:, None, None, :]
+        for i in (1, 2, 3):
+            d = desired[..., i] - pos[..., i]
+            up = (d >= 1) & (pos[..., i + 1] - pos[..., i] > 1)
+            down = (d <= -1) & (pos[..., i - 1] - pos[..., i] < -1)
+            move = up | down
+            if not move.any():
+                continue
+            s = np.where(up, 1.0, -1.0)
+
+            qi, qm, qp = q[..., i], q[..., i - 1], q[..., i + 1]
+            ni, nm, np_ = pos[..., i], pos[..., i - 1], pos[..., i + 1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                parab = qi + s / (np_ - nm) * ((ni - nm + s) * (qp - qi) / (np_ - ni)
+                                               + (np_ - ni - s) * (qi - qm) / (ni - nm))
+                q_next = np.where(up, qp, qm)
+                n_next = np.where(up, np_, nm)
+                linear = qi + s * (q_next - qi) / (n_next - ni)
+            new_q = np.where((qm < parab) & (parab < qp), parab, linear)
+
+            q[..., i] = np.where(move, new_q, qi)
+            pos[..., i] = np.where(move, ni + s, ni)
+
+    # ---------- résultats
+    @property
+    def mean(self) -> np.ndarray:
+        return self.total / max(self.n, 1)
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.M2 / (self.n - 1) if self.n > 1 else np.zeros_like(self.M2)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    def quantile_bands(self) -> np.ndarray:
+        """Quantiles (nq, T+1, 4) : exacts si n <= 5, P² sinon."""
+        if self.n == 0:
+            return np.full((len(self.quantiles),) + self.total.shape, np.nan)
+        if self.n <= 5:
+            return np.quantile(np.stack(self._first), self.quantiles, axis=0)
+        return self._q[..., 2].copy()
+
+    @property
+    def min(self) -> np.ndarray:
+        if self.n == 0:
+            return np.full(self.total.shape, np.nan)
+        return self._q[0, ..., 0] if self.n >= 5 else np.min(self._first, axis=0)
+
+    @property
+    def max(self) -> np.ndarray:
+        if self.n == 0:
+            return np.full(self.total.shape, np.nan)
+        return self._q[0, ..., 4] if self.n >= 5 else np.max(self._first, axis=0)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Tableau t, <c>_mean, <c>_std, <c>_qXX pour c dans S,E,I,R."""
+        cols = {"t": np.arange(self.n_days)}
+        mean, std, bands = self.mean, self.std, self.quantile_bands()
+        for k, c in enumerate(COLS):
+            cols[f"{c}_mean"] = mean[:, k]
+            cols[f"{c}_std"] = std[:, k]
+            for qi, q in enumerate(self.quantiles):
+                cols[f"{c}_q{int(round(q * 100)):02d}"] = bands[qi, :, k]
+        return pd.DataFrame(cols)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.to_frame().to_csv(path, index=False)
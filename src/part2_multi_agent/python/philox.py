@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Générateur à compteur Philox4x32-10 commun aux trois langages
+
+Référence Python de src/part2_multi_agent/common/philox.h (option
+--rng philox) : chaque tirage est une fonction de (graine, jour, agent),
+calculée en bloc avec NumPy ou agent par agent dans les noyaux Numba
+(ma_seirs_numba.py compile philox4x32_10 et les conversions ci-dessous),
+avec les mêmes conversions qu'en C et C++. Le schéma (blocs, ordre des mots)
+est décrit dans philox.h ; à graine égale, les moteurs loop et numba
+donnent les mêmes trajectoires que les programmes C et C++ lancés avec
+--rng philox.
+
+Les valeurs sont manipulées en uint64 (< 2^32) : les produits 32 x 32 bits
+tiennent sans débordement, en NumPy comme en Numba.
+"""
+
+import numpy as np
+
+from ma_seirs import SUS, EXP, INF, REM, pos_dtype
+from sparse_grid import count_infectious
+
+M0 = np.uint64(0xD2511F53)
+M1 = np.uint64(0xCD9E8D57)
+W0 = np.uint64(0x9E3779B9)
+W1 = np.uint64(0xBB67AE85)
+MASK32 = np.uint64(0xFFFFFFFF)
+SHIFT32 = np.uint64(32)
+
+
+def philox4x32_10(c0, c1, c2, c3, k0, k1):
+    """10 tours de Philox4x32 ; scalaires ou tableaux NumPy uint64 (< 2^32)."""
+    for r in range(10):
+        if r > 0:
+            k0 = (k0 + W0) & MASK32
+            k1 = (k1 + W1) & MASK32
+        p0 = M0 * c0
+        p1 = M1 * c2
+        n0 = (p1 >> SHIFT32) ^ c1 ^ k0
+        n2 = (p0 >> SHIFT32) ^ c3 ^ k1
+        c1 = p1 & MASK32
+        c3 = p0 & MASK32
+        c0 = n0
+        c2 = n2
+    return c0, c1, c2, c3
+
+
+def agent_blocks(seed: int, N: int, day: int, block: int):
+    """Tirages en bloc : le bloc `block` du jour `day` pour les agents 0..N-1."""
+    agents = np.arange(N, dtype=np.uint64)
+
+    def full(v):
+        return np.full(N, v, dtype=np.uint64)
+
+    return philox4x32_10(agents, full(day), full(block), full(0), np.uint64(seed), np.uint64(0))
+
+
+def u53_vec(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return ((a >> np.uint64(5)).astype(np.float64) * 67108864.0
+            + (b >> np.uint64(6)).astype(np.float64)) * (1.0 / 9007199254740992.0)
+
+
+def below_vec(w: np.ndarray, n: int) -> np.ndarray:
+    return ((w * np.uint64(n)) >> SHIFT32).astype(np.int64)
+
+
+def sort_order(w0: np.ndarray, w1: np.ndarray) -> np.ndarray:
+    """Indices triés par clé (w0 << 32 | w1), puis par indice (tri stable)."""
+    return np.argsort((w0 << SHIFT32) | w1, kind="stable").astype(np.int32)
+
+
+def check_seed(seed) -> int:
+    if isinstance(seed, np.random.SeedSequence):
+        return int(seed.generate_state(1, np.uint32)[0])
+    seed = int(seed)
+    if not 0 <= seed < 2**32:
+        raise ValueError(f"Graine hors de [0, 2^32) pour --rng philox : {seed}")
+    return seed
+
+
+def init_draws(p):
+    """
+    Tirages du jour 0 : renvoie (states, uE, uI, uR, x, y) ; les durées
+    valent -mean * log(1 - U), comme neg_exp.
+    """
+    seed = check_seed(p.seed)
+    w = agent_blocks(seed, p.N, 0, 0)
+    rank = sort_order(w[0], w[1])
+    states = np.empty(p.N, dtype=np.int8)
+    bounds = np.cumsum([0, p.init_S, p.init_E, p.init_I])
+    for st, a, b in zip((SUS, EXP, INF), bounds[:-1], bounds[1:]):
+        states[rank[a:b]] = st
+    states[rank[bounds[-1]:]] = REM
+
+    x = below_vec(w[2], p.L).astype(pos_dtype(p.L))
+    y = below_vec(w[3], p.L).astype(pos_dtype(p.L))
+    b1 = agent_blocks(seed, p.N, 0, 1)
+    b2 = agent_blocks(seed, p.N, 0, 2)
+    return states, u53_vec(b1[0], b1[1]), u53_vec(b1[2], b1[3]), u53_vec(b2[0], b2[1]), x, y
+
+
+class PhiloxGenerator:
+    """
+    Remplace np.random.Generator dans les moteurs loop et vectorized.
+
+    shuffle(order) passe au jour suivant : `order` reçoit l'ordre de passage
+    du jour et tous les tirages du jour sont calculés en bloc (indexés par
+    agent). Ensuite :
+    - moteur loop : select(i) avant chaque agent ; integers() renvoie nx,
+      ny puis le second essai, random() l'uniforme d'infection ;
+    - moteur vectorized : integers(size=N) / random(N) renvoient les mêmes
+      valeurs rangées dans l'ordre de passage.
+    """
+
+    def __init__(self, seed, L: int, N: int):
+        self.seed = check_seed(seed)
+        self.L = L
+        self.N = N
+        self.day = 0
+        self._agent = 0
+        self._next = 0
+        self._order = None
+        self._ints = None
+        self._u = None
+
+    def shuffle(self, order: np.ndarray):
+        self.day += 1
+        b0 = agent_blocks(self.seed, self.N, self.day, 0)
+        b1 = agent_blocks(self.seed, self.N, self.day, 1)
+        order[:] = sort_order(b0[0], b0[1])
+        self._order = order.copy()
+        self._ints = np.stack([below_vec(b0[2], self.L), below_vec(b0[3], self.L),
+                               below_vec(b1[0], self.L), below_vec(b1[1], self.L)])
+        self._u = u53_vec(b1[2], b1[3])
+        self._next = 0
+
+    def select(self, i: int):
+        self._agent = i
+        self._next = 0
+
+    def integers(self, low, high=None, size=None, dtype=np.int64):
+        if high is None or low != 0 or high != self.L:
+            raise ValueError("PhiloxGenerator : seuls les tirages de positions [0, L) sont prévus")
+        k = self._next % 4
+        self._next += 1
+        if size is None:
+            return int(self._ints[k, self._agent])
+        return self._ints[k, self._order].astype(dtype)
+
+    def random(self, size=None):
+        if size is None:
+            return float(self._u[self._agent])
+        return self._u[self._order]
+
+
+def init_population(p, sparse: bool = False):
+    """Équivalent de ma_seirs.init_population avec les tirages Philox."""
+    states, uE, uI, uR, x, y = init_draws(p)
+    dE = -p.mean_dE * np.log(1.0 - uE)
+    dI = -p.mean_dI * np.log(1.0 - uI)
+    dR = -p.mean_dR * np.log(1.0 - uR)
+    t_in_state = np.zeros(p.N, dtype=np.int16)
+    inf = states == INF
+    Icount = count_infectious(p.L, x[inf], y[inf], sparse)
+    return PhiloxGenerator(p.seed, p.L, p.N), states, t_in_state, dE, dI, dR, x, y, Icount
+
+
+def init_store(p):
+    """Équivalent de agent_store.init_store avec les tirages Philox."""
+    from agent_store import AgentStore, thresholds
+
+    rng, states, _, dE, dI, dR, x, y, Icount = init_population(p)
+    cell = x.astype(np.uint32) * np.uint32(p.L) + y.astype(np.uint32)
+    store = AgentStore(packed=states.astype(np.uint16), kE=thresholds(dE), kI=thresholds(dI),
+                       kR=thresholds(dR), cell=cell, recovered=np.zeros(p.N, dtype=np.bool_))
+    return rng, store, Icount
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 from pathlib import Path
 import glob
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from convert_runs_part2 import read_counts_csv
+from online_stats import EnsembleStats
+
 N = 20000
 TMAX = 100  # 0..100 jours (comme l'exemple)
 DATA = Path("data/part2_multi_agent")
@@ -29,22 +33,16 @@ def compute_c_mean_I_from_runs():
     if len(files) != 30:
         print(f"[WARN] {len(files)} fichiers détectés (attendu: 30).")
 
-    # Charger tous les runs et empiler I(t)
-    Is = []
-    t_ref = None
+    # Accumuler les runs un par un (read_counts_csv vérifie l'alignement de t)
+    stats = EnsembleStats(TMAX + 1)
     for f in files:
-        df = pd.read_csv(f)
-        df = df[df["t"] <= TMAX].copy()
-        if t_ref is None:
-            t_ref = df["t"].to_numpy()
-        else:
-            # sécurité: s'assurer que t est aligné
-            if not (df["t"].to_numpy() == t_ref).all():
-                raise ValueError(f"Temps t non aligné dans {f}")
-        Is.append(df["I"].to_numpy())
+        counts = read_counts_csv(Path(f))
+        if len(counts) <= TMAX:
+            raise ValueError(f"Moins de {TMAX + 1} jours dans {f}")
+        stats.update(counts[:TMAX + 1])
 
-    I_mean = (pd.DataFrame(Is).mean(axis=0).to_numpy()) / N
-    return t_ref, I_mean
+    I_mean = stats.mean[:, 2] / N
+    return np.arange(TMAX + 1), I_mean
 
 def main():
     # Python mean (3 reps)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Lancement de R réplications du modèle multi-agent (Python)
+
+- Réplications réparties sur tous les cœurs (pool de processus ; pour le
+  moteur C++ appelé en place, --engine cpp, pool de threads : le GIL est
+  relâché et chaque simulation écrit directement dans sa ligne du tableau
+  consolidé, voir ma_seirs_cpp.py)
+- Flux aléatoires indépendants : np.random.SeedSequence(seed).spawn(R)
+  (la réplication k utilise SeedSequence(seed, spawn_key=(k,)))
+- Sortie consolidée au format de trajectories.py : tableau int32
+  (R, T+1, 4) dans un .npy mémoire-mappé, rempli au fil de l'eau, avec ses
+  métadonnées, plus un masque <out>.done.npy des réplications terminées
+- Reprise : relancer la même commande ne calcule que les réplications
+  manquantes
+- Option : un CSV t,S,E,I,R par réplication (--csv-dir), python_rep<k>.csv
+  ou cpp_rep<k>.csv selon le moteur
+- Option : statistiques d'ensemble en ligne (--stats, voir online_stats.py),
+  alimentées réplication par réplication
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import os
+import time
+
+import numpy as np
+
+import trajectories
+from ma_seirs import ENGINES, Params, simulate, stop_meta, write_csv
+from ma_seirs_cpp import cpp_seed, simulate_cpp
+from online_stats import EnsembleStats
+
+
+def run_rep(k: int, p: Params, engine: str, n_batches: int, out: np.ndarray = None,
+            steady_tol: float = 0.0):
+    """Renvoie (k, effectifs, arrêt anticipé éventuel : voir ma_seirs.stop_meta)."""
+    info = {}
+    if engine == "cpp":
+        counts = simulate_cpp(p, out=out, steady_tol=steady_tol, info=info)
+    else:
+        counts = simulate(p, engine=engine, n_batches=n_batches, steady_tol=steady_tol, info=info)
+    return k, counts, stop_meta(info)
+
+
+def done_path(out: Path) -> Path:
+    return out.with_name(out.stem + ".done.npy")
+
+
+def open_store(out: Path, reps: int, T: int, meta: list):
+    """
+    Ouvre (ou crée) le tableau consolidé et son masque de réplications
+    terminées. Un lot existant n'est repris que si ses dimensions, et le
+    moteur, l'horizon et la graine de chaque réplication (métadonnées),
+    correspondent.
+    """
+    shape = (reps, T + 1, 4)
+    dpath = done_path(out)
+
+    if out.exists() and dpath.exists():
+        data = np.lib.format.open_memmap(out, mode="r+")
+        done = np.lib.format.open_memmap(dpath, mode="r+")
+        if data.shape != shape or done.shape != (reps,):
+            raise ValueError(f"{out} existe avec des dimensions {data.shape}, "
+                             f"attendu {shape} (utiliser --overwrite)")
+        stored = trajectories.read_meta(out)["reps"]
+        keys = [(m.get("engine"), m.get("params", {}).get("T"), m.get("seed")) for m in stored]
+        expected = [(m["engine"], m["params"]["T"], m["seed"]) for m in meta]
+        if keys != expected:
+            raise ValueError(f"{out} existe avec un autre moteur, horizon ou graine "
+                             f"que le lot demandé (utiliser --overwrite)")
+        return data, done
+
+    data = trajectories.create(out, reps, T, meta)
+    done = np.lib.format.open_memmap(dpath, mode="w+", dtype=np.bool_, shape=(reps,))
+    return data, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réplications SEIRS multi-agent (Partie 2)")
+    parser.add_argument("--reps", type=int, default=30, help="Nombre de réplications R")
+    parser.add_argument("--seed", type=int, default=12345,
+                        help="Graine racine (SeedSequence)")
+    parser.add_argument("--T", type=int, default=730, help="Nombre d'itérations (jours)")
+    parser.add_argument("--engine", choices=ENGINES + ("cpp",), default="numba",
+                        help="Moteur de simulation (cpp : moteur C++ appelé en place)")
+    parser.add_argument("--batches", type=int, default=100,
+                        help="Nombre de sous-lots par jour (moteur vectorized)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Nombre de processus ou threads (défaut : tous les cœurs)")
+    parser.add_argument("--out", type=str, default=None,
+                        help="Tableau consolidé (R, T+1, 4) ; défaut "
+                             "data/part2_multi_agent/<python|cpp>_reps.npy selon le moteur")
+    parser.add_argument("--csv-dir", type=str, default=None,
+                        help="Si donné, écrit aussi un CSV par réplication dans ce dossier")
+    parser.add_argument("--stats", type=str, default=None,
+                        help="Si donné, CSV des moyennes/écarts-types/quantiles journaliers")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Recommencer le lot au lieu de le reprendre")
+    parser.add_argument("--steady-tol", type=float, default=0.0,
+                        help="Arrêt en régime stationnaire (voir ma_seirs.py ; 0 = désactivé)")
+    args = parser.parse_args()
+
+    # préfixe des fichiers selon le langage (groupes de analysis_pipeline_part2.py)
+    prefix = "cpp" if args.engine == "cpp" else "python"
+    out = Path(args.out) if args.out else Path(f"data/part2_multi_agent/{prefix}_reps.npy")
+    if args.overwrite:
+        out.unlink(missing_ok=True)
+        done_path(out).unlink(missing_ok=True)
+        trajectories.meta_path(out).unlink(missing_ok=True)
+
+    children = np.random.SeedSequence(args.seed).spawn(args.reps)
+    params = [Params(seed=children[k], T=args.T) for k in range(args.reps)]
+    if args.engine == "cpp":
+        meta = [trajectories.rep_meta("cpp", q, cpp_seed=cpp_seed(q.seed)) for q in params]
+    else:
+        meta = [trajectories.rep_meta(f"python-{args.engine}", q) for q in params]
+    data, done = open_store(out, args.reps, args.T, meta)
+    todo = [k for k in range(args.reps) if not done[k]]
+    print(f"{args.reps - len(todo)}/{args.reps} réplications déjà présentes, "
+          f"{len(todo)} à calculer ({args.workers} "
+          f"{'threads' if args.engine == 'cpp' else 'processus'})")
+
+    csv_dir = Path(args.csv_dir) if args.csv_dir else None
+    stats = EnsembleStats(args.T + 1) if args.stats else None
+    if stats is not None:
+        for k in range(args.reps):  # réplications reprises d'un lot précédent
+            if done[k]:
+                stats.update(data[k])
+
+    t0 = time.perf_counter()
+    n_done = 0
+    n_stopped = 0  # réplications arrêtées avant T (extinction, régime stationnaire)
+    reps_meta = trajectories.read_meta(out)["reps"]
+
+    in_place = args.engine == "cpp"
+    executor = ThreadPoolExecutor if in_place else ProcessPoolExecutor
+    with executor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_rep, k, params[k], args.engine, args.batches,
+                               data[k] if in_place else None, args.steady_tol)
+                   for k in todo]
+        for fut in as_completed(futures):
+            k, counts, stopped = fut.result()
+            if not in_place:
+                data[k] = counts
+            data.flush()
+            if stopped:  # métadonnées écrites avant de marquer la réplication faite
+                reps_meta[k].update(stopped)
+                trajectories.write_meta(out, reps_meta)
+                n_stopped += 1
+            done[k] = True
+            done.flush()
+            if csv_dir is not None:
+                write_csv(csv_dir / f"{prefix}_rep{k + 1:02d}.csv", counts)
+            if stats is not None:
+                stats.update(counts)
+
+            n_done += 1
+            elapsed = time.perf_counter() - t0
+            print(f"[{n_done}/{len(todo)}] réplication {k + 1:02d} terminée "
+                  f"({n_done / elapsed * 3600:.1f} rép./h)")
+
+    if n_stopped:
+        print(f"{n_stopped} réplication(s) arrêtée(s) avant T "
+              f"(extinction ou régime stationnaire)")
+
+    elapsed = time.perf_counter() - t0
+    if n_done:
+        print(f"Débit : {n_done / elapsed * 3600:.1f} réplications/heure "
+              f"({elapsed:.1f} s pour {n_done})")
+    if stats is not None:
+        stats.save(Path(args.stats))
+        print("OK ->", args.stats)
+    print("Terminé ->", out)
+
+
+if __name__ == "__main__":
+    main()
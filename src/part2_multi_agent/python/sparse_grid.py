@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Grilles Icount / NIgrid creuses pour les très grands réseaux
+
+Les grilles denses L x L (Icount int16, NIgrid int32 : 6 octets par
+cellule) dépassent la mémoire pour L de l'ordre de 50 000, alors que seules
+les cellules occupées par un infectieux (Icount) ou voisines d'une telle
+cellule (NIgrid) sont non nulles. SparseCounts ne garde que ces cellules,
+dans un dictionnaire cellule x * L + y -> effectif : la mémoire dépend du
+nombre d'infectieux, pas de L².
+
+SparseCounts s'indexe comme les grilles denses là où les moteurs loop et
+vectorized les lisent (grid[x, y], grid[xs, ys] avec des tableaux) ; les
+mises à jour passent par add / add_box / add_at (voir add_infectious et
+add_infectious_vec de ma_seirs.py). N_I est le même qu'avec les grilles
+denses : les trajectoires ne dépendent pas du choix de la grille.
+
+Choix automatique (grid="auto") : grilles creuses quand L² > SPARSE_RATIO * N,
+c.-à-d. quand il y a en moyenne moins d'un agent pour SPARSE_RATIO
+cellules (chaque infectieux touche au plus 9 cellules de NIgrid).
+"""
+
+import numpy as np
+
+GRIDS = ("auto", "dense", "sparse")
+SPARSE_RATIO = 64
+
+# Décalages du voisinage 3x3, cellule centrale comprise
+_BOX = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def use_sparse(L: int, N: int, grid: str = "auto") -> bool:
+    if grid not in GRIDS:
+        raise ValueError(f"Grille inconnue: {grid} (attendu: {', '.join(GRIDS)})")
+    if grid == "auto":
+        return L * L > SPARSE_RATIO * N
+    return grid == "sparse"
+
+
+class SparseCounts:
+    """Grille L x L creuse : dictionnaire cellule x * L + y -> effectif non nul."""
+
+    def __init__(self, L: int, cells: dict = None):
+        self.L = L
+        self.cells = {} if cells is None else cells
+
+    def _key(self, x, y) -> int:
+        return int(x) * self.L + int(y)
+
+    def __getitem__(self, xy):
+        x, y = xy
+        if np.ndim(x) == 0:
+            return self.cells.get(self._key(x, y), 0)
+        keys = np.asarray(x, dtype=np.int64) * self.L + np.asarray(y, dtype=np.int64)
+        get = self.cells.get
+        return np.fromiter((get(k, 0) for k in keys.tolist()), dtype=np.int64, count=len(keys))
+
+    def __setitem__(self, xy, value):
+        key, value = self._key(*xy), int(value)
+        if value:
+            self.cells[key] = value
+        else:
+            self.cells.pop(key, None)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SparseCounts) and self.L == other.L and self.cells == other.cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def _add_key(self, key: int, d: int):
+        value = self.cells.get(key, 0) + d
+        if value:
+            self.cells[key] = value
+        else:
+            del self.cells[key]
+
+    def add(self, x, y, d: int):
+        self._add_key(self._key(x, y), d)
+
+    def add_box(self, x, y, d: int):
+        """Ajoute d aux 9 cellules du voisinage 3x3 de (x, y) (tore)."""
+        L, x, y = self.L, int(x), int(y)
+        for dx, dy in _BOX:
+            self._add_key(((x + dx) % L) * L + (y + dy) % L, d)
+
+    def add_at(self, x: np.ndarray, y: np.ndarray, d: np.ndarray):
+        """Comme np.add.at(grille, (x, y), d) (positions répétées autorisées)."""
+        keys = np.asarray(x, dtype=np.int64) * self.L + np.asarray(y, dtype=np.int64)
+        for key, v in zip(keys.tolist(), np.broadcast_to(d, keys.shape).tolist()):
+            self._add_key(key, v)
+
+    def box_sum(self) -> "SparseCounts":
+        """NIgrid creuse : sommes 3x3 (tore), comme ma_seirs.box_sum."""
+        out = SparseCounts(self.L)
+        for key, v in self.cells.items():
+            out.add_box(key // self.L, key % self.L, v)
+        return out
+
+    def to_arrays(self):
+        """(cellules croissantes int64, effectifs int32), p. ex. pour un instantané."""
+        keys = np.array(sorted(self.cells), dtype=np.int64)
+        return keys, np.array([self.cells[k] for k in keys.tolist()], dtype=np.int32)
+
+    @classmethod
+    def from_arrays(cls, L: int, keys: np.ndarray, values: np.ndarray) -> "SparseCounts":
+        return cls(L, {int(k): int(v) for k, v in zip(keys, values) if v})
+
+    @classmethod
+    def from_dense(cls, grid: np.ndarray) -> "SparseCounts":
+        L = grid.shape[0]
+        x, y = np.nonzero(grid)
+        return cls.from_arrays(L, x.astype(np.int64) * L + y, grid[x, y])
+
+    def to_dense(self, dtype=np.int16) -> np.ndarray:
+        grid = np.zeros((self.L, self.L), dtype=dtype)
+        keys, values = self.to_arrays()
+        grid.reshape(-1)[keys] = values
+        return grid
+
+
+def new_icount(L: int, sparse: bool = False):
+    """Grille Icount vide, dense (int16) ou creuse."""
+    return SparseCounts(L) if sparse else np.zeros((L, L), dtype=np.int16)
+
+
+def count_infectious(L: int, x: np.ndarray, y: np.ndarray, sparse: bool = False):
+    """Icount des infectieux placés en (x, y)."""
+    Icount = new_icount(L, sparse)
+    if sparse:
+        Icount.add_at(x, y, 1)
+    else:
+        np.add.at(Icount, (x, y), 1)
+    return Icount
+
+
+def same_counts(a, b) -> bool:
+    """Égalité de deux grilles de même type (mode --check-counts)."""
+    return a == b if isinstance(a, SparseCounts) else np.array_equal(a, b)
+
+
+def icount_arrays(Icount) -> dict:
+    """Tableaux d'un instantané : "Icount" (dense) ou "Icount_cells" / "Icount_values" (creuse)."""
+    if isinstance(Icount, SparseCounts):
+        keys, values = Icount.to_arrays()
+        return {"Icount_cells": keys, "Icount_values": values}
+    return {"Icount": Icount}
+
+
+def icount_from_arrays(arrays: dict, L: int, sparse: bool):
+    """Inverse de icount_arrays, converti au type de grille demandé."""
+    if "Icount" in arrays:
+        Icount = arrays["Icount"]
+        return SparseCounts.from_dense(Icount) if sparse else Icount
+    Icount = SparseCounts.from_arrays(L, arrays["Icount_cells"], arrays["Icount_values"])
+    return Icount if sparse else Icount.to_dense()
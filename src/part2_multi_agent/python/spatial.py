@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Instantanés spatiaux compressés du modèle multi-agent
+
+Tous les K jours (ma_seirs.py --spatial-every K), l'état spatial de la
+simulation est enregistré :
+- Icount : cellules occupées par au moins un infectieux (indice x * L + y,
+  uint32, uint64 si L > 65 535) et leurs effectifs (int16) ;
+- une carte de densité S,E,I,R sous-échantillonnée : nombre d'agents de
+  chaque état par bloc de B x B cellules, tableau int32 (4, R, R) avec
+  R = ceil(L / B) <= RASTER_MAX (B par défaut : BLOCK, agrandi pour les
+  grands L, voir default_block).
+
+Stockage : chaque tableau de chaque jour forme un bloc compressé (zlib)
+indépendant, ajouté à la fin de <nom>.spatial ; l'index des blocs
+(jour -> décalage, taille) est écrit dans l'en-tête <nom>.spatial.json
+à la fermeture :
+    {"format": "seirs-spatial", "version": 1, "L": ..., "block": B,
+     "cell_dtype": "uint32", "raster_shape": [4, R, R],
+     "columns": ["S","E","I","R"],
+     "compression": "zlib", "meta": {...},
+     "days": [{"day": t, "cells": [offset, nbytes, n], "values": [...],
+               "raster": [offset, nbytes]}, ...]}
+SpatialReader projette le fichier en mémoire (np.memmap) et ne
+décompresse que les blocs du jour demandé : accès direct à n'importe quel
+jour, quelle que soit la longueur de la simulation.
+
+SpatialWriter : la simulation ne fait que l'extraction (O(N) par
+instantané) ; la compression et l'écriture ont lieu dans un thread dédié
+(zlib relâche le GIL), alimenté par une file bornée.
+
+En ligne de commande, résumé d'un fichier et export d'un jour :
+    python src/part2_multi_agent/python/spatial.py data/part2_multi_agent/python_rep01.spatial \\
+        --day 100 --out day_100.npz
+"""
+
+from pathlib import Path
+import argparse
+import json
+import queue
+import threading
+import zlib
+
+import numpy as np
+
+from sparse_grid import SparseCounts
+
+FORMAT = "seirs-spatial"
+VERSION = 1
+COLUMNS = ["S", "E", "I", "R"]
+BLOCK = 10
+RASTER_MAX = 1024   # côté max. de la carte (4 x 1024² x int32 = 16 Mo)
+LEVEL = 1
+QUEUE_SIZE = 8
+
+VALUE_DTYPE = np.int16
+RASTER_DTYPE = np.int32
+
+
+def cell_dtype(L: int):
+    """Indices de cellule x * L + y : uint32 tant que L² < 2^32."""
+    return np.uint32 if L <= 65535 else np.uint64
+
+
+def header_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".json")
+
+
+def raster_size(L: int, block: int) -> int:
+    return -(-L // block)
+
+
+def default_block(L: int) -> int:
+    """BLOCK, ou le plus petit bloc tel que R <= RASTER_MAX."""
+    return max(BLOCK, -(-L // RASTER_MAX))
+
+
+def density_raster(states: np.ndarray, x: np.ndarray, y: np.ndarray, L: int, block: int) -> np.ndarray:
+    """Nombre d'agents de chaque état par bloc de block x block cellules : (4, R, R)."""
+    R = raster_size(L, block)
+    key = (states.astype(np.int64) * R + x // block) * R + y // block
+    return np.bincount(key, minlength=4 * R * R).astype(RASTER_DTYPE).reshape(4, R, R)
+
+
+def occupied_cells(Icount, L: int):
+    """(cellules x * L + y, effectifs) non nuls d'une grille dense ou creuse."""
+    if isinstance(Icount, SparseCounts):
+        cells, values = Icount.to_arrays()
+    else:
+        cells = np.flatnonzero(Icount)
+        values = Icount.reshape(-1)[cells]
+    return cells.astype(cell_dtype(L)), values.astype(VALUE_DTYPE)
+
+
+class SpatialWriter:
+    """
+    Callback spatial(t, states, x, y, Icount) de ma_seirs.simulate ; à
+    fermer (close, ou bloc with) pour écrire l'index.
+    """
+
+    def __init__(self, path: Path, L: int, block: int = None, meta: dict = None,
+                 level: int = LEVEL, queue_size: int = QUEUE_SIZE):
+        if block is None:
+            block = default_block(L)
+        if block < 1:
+            raise ValueError(f"Taille de bloc invalide : {block}")
+        if raster_size(L, block) > RASTER_MAX:
+            raise ValueError(f"Carte de densité trop grande : {raster_size(L, block)}² blocs "
+                             f"(max {RASTER_MAX}², bloc >= {default_block(L)} pour L = {L})")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.L, self.block, self.level = L, block, level
+        self.meta = meta or {}
+        self.index = []
+        self._file = self.path.open("wb")
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def __call__(self, t: int, states: np.ndarray, x: np.ndarray, y: np.ndarray, Icount):
+        if self._error is not None:
+            raise RuntimeError(f"Écriture de {self.path} interrompue : {self._error}")
+        cells, values = occupied_cells(Icount, self.L)
+        raster = density_raster(states, x, y, self.L, self.block)
+        self._queue.put((t, cells, values, raster))
+
+    def _block(self, a: np.ndarray) -> list:
+        data = zlib.compress(np.ascontiguousarray(a).tobytes(), self.level)
+        offset = self._file.tell()
+        self._file.write(data)
+        return [offset, len(data)]
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue  # vide la file sans écrire
+            t, cells, values, raster = item
+            try:
+                self.index.append({"day": int(t), "cells": self._block(cells) + [len(cells)],
+                                   "values": self._block(values), "raster": self._block(raster)})
+            except Exception as e:  # relancée dans le thread de la simulation
+                self._error = e
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise RuntimeError(f"Écriture de {self.path} interrompue : {self._error}")
+        R = raster_size(self.L, self.block)
+        header = {"format": FORMAT, "version": VERSION, "L": self.L, "block": self.block,
+                  "cell_dtype": np.dtype(cell_dtype(self.L)).name, "raster_shape": [4, R, R],
+                  "columns": COLUMNS, "compression": "zlib", "meta": self.meta, "days": self.index}
+        header_path(self.path).write_text(json.dumps(header), encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SpatialReader:
+    """Accès direct aux instantanés d'un fichier écrit par SpatialWriter."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header = json.loads(header_path(self.path).read_text(encoding="utf-8"))
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"Format inattendu dans {header_path(self.path)}: "
+                             f"{self.header.get('format')}")
+        self.L = self.header["L"]
+        self.block = self.header["block"]
+        self.cell_dtype = np.dtype(self.header.get("cell_dtype", "uint32"))
+        self.meta = self.header["meta"]
+        self._entries = {e["day"]: e for e in self.header["days"]}
+        size = self.path.stat().st_size
+        self._data = np.memmap(self.path, dtype=np.uint8, mode="r") if size else np.zeros(0, np.uint8)
+
+    @property
+    def days(self) -> list:
+        return sorted(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, day: int) -> bool:
+        return day in self._entries
+
+    def _entry(self, day: int) -> dict:
+        try:
+            return self._entries[day]
+        except KeyError:
+            raise KeyError(f"Pas d'instantané au jour {day} dans {self.path}") from None
+
+    def _read(self, ref: list, dtype) -> np.ndarray:
+        offset, nbytes = ref[0], ref[1]
+        return np.frombuffer(zlib.decompress(self._data[offset:offset + nbytes]), dtype=dtype)
+
+    def icount_cells(self, day: int):
+        """(cellules x * L + y, effectifs) des cellules occupées par un infectieux."""
+        e = self._entry(day)
+        return self._read(e["cells"], self.cell_dtype), self._read(e["values"], VALUE_DTYPE)
+
+    def icount(self, day: int, sparse: bool = False):
+        """Icount du jour : grille dense L x L (int16) ou SparseCounts."""
+        cells, values = self.icount_cells(day)
+        Icount = SparseCounts.from_arrays(self.L, cells, values)
+        return Icount if sparse else Icount.to_dense()
+
+    def raster(self, day: int) -> np.ndarray:
+        """Densités S,E,I,R par bloc : (4, R, R)."""
+        return self._read(self._entry(day)["raster"], RASTER_DTYPE).reshape(self.header["raster_shape"])
+
+    def __getitem__(self, day: int) -> dict:
+        cells, values = self.icount_cells(day)
+        return {"Icount_cells": cells, "Icount_values": values, "raster": self.raster(day)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantanés spatiaux multi-agent (Partie 2)")
+    parser.add_argument("store", type=str, help="Fichier .spatial (en-tête .spatial.json)")
+    parser.add_argument("--day", type=int, default=None, help="Jour à extraire")
+    parser.add_argument("--out", type=str, default=None,
+                        help="Archive .npz du jour (Icount_cells, Icount_values, raster)")
+    args = parser.parse_args()
+
+    reader = SpatialReader(Path(args.store))
+    days = reader.days
+    print(f"{args.store} : L = {reader.L}, blocs {reader.block}x{reader.block}, "
+          f"{len(days)} instantanés" + (f" (jours {days[0]} à {days[-1]})" if days else ""))
+    if args.day is None:
+        return
+    snap = reader[args.day]
+    I = snap["raster"][COLUMNS.index("I")]
+    print(f"Jour {args.day} : {int(snap['Icount_values'].sum())} infectieux "
+          f"sur {len(snap['Icount_cells'])} cellules, bloc le plus touché : {int(I.max())}")
+    if args.out:
+        np.savez_compressed(args.out, **snap)
+        print("OK ->", args.out)
+
+
+if __name__ == "__main__":
+    main()
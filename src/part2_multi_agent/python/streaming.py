@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Simulation en flux : états journaliers et puits (sinks)
+
+ma_seirs.iter_days (multi-agent) et seirs_part1.iter_states (ODE) sont des
+générateurs : chaque état (DayState) est produit dès qu'il est calculé, sans
+tableau de la trajectoire complète côté appelant. Le consommateur peut
+s'arrêter à tout moment (break : la simulation n'avance plus), calculer des
+statistiques au fil de l'eau ou transmettre les états à des puits :
+- CsvSink : une ligne par état (t,S,E,I,R, ou l'incidence) ;
+- BinarySink : format binaire de trajectories.py, rempli jour par jour
+  dans le tableau mémoire-mappé ;
+- StreamStats : moyenne, variance et pic de chaque compartiment, en O(1)
+  mémoire ;
+- MemorySink : conserve les états (p. ex. pour une figure).
+consume(états, *puits) envoie chaque état à tous les puits ; astream(états)
+en fait un générateur asynchrone (chaque état est calculé dans un thread,
+la boucle d'événements reste libre), p. ex. pour un service :
+    async for s in astream(iter_days(p, engine="event")):
+        ...
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+import asyncio
+import csv
+
+import numpy as np
+
+from online_stats import welford_update
+import trajectories
+
+COLUMNS = ["S", "E", "I", "R"]
+
+
+@dataclass
+class DayState:
+    t: float                        # jour (pas de temps pour l'ODE)
+    y: np.ndarray                   # S,E,I,R (effectifs ou proportions), copie
+    incidence: np.ndarray = None    # nouvelles infections, guérisons, réinfections
+    simulated: bool = True          # False : jour rempli après un arrêt anticipé
+
+
+class CsvSink:
+    """CSV écrit au fil de l'eau : t puis `field` (y ou incidence) de chaque état."""
+
+    def __init__(self, path: Path, columns=("t", *COLUMNS), field: str = "y",
+                 lineterminator: str = "\n"):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.field = field
+        self._f = path.open("w", newline="", encoding="utf-8")
+        self._w = csv.writer(self._f, lineterminator=lineterminator)
+        self._w.writerow(columns)
+
+    def write(self, s: DayState):
+        self._w.writerow([s.t, *getattr(s, self.field)])
+
+    def close(self):
+        self._f.close()
+
+
+class BinarySink:
+    """
+    Une réplication (1, T+1, 4) au format de trajectories.py, écrite jour par
+    jour ; `meta` (rep_meta) peut être complété avant close.
+    """
+
+    def __init__(self, path: Path, T: int, meta: dict):
+        self.path = Path(path)
+        self.meta = meta
+        self._data = trajectories.create(self.path, 1, T, [meta])
+
+    def write(self, s: DayState):
+        self._data[0, s.t] = s.y
+
+    def close(self):
+        if self._data is None:
+            return
+        self._data.flush()
+        self._data = None
+        trajectories.write_meta(self.path, [self.meta])
+
+
+class StreamStats:
+    """Moyenne et variance (Welford) et pic de chaque compartiment sur les états reçus."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = np.zeros(4)
+        self.M2 = np.zeros(4)
+        self.peak = np.full(4, -np.inf)
+        self.peak_t = [None] * 4
+
+    def write(self, s: DayState):
+        y = np.asarray(s.y, dtype=np.float64)
+        self.n += 1
+        welford_update(self.n, self.mean, self.M2, y)
+        for k in np.flatnonzero(y > self.peak):
+            self.peak[k], self.peak_t[k] = y[k], s.t
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.M2 / (self.n - 1) if self.n > 1 else np.zeros(4)
+
+    def summary(self) -> dict:
+        return {c: {"mean": float(self.mean[k]), "std": float(np.sqrt(self.var[k])),
+                    "peak": float(self.peak[k]), "peak_t": self.peak_t[k]}
+                for k, c in enumerate(COLUMNS)}
+
+    def close(self):
+        pass
+
+
+class MemorySink:
+    """Conserve les états : arrays() renvoie t (n,) et y (n, 4)."""
+
+    def __init__(self):
+        self.states = []
+
+    def write(self, s: DayState):
+        self.states.append(s)
+
+    def arrays(self):
+        return (np.array([s.t for s in self.states]),
+                np.array([s.y for s in self.states]).reshape(-1, 4))
+
+    def close(self):
+        pass
+
+
+def consume(states, *sinks) -> int:
+    """Envoie chaque état à tous les puits (sans les fermer) ; renvoie le nombre d'états."""
+    n = 0
+    for s in states:
+        for sink in sinks:
+            sink.write(s)
+        n += 1
+    return n
+
+
+async def astream(states):
+    """Générateur asynchrone : chaque état est calculé dans un thread (asyncio.to_thread)."""
+    it = iter(states)
+    done = object()
+    while True:
+        s = await asyncio.to_thread(next, it, done)
+        if s is done:
+            return
+        yield s
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Balayages de paramètres du modèle multi-agent, avec cache des résultats
+
+Un balayage est un plan d'expériences sur les champs de Params
+(inf_force, mean_dE, mean_dI, mean_dR, N, L), croisé avec une liste de
+graines :
+- "grid"  : produit cartésien de listes de valeurs (name=v1,v2,...) ;
+- "lhs"   : hypercube latin de n points dans des intervalles (name=lo:hi) ;
+- "sobol" : n premiers points d'une suite de Sobol brouillée (name=lo:hi),
+  de préférence avec n puissance de 2.
+N et L sont arrondis à l'entier ; quand N varie, init_E, init_I et init_R
+restent ceux de Params et init_S = N - init_E - init_I - init_R.
+
+Chaque simulation est mémorisée dans un cache sur disque (ResultCache),
+indexé par le hash SHA-256 de (moteur, version du moteur, paramètres
+complets avec la graine, options qui changent la trajectoire). La version
+du moteur est le hash de ses fichiers sources : modifier un moteur invalide
+ses entrées. Le cache est borné en taille ; au-delà, les entrées utilisées
+le moins récemment (date de modification, remise à jour à chaque lecture)
+sont supprimées.
+
+Relancer un balayage étendu (plus de valeurs, plus de graines, suite de
+Sobol plus longue) ne calcule que les nouveaux points. Un hypercube latin
+de taille n + k ne contient pas celui de taille n : ses points sont tous
+nouveaux.
+
+Exemple :
+    python src/part2_multi_agent/python/sweep.py --design sobol --n 64 \\
+        --param inf_force=0.2:0.8 --param mean_dI=4:10 --seeds 1 2 3 \\
+        --out data/part2_multi_agent/sweep.npy
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from pathlib import Path
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+import trajectories
+from ma_seirs import ENGINES, Params, simulate, stop_meta
+from ma_seirs_cpp import SOURCES as CPP_SOURCES, simulate_cpp
+
+PY_DIR = Path(__file__).resolve().parent
+
+DESIGNS = ("grid", "lhs", "sobol")
+SWEEP_PARAMS = ("inf_force", "mean_dE", "mean_dI", "mean_dR", "N", "L")
+INT_PARAMS = ("N", "L")
+
+# Fichiers sources dont dépend chaque moteur (version = hash de leur contenu)
+ENGINE_SOURCES = {
+    "loop": ("ma_seirs.py", "philox.py", "sparse_grid.py"),
+    "vectorized": ("ma_seirs.py", "philox.py", "sparse_grid.py"),
+    "numba": ("ma_seirs.py", "agent_store.py", "philox.py", "ma_seirs_numba.py"),
+    "event": ("ma_seirs.py", "agent_store.py", "ma_seirs_event.py"),
+}
+
+
+# =========================
+# Plans d'expériences
+# =========================
+def parse_param(text: str):
+    """'name=v1,v2' -> (name, [v1, v2]) ; 'name=lo:hi' -> (name, (lo, hi))."""
+    name, sep, values = text.partition("=")
+    if not sep or name not in SWEEP_PARAMS:
+        raise ValueError(f"Paramètre invalide : {text!r} (attendu name=v1,v2 ou name=lo:hi, "
+                         f"name parmi {', '.join(SWEEP_PARAMS)})")
+    if ":" in values:
+        lo, hi = (float(v) for v in values.split(":"))
+        if not lo < hi:
+            raise ValueError(f"Intervalle vide pour {name} : {values}")
+        return name, (lo, hi)
+    return name, [float(v) for v in values.split(",")]
+
+
+def _cast(name, value):
+    return int(round(value)) if name in INT_PARAMS else float(value)
+
+
+def design_grid(space: dict) -> list:
+    """Produit cartésien : space = {name: [valeurs]}."""
+    names = list(space)
+    return [{n: _cast(n, v) for n, v in zip(names, values)}
+            for values in itertools.product(*(space[n] for n in names))]
+
+
+def design_sampled(kind: str, space: dict, n: int, seed: int = 0) -> list:
+    """
+    n points d'un hypercube latin (kind="lhs") ou d'une suite de Sobol
+    brouillée (kind="sobol") ; space = {name: (lo, hi)}, une valeur seule
+    [v] fixe le paramètre.
+    """
+    from scipy.stats import qmc
+
+    ranges = {k: v for k, v in space.items() if isinstance(v, tuple)}
+    if any(len(v) != 1 for k, v in space.items() if k not in ranges):
+        raise ValueError(f"Plan {kind} : intervalles lo:hi attendus (ou une valeur fixe)")
+    fixed = {k: v[0] for k, v in space.items() if k not in ranges}
+    if not ranges:
+        return [{k: _cast(k, v) for k, v in fixed.items()}]
+
+    names = list(ranges)
+    if kind == "lhs":
+        sampler = qmc.LatinHypercube(d=len(names), seed=seed)
+    else:
+        sampler = qmc.Sobol(d=len(names), scramble=True, seed=seed)
+    lo = np.array([ranges[k][0] for k in names])
+    hi = np.array([ranges[k][1] for k in names])
+    U = qmc.scale(sampler.random(n), lo, hi)
+    return [dict({k: _cast(k, v) for k, v in fixed.items()},
+                 **{k: _cast(k, u) for k, u in zip(names, row)}) for row in U]
+
+
+def make_params(point: dict, seed: int, T: int) -> Params:
+    p = Params(seed=seed, T=T, **point)
+    p.init_S = p.N - p.init_E - p.init_I - p.init_R
+    return p
+
+
+# =========================
+# Cache des résultats
+# =========================
+def engine_version(engine: str) -> str:
+    paths = CPP_SOURCES if engine == "cpp" else [PY_DIR / f for f in ENGINE_SOURCES[engine]]
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+def cache_key(engine: str, version: str, p: Params, **options) -> str:
+    params = asdict(p)
+    params["seed"] = trajectories.seed_to_json(p.seed)
+    payload = {"engine": engine, "version": version, "params": params, "options": options}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Trajectoires (T+1, 4) int32 sous <directory>/<ab>/<clé>.npy, avec les
+    métadonnées de la simulation dans <clé>.json. LRU par date de
+    modification ; evict() ramène la taille totale sous max_bytes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npy"
+
+    def get(self, key: str):
+        """(effectifs, métadonnées) ou None ; une lecture rafraîchit l'entrée."""
+        path = self._path(key)
+        try:
+            counts = np.load(path)
+            meta = json.loads(trajectories.meta_path(path).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)
+        return counts, meta
+
+    def put(self, key: str, counts: np.ndarray, meta: dict):
+        """Écriture dans des fichiers temporaires puis renommage (entrée complète ou absente)."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        mpath = trajectories.meta_path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.save(f, np.asarray(counts, dtype=np.int32))
+        mtmp = mpath.with_name(mpath.name + ".tmp")
+        mtmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(mtmp, mpath)
+        os.replace(tmp, path)
+
+    def entries(self) -> list:
+        """[(date d'utilisation, taille en octets, chemin .npy)] de toutes les entrées."""
+        out = []
+        for path in self.directory.glob("*/*.npy"):
+            try:
+                st = path.stat()
+                size = st.st_size + trajectories.meta_path(path).stat().st_size
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, size, path))
+        return out
+
+    def evict(self) -> int:
+        """Supprime les entrées les plus anciennes au-delà de max_bytes ; renvoie leur nombre."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            trajectories.meta_path(path).unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+# =========================
+# Exécution
+# =========================
+def run_point(p: Params, engine: str, n_batches: int, steady_tol: float):
+    """Effectifs (T+1, 4) et arrêt anticipé éventuel (voir ma_seirs.stop_meta)."""
+    info = {}
+    if engine == "cpp":
+        counts = simulate_cpp(p, steady_tol=steady_tol, info=info)
+    else:
+        counts = simulate(p, engine=engine, n_batches=n_batches, steady_tol=steady_tol, info=info)
+    return counts, stop_meta(info)
+
+
+def run_sweep(params: list, engine: str, cache: ResultCache, workers: int = 1,
+              n_batches: int = 100, steady_tol: float = 0.0, out: np.ndarray = None):
+    """
+    Simule chaque Params absent du cache et renvoie (effectifs (R, T+1, 4),
+    métadonnées par point, nombre de points lus dans le cache). Tous les
+    points doivent avoir le même horizon T.
+    """
+    T = params[0].T
+    if any(p.T != T for p in params):
+        raise ValueError("Tous les points d'un balayage doivent avoir le même T")
+    if out is None:
+        out = np.empty((len(params), T + 1, 4), dtype=np.int32)
+
+    version = engine_version(engine)
+    options = {"n_batches": n_batches} if engine == "vectorized" else {}
+    if steady_tol:
+        options["steady_tol"] = steady_tol
+    keys = [cache_key(engine, version, p, **options) for p in params]
+    name = "cpp" if engine == "cpp" else f"python-{engine}"
+
+    meta, todo = [None] * len(params), []
+    for k, key in enumerate(keys):
+        hit = cache.get(key)
+        if hit is None:
+            todo.append(k)
+        else:
+            out[k], meta[k] = hit
+
+    executor = ThreadPoolExecutor if engine == "cpp" else ProcessPoolExecutor
+    with executor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_point, params[k], engine, n_batches, steady_tol): k for k in todo}
+        for n_done, fut in enumerate(as_completed(futures), 1):
+            k = futures[fut]
+            counts, stopped = fut.result()
+            out[k] = counts
+            meta[k] = trajectories.rep_meta(name, params[k], cache_key=keys[k], **stopped)
+            cache.put(keys[k], counts, meta[k])
+            print(f"[{n_done}/{len(todo)}] point {k + 1} calculé")
+    return out, meta, len(params) - len(todo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage de paramètres du modèle multi-agent (Partie 2)")
+    parser.add_argument("--design", choices=DESIGNS, default="grid", help="Plan d'expériences")
+    parser.add_argument("--param", action="append", default=[],
+                        help="name=v1,v2,... (grid) ou name=lo:hi (lhs, sobol) ; "
+                             f"name parmi {', '.join(SWEEP_PARAMS)} (option répétable)")
+    parser.add_argument("--n", type=int, default=16, help="Nombre de points (lhs, sobol)")
+    parser.add_argument("--design-seed", type=int, default=0,
+                        help="Graine du plan (lhs, sobol)")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[12345],
+                        help="Graines des simulations, croisées avec chaque point du plan")
+    parser.add_argument("--T", type=int, default=730, help="Horizon (jours)")
+    parser.add_argument("--engine", choices=ENGINES + ("cpp",), default="numba",
+                        help="Moteur de simulation (cpp : moteur C++ appelé en place)")
+    parser.add_argument("--batches", type=int, default=100,
+                        help="Nombre de sous-lots par jour (moteur vectorized)")
+    parser.add_argument("--steady-tol", type=float, default=0.0,
+                        help="Arrêt en régime stationnaire (voir ma_seirs.py ; 0 = désactivé)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Nombre de processus ou threads (défaut : tous les cœurs)")
+    parser.add_argument("--cache-dir", type=str, default="data/part2_multi_agent/sweep_cache",
+                        help="Dossier du cache des résultats")
+    parser.add_argument("--cache-size", type=float, default=2.0,
+                        help="Taille maximale du cache (Go)")
+    parser.add_argument("--out", type=str, default="data/part2_multi_agent/sweep.npy",
+                        help="Trajectoires (points x graines, T+1, 4) au format de trajectories.py")
+    args = parser.parse_args()
+
+    try:
+        space = dict(parse_param(text) for text in args.param)
+        if args.design == "grid":
+            if any(isinstance(v, tuple) for v in space.values()):
+                raise ValueError("Plan grid : listes de valeurs attendues (name=v1,v2)")
+            points = design_grid(space)
+        else:
+            points = design_sampled(args.design, space, args.n, args.design_seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    params = [make_params(point, seed, args.T) for point in points for seed in args.seeds]
+    cache = ResultCache(Path(args.cache_dir), int(args.cache_size * 2**30))
+    print(f"{len(points)} points x {len(args.seeds)} graine(s) = {len(params)} simulations")
+
+    out = Path(args.out)
+    t0 = time.perf_counter()
+    data = trajectories.create(out, len(params), args.T)
+    data, meta, hits = run_sweep(params, args.engine, cache, args.workers, args.batches,
+                                 args.steady_tol, out=data)
+    data.flush()
+    trajectories.write_meta(out, meta)
+    removed = cache.evict()
+
+    print(f"{hits} simulation(s) lue(s) dans le cache, {len(params) - hits} calculée(s) "
+          f"en {time.perf_counter() - t0:.1f} s")
+    if removed:
+        print(f"Cache : {removed} entrée(s) ancienne(s) supprimée(s)")
+    print("Terminé ->", out)
+
+
+if __name__ == "__main__":
+    main()
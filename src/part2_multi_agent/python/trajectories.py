@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Partie 2 — Format binaire des trajectoires multi-agent
+
+Un lot de R réplications de T jours est stocké sous forme de deux fichiers :
+- <nom>.npy  : tableau int32 (R, T+1, 4), colonnes S,E,I,R, ligne t = jour t
+               (format .npy standard, chargeable en mémoire-mappée) ;
+- <nom>.json : en-tête de métadonnées
+    {"format": "seirs-traj", "version": 1, "columns": ["S","E","I","R"],
+     "reps": [{"engine": ..., "seed": ..., "params": {...}, "source": ...}, ...]}
+  avec une entrée par réplication (même ordre que l'axe 0).
+
+Les moteurs Python, C++ et C écrivent directement ce format quand le
+fichier de sortie se termine par .npy. Le script convert_runs_part2.py
+convertit les CSV existants de data/part2_multi_agent.
+"""
+
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+import json
+
+import numpy as np
+
+FORMAT = "seirs-traj"
+VERSION = 1
+COLUMNS = ["S", "E", "I", "R"]
+
+
+def meta_path(path: Path) -> Path:
+    return Path(path).with_suffix(".json")
+
+
+def seed_to_json(seed):
+    """Entier, ou SeedSequence décrite par (entropy, spawn_key)."""
+    if isinstance(seed, np.random.SeedSequence):
+        return {"entropy": int(seed.entropy), "spawn_key": [int(k) for k in seed.spawn_key]}
+    return None if seed is None else int(seed)
+
+
+def seed_from_json(seed):
+    """Inverse de seed_to_json."""
+    if isinstance(seed, dict):
+        return np.random.SeedSequence(seed["entropy"], spawn_key=tuple(seed["spawn_key"]))
+    return seed
+
+
+def rep_meta(engine: str, p=None, seed=None, **extra) -> dict:
+    """Métadonnées d'une réplication (p : dataclass Params du moteur)."""
+    meta = {"engine": engine}
+    if p is not None and is_dataclass(p):
+        params = asdict(p)
+        seed = params.pop("seed", seed)
+        meta["params"] = params
+    meta["seed"] = seed_to_json(seed)
+    meta.update(extra)
+    return meta
+
+
+def write_meta(path: Path, reps: list):
+    header = {"format": FORMAT, "version": VERSION, "columns": COLUMNS, "reps": reps}
+    mpath = meta_path(path)
+    tmp = mpath.with_name(mpath.name + ".tmp")
+    tmp.write_text(json.dumps(header, indent=1), encoding="utf-8")
+    tmp.replace(mpath)  # remplacement atomique : jamais d'en-tête tronqué
+
+
+def read_meta(path: Path) -> dict:
+    mpath = meta_path(path)
+    if not mpath.exists():
+        return {"format": FORMAT, "version": VERSION, "columns": COLUMNS, "reps": []}
+    header = json.loads(mpath.read_text(encoding="utf-8"))
+    if header.get("format") != FORMAT:
+        raise ValueError(f"Format inattendu dans {mpath}: {header.get('format')}")
+    return header
+
+
+def create(path: Path, reps: int, T: int, meta: list = None) -> np.ndarray:
+    """Crée un lot vide (R, T+1, 4) mémoire-mappé, à remplir réplication par réplication."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=(reps, T + 1, 4))
+    write_meta(path, meta if meta is not None else [{} for _ in range(reps)])
+    return data
+
+
+def save(path: Path, counts: np.ndarray, meta: list):
+    """Écrit un lot complet ; counts de forme (T+1, 4) ou (R, T+1, 4)."""
+    counts = np.asarray(counts, dtype=np.int32)
+    if counts.ndim == 2:
+        counts = counts[None]
+    if counts.ndim != 3 or counts.shape[2] != 4:
+        raise ValueError(f"Forme inattendue: {counts.shape} (attendu (R, T+1, 4))")
+    if len(meta) != counts.shape[0]:
+        raise ValueError(f"{len(meta)} entrées de métadonnées pour {counts.shape[0]} réplications")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, counts)
+    write_meta(path, meta)
+
+
+def load(path: Path, mmap: bool = True):
+    """
+    Charge un lot : renvoie (tableau (R, T+1, 4), métadonnées).
+    Avec mmap=True, le tableau est mémoire-mappé (lecture paresseuse).
+    """
+    path = Path(path)
+    data = np.load(path, mmap_mode="r" if mmap else None)
+    if data.ndim != 3 or data.shape[2] != 4:
+        raise ValueError(f"Forme inattendue dans {path}: {data.shape}")
+    return data, read_meta(path)